@@ -0,0 +1,58 @@
+# Бенчмарк часу імпорту прошивки під CPython: модулі machine/network підміняє симулятор з пакета sim
+# Запуск: python bench/bench_boot.py
+# Кожен замір - окремий процес; "source" компілює модулі заново (як .py на контролері), "bytecode" бере готовий кеш (як .mpy)
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RUNS = 15
+
+# Код заміру в дочірньому процесі: час імпорту main, потім веб-інтерфейсу, і кількість завантажених модулів прошивки
+PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+# Стандартна бібліотека CPython і заглушки обладнання завантажуються до заміру: на контролері вони вбудовані
+import asyncio, json, socket, struct, sim.machine, sim.network
+before = len(sys.modules)
+start = time.perf_counter()
+import main
+boot = time.perf_counter() - start
+boot_modules = len(sys.modules) - before
+start = time.perf_counter()
+import web
+web_time = time.perf_counter() - start
+print(boot * 1e3, web_time * 1e3, boot_modules, len(sys.modules) - before - boot_modules)
+"""
+
+
+def probe(cache_dir, compile_source):
+    env = dict(os.environ)
+    env["PYTHONPYCACHEPREFIX"] = cache_dir
+    if compile_source:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+    out = subprocess.check_output([sys.executable, "-c", PROBE.format(root=os.path.abspath(ROOT))], env=env, cwd=tempfile.gettempdir())
+    boot_ms, web_ms, boot_modules, web_modules = out.split()
+    return float(boot_ms), float(web_ms), int(boot_modules), int(web_modules)
+
+
+def median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as empty_cache, tempfile.TemporaryDirectory() as warm_cache:
+        probe(warm_cache, False)  # Заповнення кешу байткоду
+        print("Firmware import time, median of {} runs".format(RUNS))
+        for label, cache, compile_source in (("source", empty_cache, True), ("bytecode", warm_cache, False)):
+            results = [probe(cache, compile_source) for _ in range(RUNS)]
+            boot_ms = median([r[0] for r in results])
+            web_ms = median([r[1] for r in results])
+            print("  {:9s} boot (import main) {:6.1f} ms, {} modules;  web on AP start {:6.1f} ms, +{} modules;  eager total {:6.1f} ms".format(
+                label, boot_ms, results[0][2], web_ms, results[0][3], boot_ms + web_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# Бенчмарк HTTP-обробника під CPython через loopback-сокет:
+# попередній if/elif обробник (нове з'єднання на кожен запит) проти таблиці маршрутів з keep-alive
+# Запуск: python bench/bench_http.py
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from http_server import Router, send_response
+from logger import logger, WARNING
+
+REQUESTS = 2000
+SENSORS = {"Sensor{}".format(n): {"settings": ["None", "None"]} for n in range(1, 33)}
+
+# Журнал запитів не повинен впливати на вимірювання
+logger.level = WARNING
+
+
+# Обгортка CPython StreamWriter з методами awrite/aclose, як у uasyncio
+class LegacyWriter:
+    def __init__(self, writer):
+        self.writer = writer
+
+    async def awrite(self, data):
+        self.writer.write(data.encode() if isinstance(data, str) else data)
+        await self.writer.drain()
+
+    async def aclose(self):
+        self.writer.close()
+
+
+# Попередній обробник: розбір заголовків через split і закриття з'єднання після кожного запиту
+async def legacy_handler(reader, raw_writer):
+    writer = LegacyWriter(raw_writer)
+    try:
+        request_line = (await reader.readline()).decode()
+        if request_line == '':
+            return
+        method, path, _ = request_line.split()
+        while True:
+            header = await reader.readline()
+            if header == b'\r\n':
+                break
+            if header.startswith(b'Content-Length:'):
+                content_length = int(header.split(b' ')[1].strip())
+        if path == '/activate_pin' and method == 'POST':
+            json.loads(await reader.read(content_length))
+            await writer.awrite("HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\nPin activated")
+        elif path == '/get_sensors':
+            body = json.dumps({"sensors": [{"name": name, "settings": sensor["settings"]} for name, sensor in SENSORS.items()]})
+            await writer.awrite("HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + body)
+        else:
+            await writer.awrite("HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n\r\n404 Not Found")
+    finally:
+        await writer.aclose()
+
+
+# Новий обробник на таблиці маршрутів
+router = Router()
+
+
+@router.route('POST', '/activate_pin')
+async def activate_pin_route(request, writer):
+    request.json()
+    await send_response(writer, request, 200, "Pin activated")
+
+
+@router.route('GET', '/get_sensors')
+async def get_sensors_route(request, writer):
+    body = json.dumps({"sensors": [{"name": name, "settings": sensor["settings"]} for name, sensor in SENSORS.items()]})
+    await send_response(writer, request, 200, body, 'application/json')
+
+
+def make_request(i):
+    if i % 2:
+        return b"GET /get_sensors HTTP/1.1\r\nHost: bench\r\n\r\n"
+    body = b'{"pin": "1"}'
+    return b"POST /activate_pin HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+
+
+# Клієнт без keep-alive: нове з'єднання на кожен запит, відповідь читається до закриття
+async def run_legacy_client(port):
+    for i in range(REQUESTS):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(make_request(i))
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+
+# Клієнт keep-alive: одне з'єднання, відповідь читається за Content-Length
+async def run_keepalive_client(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for i in range(REQUESTS):
+        writer.write(make_request(i))
+        await writer.drain()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+    writer.close()
+
+
+async def measure(handler, client):
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    start = time.perf_counter()
+    await client(port)
+    elapsed = time.perf_counter() - start
+    # Даємо серверу обробити закриття з'єднань клієнтом
+    await asyncio.sleep(0.1)
+    server.close()
+    await server.wait_closed()
+    return REQUESTS / elapsed
+
+
+async def main():
+    legacy_rps = await measure(legacy_handler, run_legacy_client)
+    router_rps = await measure(router.handle, run_keepalive_client)
+    print("HTTP handler, {} requests over loopback".format(REQUESTS))
+    print("  legacy if/elif, connection per request: {:8.0f} req/s".format(legacy_rps))
+    print("  router, keep-alive:                     {:8.0f} req/s".format(router_rps))
+    print("  speedup:                                {:8.2f}x".format(router_rps / legacy_rps))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
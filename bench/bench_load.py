@@ -0,0 +1,99 @@
+# Навантажувальний бенчмарк прошивки на симуляторі: набір сценаріїв з різними налаштуваннями, трафіком і клієнтами веб-інтерфейсу
+# Запуск: python bench/bench_load.py [--scenario NAME] [--timeline trace.json] [--update-baseline]
+# Кожен сценарій - окремий процес python -m sim з віртуальним годинником, тож результати відтворювані;
+# порівняння з bench/load_baseline.json завершується кодом 1, якщо якийсь показник погіршився понад допуск
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "load_baseline.json")
+
+# Сценарій: назва -> аргументи python -m sim
+SCENARIOS = {
+    "default": ["--hours", "1", "--vends-per-hour", "60"],
+    "no_clamp": ["--hours", "1", "--vends-per-hour", "60", "--no-clamp"],
+    "fast_clicks": ["--hours", "1", "--vends-per-hour", "60", "--delay-between-clicks", "100", "--activation-delay", "100"],
+    "slow_clicks": ["--hours", "1", "--vends-per-hour", "60", "--delay-between-clicks", "400", "--activation-delay", "400"],
+    "burst": ["--hours", "1", "--vends-per-hour", "120", "--burst", "3"],
+    "web_load": ["--hours", "1", "--vends-per-hour", "60", "--http-clients", "4", "--sse-clients", "2"],
+    "saturation": ["--hours", "0.25", "--vends-per-hour", "1800", "--policy", "fifo"],
+    "overnight": ["--hours", "8", "--vends-per-hour", "2", "--idle-after", "5", "--lightsleep"],
+}
+
+# Показник -> (кращий напрямок, допустиме відносне погіршення); пам'ять хоста і час обслуговування шумні
+METRICS = {
+    "vends_per_min": (1, 0.02),
+    "dropped": (-1, 0.0),
+    "latency_p50_ms": (-1, 0.05),
+    "latency_p99_ms": (-1, 0.05),
+    "peak_memory_kb": (-1, 0.15),
+    "http_errors": (-1, 0.0),
+}
+
+
+def run_scenario(args, timeline=None):
+    command = [sys.executable, "-m", "sim", "--json", "--trace-memory"] + args
+    if timeline:
+        command += ["--timeline", os.path.abspath(timeline)]
+    return json.loads(subprocess.check_output(command, cwd=ROOT).decode().splitlines()[-1])
+
+
+# Порівняння з базовою лінією; повертає список погіршених показників
+def compare(result, baseline):
+    regressions = []
+    for metric, (direction, tolerance) in METRICS.items():
+        old = baseline.get(metric)
+        new = result.get(metric)
+        if old is None or new is None:
+            continue
+        # Допуск щонайменше одиниця для лічильників, щоб нульова база не давала хибних спрацювань
+        allowed = max(abs(old) * tolerance, 0 if tolerance else 0.5)
+        if (new - old) * direction < -allowed:
+            regressions.append("{} {:.2f} -> {:.2f}".format(metric, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay press traces with web clients on the simulated controller")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--timeline", help="recorded trace replayed in every scenario instead of synthetic traffic")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+
+    names = args.scenario or list(SCENARIOS)
+    results = {}
+    failed = False
+    print("{:12s} {:>9s} {:>7s} {:>8s} {:>8s} {:>8s} {:>9s} {:>6s}".format(
+        "scenario", "vends/min", "dropped", "p50 ms", "p99 ms", "mem KiB", "http req", "sse"))
+    for name in names:
+        result = run_scenario(SCENARIOS[name], args.timeline)
+        results[name] = {metric: round(result[metric], 2) for metric in METRICS}
+        print("{:12s} {:9.2f} {:7d} {:8.0f} {:8.0f} {:8.0f} {:9d} {:6d}".format(
+            name, result["vends_per_min"], result["dropped"], result["latency_p50_ms"], result["latency_p99_ms"],
+            result["peak_memory_kb"], result["http_requests"], result["sse_events"]))
+        # Записаний розклад не порівнюється з базою синтетичного трафіку
+        if name in baseline and not args.timeline and not args.update_baseline:
+            regressions = compare(results[name], baseline[name])
+            if regressions:
+                failed = True
+                print("  REGRESSION: " + "; ".join(regressions))
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Baseline written to " + BASELINE)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+# Мікробенчмарк циклу опитування розширювачів під CPython
+# Запуск: python bench/bench_poll.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sensor_index import index_key
+from sensor_store import SensorStore
+from keypad import KEYS
+from edges import detect_edges, PRESS
+
+ADDRESSES = (33, 34, 35, 36)
+CYCLES = 20000
+
+
+# Імітація шини I2C з чотирма розширювачами PCF8574
+class FakeI2C:
+    def __init__(self, addresses, burst=False):
+        self.states = {address: 0x00 for address in addresses}
+        self.tick = 0
+        self.burst = burst
+
+    def scan(self):
+        return list(self.states)
+
+    def readfrom(self, address, nbytes):
+        # Кожен цикл перемикаємо один біт, щоб були фронти натискання і відпускання;
+        # у режимі burst перемикаються всі біти всіх розширювачів
+        self.tick += 1
+        if self.burst:
+            self.states[address] ^= 0xFF
+        elif address == ADDRESSES[self.tick % len(ADDRESSES)]:
+            self.states[address] ^= 1 << (self.tick % 8)
+        return bytes((self.states[address],))
+
+
+# Функція для створення конфігурації з 32 сенсорів, як у main.py
+def make_sensors():
+    sensors = {}
+    number = 1
+    for address in (35, 36, 34, 33):
+        for pin in range(8):
+            sensors["Sensor{}".format(number)] = {"address": address, "pin": pin, "settings": ["None", "None"]}
+            number += 1
+    return sensors
+
+
+# Цикл опитування з лінійним пошуком сенсора (попередня реалізація)
+def poll_linear(i2c, sensors, prev_state, pressed_sensors):
+    for address in i2c.scan():
+        state = i2c.readfrom(address, 1)[0]
+        if address not in prev_state:
+            prev_state[address] = 0xFF
+        for pin in range(8):
+            if (state & (1 << pin)) != 0 and (prev_state[address] & (1 << pin)) == 0:
+                sensor_name = None
+                for sensor, details in sensors.items():
+                    if details["address"] == address and details["pin"] == pin:
+                        sensor_name = sensor
+                        break
+                if sensor_name:
+                    pressed_sensors[sensor_name] = True
+            elif (state & (1 << pin)) == 0 and (prev_state[address] & (1 << pin)) != 0:
+                for sensor, details in sensors.items():
+                    if details["address"] == address and details["pin"] == pin:
+                        if sensor in pressed_sensors:
+                            del pressed_sensors[sensor]
+        prev_state[address] = state
+
+
+# Цикл опитування з індексом (адреса, пін) -> сенсор
+def poll_indexed(i2c, sensor_index, prev_state, pressed_sensors):
+    for address in i2c.scan():
+        state = i2c.readfrom(address, 1)[0]
+        if address not in prev_state:
+            prev_state[address] = 0xFF
+        for pin in range(8):
+            if (state & (1 << pin)) != 0 and (prev_state[address] & (1 << pin)) == 0:
+                sensor_name = sensor_index.get(index_key(address, pin))
+                if sensor_name:
+                    pressed_sensors[sensor_name] = True
+            elif (state & (1 << pin)) == 0 and (prev_state[address] & (1 << pin)) != 0:
+                sensor = sensor_index.get(index_key(address, pin))
+                if sensor in pressed_sensors:
+                    del pressed_sensors[sensor]
+        prev_state[address] = state
+
+
+edge_events = []
+
+
+# Цикл опитування з XOR-детектором фронтів і індексом
+def poll_xor(i2c, sensor_index, prev_state, pressed_sensors):
+    edge_events.clear()
+    for address in i2c.scan():
+        detect_edges(prev_state, address, i2c.readfrom(address, 1)[0], edge_events)
+    for address, pin, edge in edge_events:
+        sensor_name = sensor_index.get(index_key(address, pin))
+        if edge == PRESS:
+            if sensor_name:
+                pressed_sensors[sensor_name] = True
+        elif sensor_name in pressed_sensors:
+            del pressed_sensors[sensor_name]
+
+
+# Функція для вимірювання середнього часу одного циклу опитування
+def measure(poll, lookup, burst):
+    i2c = FakeI2C(ADDRESSES, burst)
+    prev_state = {}
+    pressed_sensors = {}
+    start = time.perf_counter()
+    for _ in range(CYCLES):
+        poll(i2c, lookup, prev_state, pressed_sensors)
+    return (time.perf_counter() - start) / CYCLES * 1e6
+
+
+def main():
+    sensors = make_sensors()
+    # Індекс будується так само, як у прошивці: зі сховища сенсорів після міграції settings.json
+    store = SensorStore(KEYS)
+    store.load_dict(sensors)
+    sensor_index = store.index()
+    print("Poll cycle, {} expanders, {} sensors, {} cycles".format(len(ADDRESSES), len(sensors), CYCLES))
+    for burst in (False, True):
+        linear_us = measure(poll_linear, sensors, burst)
+        indexed_us = measure(poll_indexed, sensor_index, burst)
+        xor_us = measure(poll_xor, sensor_index, burst)
+        print("{}:".format("all pins toggling" if burst else "one edge per cycle"))
+        print("  linear scan: {:8.2f} us/cycle".format(linear_us))
+        print("  index:       {:8.2f} us/cycle".format(indexed_us))
+        print("  xor edges:   {:8.2f} us/cycle".format(xor_us))
+        print("  speedup:     {:8.2f}x".format(linear_us / xor_us))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Бенчмарк конфігурації сенсорів під CPython: словник сенсорів у settings.json проти бінарного сховища
+# Запуск: python bench/bench_sensors.py
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sensor_store import SensorStore
+
+ACTIONS = "123456789E0C"
+ITERATIONS = 5000
+
+
+# Функція для створення конфігурації з 32 сенсорів у старому форматі
+def make_sensors():
+    sensors = {}
+    number = 1
+    for address in (35, 36, 34, 33):
+        for pin in range(8):
+            sensors["Sensor{}".format(number)] = {"address": address, "pin": pin, "settings": [ACTIONS[number % 12], "None"]}
+            number += 1
+    return sensors
+
+
+def legacy_response(sensors):
+    return json.dumps({"sensors": [{"name": name, "settings": sensor["settings"]} for name, sensor in sorted(sensors.items(), key=lambda x: int(x[0].replace('Sensor', '')))]})
+
+
+def store_response(store):
+    return json.dumps({"sensors": [{"name": store.name(i), "settings": store.actions_of(i)} for i in range(store.count)]})
+
+
+# Середній час виклику в мікросекундах
+def timeit(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1e6
+
+
+# Пам'ять, яку утримує результат виклику (байт)
+def retained(fn):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = fn()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    sensors = make_sensors()
+    legacy_file = json.dumps({"delay_between_clicks": 200, "sensors": sensors})
+    store = SensorStore(ACTIONS)
+    store.load_dict(sensors)
+    binary_file, _ = store.encode()
+
+    def load_legacy():
+        return json.loads(legacy_file)["sensors"]
+
+    def load_binary():
+        loaded = SensorStore(ACTIONS)
+        loaded.decode(binary_file)
+        return loaded
+
+    cached = store_response(store)
+    print("Sensor configuration, {} sensors".format(store.count))
+    print("  file size:        json {:6d} B   binary {:6d} B".format(len(legacy_file), len(binary_file)))
+    print("  load:             json {:6.1f} us  binary {:6.1f} us".format(timeit(load_legacy), timeit(load_binary)))
+    print("  RAM held:         json {:6d} B   binary {:6d} B".format(retained(load_legacy), retained(load_binary)))
+    print("  /get_sensors:     sort+dumps {:6.1f} us  store dumps {:6.1f} us  cached {:6.2f} us".format(
+        timeit(lambda: legacy_response(sensors)), timeit(lambda: store_response(store)), timeit(lambda: cached)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# Етапи завантаження прошивки: мітки ticks_ms від перезапуску контролера до входу в основний цикл
+from clock import ticks_ms, ticks_diff
+
+
+class BootTimeline:
+    def __init__(self):
+        self.marks = [("start", ticks_ms())]  # (етап, ticks_ms) у порядку проходження
+
+    def mark(self, name):
+        self.marks.append((name, ticks_ms()))
+
+    # Тривалість кожного етапу від попередньої мітки; перший рахується від перезапуску (ticks_ms == 0)
+    def breakdown(self):
+        result = []
+        previous = 0
+        for name, at in self.marks:
+            result.append((name, ticks_diff(at, previous), at))
+            previous = at
+        return result
+
+    # Рядок для журналу: "start 412 ms, imports 95 ms, ... total 780 ms"
+    def summary(self):
+        parts = ["{} {} ms".format(name, duration) for name, duration, _ in self.breakdown()]
+        parts.append("total {} ms".format(self.marks[-1][1]))
+        return ", ".join(parts)
+
+    def stats(self):
+        return [{"stage": name, "ms": duration, "at_ms": at} for name, duration, at in self.breakdown()]
@@ -0,0 +1,24 @@
+# Лічильники часу MicroPython (ticks_*) з заміною для CPython
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add
+except ImportError:
+    import time
+
+    # Джерело часу в секундах; симулятор підміняє його віртуальним годинником
+    _time_source = time.monotonic
+
+    def set_time_source(source):
+        global _time_source
+        _time_source = source
+
+    def ticks_ms():
+        return int(_time_source() * 1000)
+
+    def ticks_us():
+        return int(_time_source() * 1000000)
+
+    def ticks_diff(new, old):
+        return new - old
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
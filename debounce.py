@@ -0,0 +1,108 @@
+# Антидребезг сенсорів: компактний автомат станів на кожен сенсор, керований фронтами опитування і мітками ticks_ms
+from array import array
+
+from clock import ticks_diff
+
+# Стани автомата сенсора
+IDLE = 0  # Відпущений
+PENDING = 1  # Натиснутий, чекаємо затримку активації
+CONFIRMED = 2  # Натискання підтверджене, продаж поставлено в чергу
+LATCHED = 3  # Утримується довше за поріг довгого натискання, калібрування вже запущене
+RELEASED = 4  # Щойно відпущений; повторний фронт у цьому вікні вважається дребезгом
+
+
+class Debouncer:
+    def __init__(self, activation_ms=200, release_ms=50, long_press_ms=5000):
+        self.activation_ms = activation_ms
+        self.release_ms = release_ms
+        self.long_press_ms = long_press_ms
+        self.slots = {}  # ім'я сенсора -> номер слота
+        self.names = []
+        self.states = bytearray(0)
+        self.since = array("L")  # ticks_ms останньої зміни стану
+        self.order = []  # Сенсори в стані PENDING у порядку натискання
+        self.bounces = 0
+
+    # Перебудова слотів під поточний список сенсорів; стани скидаються
+    def configure(self, names):
+        self.names = list(names)
+        self.slots = {name: i for i, name in enumerate(self.names)}
+        self.states = bytearray(len(self.names))
+        self.since = array("L", [0] * len(self.names))
+        self.order = []
+
+    def state(self, name):
+        return self.states[self.slots[name]]
+
+    # Час натискання (ticks_ms) підтвердженого сенсора, поки його не відпущено
+    def pressed_at(self, name):
+        return self.since[self.slots[name]]
+
+    # Фронт натискання
+    def press(self, name, now):
+        slot = self.slots.get(name)
+        if slot is None:
+            return
+        state = self.states[slot]
+        if state == IDLE:
+            self.states[slot] = PENDING
+            self.since[slot] = now
+            self.order.append(name)
+        elif state == RELEASED:
+            # Дребезг при відпусканні: сенсор насправді ще утримується
+            self.states[slot] = CONFIRMED
+            self.bounces += 1
+
+    # Фронт відпускання; повертає True, якщо непідтверджене натискання відкинуто
+    def release(self, name, now):
+        slot = self.slots.get(name)
+        if slot is None:
+            return False
+        state = self.states[slot]
+        if state == PENDING:
+            self.states[slot] = IDLE
+            self.order.remove(name)
+            self.bounces += 1
+            return True
+        if state == CONFIRMED or state == LATCHED:
+            self.states[slot] = RELEASED
+            self.since[slot] = now
+        return False
+
+    # Перевірка таймерів: підтверджені натискання (у порядку натискання) і довгі натискання додаються в списки
+    def update(self, now, confirmed, long_presses):
+        if self.order:
+            for name in self.order:
+                slot = self.slots[name]
+                if ticks_diff(now, self.since[slot]) >= self.activation_ms:
+                    self.states[slot] = CONFIRMED
+                    confirmed.append(name)
+            if confirmed:
+                self.order = [name for name in self.order if self.states[self.slots[name]] == PENDING]
+        for slot in range(len(self.states)):
+            state = self.states[slot]
+            if state == CONFIRMED:
+                if ticks_diff(now, self.since[slot]) >= self.long_press_ms:
+                    self.states[slot] = LATCHED
+                    long_presses.append(self.names[slot])
+            elif state == RELEASED:
+                if ticks_diff(now, self.since[slot]) >= self.release_ms:
+                    self.states[slot] = IDLE
+
+    # Чи є сенсор не в стані IDLE: натиснутий, утримується або щойно відпущений
+    def active(self):
+        for state in self.states:
+            if state != IDLE:
+                return True
+        return False
+
+    # Через скільки мс спливає найближча затримка активації; None, якщо нічого не очікує
+    def due_in(self, now):
+        due = None
+        for name in self.order:
+            remaining = self.activation_ms - ticks_diff(now, self.since[self.slots[name]])
+            if due is None or remaining < due:
+                due = remaining
+        if due is not None and due < 0:
+            due = 0
+        return due
@@ -0,0 +1,26 @@
+# Визначення фронтів на входах розширювачів PCF8574 через XOR станів
+
+# Типи подій: натискання (біт став 1) і відпускання (біт став 0)
+RELEASE = 0
+PRESS = 1
+
+# Початковий стан розширювача, який ще не опитувався
+INITIAL_STATE = 0xFF
+
+# Функція для пошуку фронтів одного розширювача
+# Додає у events кортежі (адреса, пін, подія) і повертає кількість нових подій
+def detect_edges(prev_state, address, state, events):
+    prev = prev_state.get(address, INITIAL_STATE)
+    prev_state[address] = state
+    changed = state ^ prev
+    if not changed:
+        return 0
+    count = 0
+    pin = 0
+    while changed:
+        if changed & 1:
+            events.append((address, pin, (state >> pin) & 1))
+            count += 1
+        changed >>= 1
+        pin += 1
+    return count
@@ -0,0 +1,111 @@
+# Стан розширювачів PCF8574: помилки читання кожної адреси, експоненційна пауза опитування і рішення про перезапуск живлення
+from clock import ticks_ms, ticks_diff, ticks_add
+
+
+class ExpanderState:
+    def __init__(self):
+        self.reads = 0
+        self.errors = 0
+        self.failures = 0  # Помилки поспіль
+        self.last_good = None  # ticks_ms останнього успішного читання
+        self.last_error = None
+        self.backoff_ms = 0  # Поточна пауза опитування після помилки
+        self.next_try = 0  # ticks_ms, раніше якого адресу не опитуємо
+
+
+class ExpanderHealth:
+    def __init__(self, backoff_min_ms=200, backoff_max_ms=10000, failure_threshold=5,
+                 recovery_cooldown_ms=60000, recovery_cooldown_max_ms=1800000):
+        self.backoff_min_ms = backoff_min_ms
+        self.backoff_max_ms = backoff_max_ms
+        self.failure_threshold = failure_threshold  # Помилок поспіль до перезапуску живлення
+        self.recovery_cooldown_min_ms = recovery_cooldown_ms
+        self.recovery_cooldown_max_ms = recovery_cooldown_max_ms
+        self.recovery_cooldown_ms = recovery_cooldown_ms  # Подвоюється, поки перезапуски не допомагають
+        self.expanders = {}  # адреса -> ExpanderState
+        self.fitted = set()  # Адреси, що відповідали з моменту завантаження; відсутність інших - не збій
+        self.recoveries = 0
+        self.recovered_at = None
+        self.recovering = False
+
+    def state(self, address):
+        state = self.expanders.get(address)
+        if state is None:
+            state = self.expanders[address] = ExpanderState()
+        return state
+
+    # Адреса відповіла на шині: розширювач встановлений, його зникнення рахується як збій
+    def found(self, address):
+        self.fitted.add(address)
+
+    # Чи можна опитувати адресу зараз; адреса з помилками чекає свою паузу
+    def due(self, address, now):
+        state = self.expanders.get(address)
+        return state is None or not state.failures or ticks_diff(now, state.next_try) >= 0
+
+    # Успішне читання скидає лічильник помилок і паузу
+    def ok(self, address, now):
+        self.fitted.add(address)
+        state = self.state(address)
+        state.reads += 1
+        state.last_good = now
+        if state.failures:
+            state.failures = 0
+            state.backoff_ms = 0
+            if not self.failing():
+                self.recovery_cooldown_ms = self.recovery_cooldown_min_ms
+
+    # Помилка читання: пауза подвоюється до максимуму; повертає кількість помилок поспіль
+    def failed(self, address, now):
+        state = self.state(address)
+        state.reads += 1
+        state.errors += 1
+        state.failures += 1
+        state.last_error = now
+        state.backoff_ms = min(self.backoff_max_ms, max(self.backoff_min_ms, state.backoff_ms * 2))
+        state.next_try = ticks_add(now, state.backoff_ms)
+        return state.failures
+
+    # Адреси, що зараз мають помилки поспіль
+    def failing(self):
+        return [address for address, state in self.expanders.items() if state.failures]
+
+    # Чи потрібен перезапуск живлення: поріг помилок перевищено і пауза після попереднього перезапуску минула
+    def recovery_due(self, now):
+        if self.recovering:
+            return False
+        if self.recovered_at is not None and ticks_diff(now, self.recovered_at) < self.recovery_cooldown_ms:
+            return False
+        for state in self.expanders.values():
+            if state.failures >= self.failure_threshold:
+                return True
+        return False
+
+    def recovery_started(self, now):
+        self.recovering = True
+        self.recoveries += 1
+        self.recovered_at = now
+        # Наступний перезапуск, якщо цей не допоможе, - не раніше ніж через подвоєну паузу
+        self.recovery_cooldown_ms = min(self.recovery_cooldown_max_ms, self.recovery_cooldown_ms * 2)
+
+    # Після перезапуску адреси опитуються одразу, без залишку паузи
+    def recovery_finished(self, now):
+        self.recovering = False
+        for state in self.expanders.values():
+            state.next_try = now
+
+    def stats(self):
+        now = ticks_ms()
+        return {
+            "recoveries": self.recoveries,
+            "recovering": self.recovering,
+            "last_recovery_age_ms": None if self.recovered_at is None else ticks_diff(now, self.recovered_at),
+            "expanders": {str(address): {
+                "reads": state.reads,
+                "errors": state.errors,
+                "error_rate": round(state.errors / state.reads, 4) if state.reads else 0,
+                "failures": state.failures,
+                "backoff_ms": state.backoff_ms,
+                "last_good_age_ms": None if state.last_good is None else ticks_diff(now, state.last_good),
+            } for address, state in self.expanders.items()},
+        }
@@ -0,0 +1,13 @@
+# Апаратний рівень: на ESP32 модулі MicroPython, на хості симулятор з пакета sim
+try:
+    from machine import Pin, I2C, Timer, WDT, reset, lightsleep
+except ImportError:
+    from sim.machine import Pin, I2C, Timer, WDT, reset, lightsleep
+
+# Модуль network потрібен лише точці доступу, тому імпортується під час її запуску
+def load_network():
+    try:
+        import network
+    except ImportError:
+        from sim import network
+    return network
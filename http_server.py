@@ -0,0 +1,197 @@
+# HTTP-сервер: розбір запиту з обмеженнями, таблиця маршрутів і постійні з'єднання (keep-alive)
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+from logger import logger
+
+STATUS_TEXT = {
+    200: "OK",
+    202: "Accepted",
+    204: "No Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    409: "Conflict",
+    412: "Precondition Failed",
+    413: "Payload Too Large",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+# Помилка запиту, яка перетворюється на відповідь з відповідним кодом
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+# Функція для отримання параметра з рядка запиту (a=1&b=2)
+def query_param(query, name, default=None):
+    for pair in query.split("&"):
+        if "=" in pair:
+            key, value = pair.split("=", 1)
+            if key == name:
+                return value
+    return default
+
+
+class Request:
+    def __init__(self, method, path, query, version, headers):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.version = version
+        self.headers = headers  # Імена заголовків у нижньому регістрі
+        self.body = b""
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.1":
+            self.keep_alive = connection != "close"
+        else:
+            self.keep_alive = connection == "keep-alive"
+
+    def param(self, name, default=None):
+        return query_param(self.query, name, default)
+
+    # Тіло запиту як JSON; некоректний JSON дає відповідь 400
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError(400)
+
+
+# Функція для читання і розбору одного запиту; None, якщо клієнт закрив з'єднання
+async def read_request(reader, max_header_bytes, max_body):
+    line = await reader.readline()
+    if not line:
+        return None
+    total = len(line)
+    if total > max_header_bytes:
+        raise HTTPError(431)
+    try:
+        method, target, version = line.decode().split()
+    except ValueError:
+        raise HTTPError(400)
+    query = ""
+    if "?" in target:
+        target, query = target.split("?", 1)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise HTTPError(400)
+        total += len(line)
+        if total > max_header_bytes:
+            raise HTTPError(431)
+        if line == b"\r\n" or line == b"\n":
+            break
+        colon = line.find(b":")
+        if colon <= 0:
+            raise HTTPError(400)
+        headers[line[:colon].decode().strip().lower()] = line[colon + 1:].decode().strip()
+
+    request = Request(method, target, query, version, headers)
+    length = headers.get("content-length")
+    if length:
+        try:
+            length = int(length)
+        except ValueError:
+            raise HTTPError(400)
+        if length < 0:
+            raise HTTPError(400)
+        if length > max_body:
+            raise HTTPError(413)
+        request.body = await reader.readexactly(length)
+    return request
+
+
+# Функція для надсилання відповіді з Content-Length, потрібним для keep-alive
+async def send_response(writer, request, status, body=b"", content_type="text/plain", extra_headers=""):
+    if isinstance(body, str):
+        body = body.encode()
+    keep_alive = request is not None and request.keep_alive
+    writer.write("HTTP/1.1 {} {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: {}\r\n{}\r\n".format(
+        status, STATUS_TEXT.get(status, ""), content_type, len(body), "keep-alive" if keep_alive else "close", extra_headers).encode())
+    if body:
+        writer.write(body)
+    await writer.drain()
+
+
+class Router:
+    def __init__(self, max_header_bytes=2048, max_body=8192, idle_timeout=5):
+        self.routes = {}  # (метод, шлях) -> обробник
+        self.allowed = {}  # шлях -> дозволені методи, для відповіді 405
+        self.max_header_bytes = max_header_bytes
+        self.max_body = max_body
+        self.idle_timeout = idle_timeout  # Скільки секунд чекати наступного запиту на відкритому з'єднанні
+        self.request_count = 0
+
+    # Реєстрація обробника маршруту
+    def add(self, method, path, handler):
+        self.routes[(method, path)] = handler
+        if path in self.allowed:
+            self.allowed[path] += ", " + method
+        else:
+            self.allowed[path] = method
+
+    # Декоратор для реєстрації обробника
+    def route(self, method, path):
+        def decorator(handler):
+            self.add(method, path, handler)
+            return handler
+        return decorator
+
+    # Виклик обробника за методом і шляхом
+    async def dispatch(self, request, writer):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            if request.path in self.allowed:
+                await send_response(writer, request, 405, "405 Method Not Allowed",
+                                    extra_headers="Allow: {}\r\n".format(self.allowed[request.path]))
+            else:
+                await send_response(writer, request, 404, "404 Not Found")
+            return
+        try:
+            await handler(request, writer)
+        except HTTPError as e:
+            await send_response(writer, request, e.status, "{} {}".format(e.status, STATUS_TEXT.get(e.status, "")))
+
+    # Обслуговування одного з'єднання: запити по черзі, доки клієнт тримає keep-alive
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader, self.max_header_bytes, self.max_body), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    # Після помилки розбору межа наступного запиту невідома, тому з'єднання закривається
+                    await send_response(writer, None, e.status, "{} {}".format(e.status, STATUS_TEXT.get(e.status, "")))
+                    break
+                if request is None:
+                    break
+                self.request_count += 1
+                logger.info("HTTP request received: %s %s", request.method, request.path)
+                await self.dispatch(request, writer)
+                if not request.keep_alive:
+                    break
+        except Exception as e:
+            logger.error("Exception in http_handler: %s", e)
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
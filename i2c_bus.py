@@ -0,0 +1,70 @@
+# Єдиний власник шини I2C: кеш присутніх пристроїв, блокування і лічильники звернень
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from clock import ticks_ms, ticks_diff
+
+
+class I2CBus:
+    def __init__(self, i2c, rescan_interval=30000):
+        self.i2c = i2c
+        self.lock = asyncio.Lock()
+        self.rescan_interval = rescan_interval  # Планове пересканування (мс)
+        self.devices = []  # Відсортований список присутніх адрес з останнього сканування
+        self.scanned_at = None  # Час останнього сканування (ticks_ms)
+        self.generation = 0  # Збільшується щоразу, коли змінюється список пристроїв
+        self.stale = True  # Потрібне позачергове сканування
+        self.scan_count = 0
+        self.read_count = 0
+        self.error_count = 0
+        self.buf = bytearray(1)  # Буфер читання, щоб опитування не створювало нових об'єктів bytes
+
+    # Сканування шини з оновленням кешу; повертає True, якщо список пристроїв змінився
+    def scan(self):
+        devices = sorted(self.i2c.scan())
+        self.scan_count += 1
+        self.scanned_at = ticks_ms()
+        self.stale = False
+        if devices != self.devices:
+            self.devices = devices
+            self.generation += 1
+            return True
+        return False
+
+    # Перевірка присутності пристрою за кешем, без звернення до шини
+    def present(self, address):
+        return address in self.devices
+
+    # Позначка, що кеш застарів (помилка читання, перезапуск живлення)
+    def invalidate(self):
+        self.stale = True
+
+    # Чи настав час пересканувати шину
+    def rescan_due(self):
+        if self.stale or self.scanned_at is None:
+            return True
+        return ticks_diff(ticks_ms(), self.scanned_at) >= self.rescan_interval
+
+    # Читання одного байта стану розширювача; помилка позначає кеш застарілим
+    async def read(self, address):
+        async with self.lock:
+            self.read_count += 1
+            try:
+                self.i2c.readfrom_into(address, self.buf)
+                return self.buf[0]
+            except OSError:
+                self.error_count += 1
+                self.stale = True
+                raise
+
+    # Статистика навантаження на шину
+    def stats(self):
+        return {
+            "devices": self.devices,
+            "scan_count": self.scan_count,
+            "read_count": self.read_count,
+            "error_count": self.error_count,
+            "last_scan_age_ms": None if self.scanned_at is None else ticks_diff(ticks_ms(), self.scanned_at),
+        }
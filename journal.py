@@ -0,0 +1,173 @@
+# Журнал продажів: записи фіксованого розміру в кільцевому файлі на flash, пакетний запис і потокове читання
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
+
+import time
+
+from clock import ticks_ms, ticks_diff
+from logger import logger
+
+# Заголовок файлу: MAGIC, місткість (записів), загальна кількість записаних записів
+MAGIC = b"JRN1"
+HEADER_FORMAT = "<4sII"
+HEADER_SIZE = 12
+
+# Запис: час (с), номер сенсора, коди двох дій, результат, затримка (мс), резерв
+RECORD_FORMAT = "<IBBBBHH"
+RECORD_SIZE = 12
+
+# Результати
+DONE = 0  # Послідовність виконана
+CANCELLED = 1  # Послідовність перервана
+DUPLICATE = 2  # Сенсор уже чекав у черзі, повтор відкинуто
+BOUNCE = 3  # Відпущений до затримки активації
+REJECTED = 4  # Черга продажів повна або зайнята
+SUPERSEDED = 5  # Замінене новішим натисканням
+EXPIRED = 6  # Застаріло в черзі
+
+OUTCOME_NAMES = ("done", "cancelled", "duplicate", "bounce", "rejected", "superseded", "expired")
+
+# Назва результату -> код, для причин відкидання з секвенсора
+OUTCOME_CODES = {name: code for code, name in enumerate(OUTCOME_NAMES)}
+
+# Скільки записів читається з файлу за одне звернення
+READ_CHUNK = 32
+
+
+class Journal:
+    def __init__(self, path="journal.bin", capacity=2048, batch=16, flush_interval_ms=60000):
+        self.path = path
+        self.capacity = capacity
+        self.batch = batch  # Записів у буфері RAM до примусового запису
+        self.flush_interval_ms = flush_interval_ms
+        self.buf = bytearray(batch * RECORD_SIZE)
+        self.pending = 0  # Записів у буфері
+        self.head = None  # Загальна кількість записів у файлі; None, поки файл не відкрито
+        self.flushed_at = ticks_ms()
+        self.flush_count = 0
+        self.write_errors = 0
+        self.lost = 0  # Записи, відкинуті через помилку запису у flash
+
+    # Відкриття або створення файлу; файл створюється одразу повного розміру
+    def open(self):
+        try:
+            with open(self.path, "rb") as f:
+                magic, capacity, head = struct.unpack(HEADER_FORMAT, f.read(HEADER_SIZE))
+            if magic == MAGIC and capacity == self.capacity:
+                self.head = head
+                return
+        except (OSError, ValueError):
+            pass
+        # Немає файлу, він пошкоджений або іншої місткості: створюємо новий
+        with open(self.path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, self.capacity, 0))
+            zeros = bytes(RECORD_SIZE * READ_CHUNK)
+            remaining = self.capacity
+            while remaining > 0:
+                n = min(remaining, READ_CHUNK)
+                f.write(zeros[:n * RECORD_SIZE])
+                remaining -= n
+        self.head = 0
+
+    # Додавання запису в буфер RAM; повний буфер записується одразу
+    def record(self, sensor, action1, action2, outcome, latency_ms=0):
+        if latency_ms > 0xFFFF:
+            latency_ms = 0xFFFF
+        struct.pack_into(RECORD_FORMAT, self.buf, self.pending * RECORD_SIZE,
+                         int(time.time()) & 0xFFFFFFFF, sensor, action1, action2, outcome, latency_ms, 0)
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.flush()
+
+    # Запис буфера у файл: записи по колу, потім заголовок. Помилка flash не виходить за межі журналу:
+    # пакет відкидається (буфер потрібен для наступних записів), продаж і секвенсор працюють далі
+    def flush(self):
+        if not self.pending:
+            return False
+        try:
+            if self.head is None:
+                self.open()
+            with open(self.path, "r+b") as f:
+                view = memoryview(self.buf)
+                for i in range(self.pending):
+                    f.seek(HEADER_SIZE + ((self.head + i) % self.capacity) * RECORD_SIZE)
+                    f.write(view[i * RECORD_SIZE:(i + 1) * RECORD_SIZE])
+                f.seek(0)
+                f.write(struct.pack(HEADER_FORMAT, MAGIC, self.capacity, self.head + self.pending))
+        except OSError as e:
+            self.write_errors += 1
+            self.lost += self.pending
+            logger.error("Journal write failed, %d records lost: %s", self.pending, e)
+            self.pending = 0
+            self.flushed_at = ticks_ms()
+            return False
+        self.head += self.pending
+        self.pending = 0
+        self.flushed_at = ticks_ms()
+        self.flush_count += 1
+        return True
+
+    def flush_due(self):
+        return self.pending and ticks_diff(ticks_ms(), self.flushed_at) >= self.flush_interval_ms
+
+    # Кількість записів, доступних для читання
+    def count(self):
+        if self.head is None:
+            self.open()
+        return min(self.head, self.capacity) + self.pending
+
+    # Усі записи від найстаріших до найновіших як кортежі; файл читається частинами, потім буфер RAM
+    def records(self):
+        if self.head is None:
+            self.open()
+        chunk = bytearray(READ_CHUNK * RECORD_SIZE)
+        start = max(0, self.head - self.capacity)
+        n = start
+        with open(self.path, "rb") as f:
+            while n < self.head:
+                slot = n % self.capacity
+                # Частина не перетинає кінець кільця
+                take = min(READ_CHUNK, self.head - n, self.capacity - slot)
+                f.seek(HEADER_SIZE + slot * RECORD_SIZE)
+                f.readinto(chunk)
+                for i in range(take):
+                    yield struct.unpack_from(RECORD_FORMAT, chunk, i * RECORD_SIZE)
+                n += take
+        for i in range(self.pending):
+            yield struct.unpack_from(RECORD_FORMAT, self.buf, i * RECORD_SIZE)
+
+    # Підсумки: продажі за сенсором і за годиною, кількість кожного результату
+    def summary(self):
+        by_sensor = {}
+        by_hour = {}
+        outcomes = [0] * len(OUTCOME_NAMES)
+        for t, sensor, action1, action2, outcome, latency_ms, _ in self.records():
+            if outcome < len(outcomes):
+                outcomes[outcome] += 1
+            if outcome == DONE:
+                by_sensor[sensor] = by_sensor.get(sensor, 0) + 1
+                hour = t - t % 3600
+                by_hour[hour] = by_hour.get(hour, 0) + 1
+        return by_sensor, by_hour, {name: outcomes[i] for i, name in enumerate(OUTCOME_NAMES)}
+
+    # Рядки CSV по одному запису, без збирання всього файлу в пам'яті
+    def csv_rows(self, actions):
+        yield "time,sensor,action1,action2,outcome,latency_ms\n"
+        for t, sensor, action1, action2, outcome, latency_ms, _ in self.records():
+            yield "%d,%d,%s,%s,%s,%d\n" % (t, sensor, actions[action1] if action1 < len(actions) else "?",
+                                           actions[action2] if action2 < len(actions) else "?",
+                                           OUTCOME_NAMES[outcome] if outcome < len(OUTCOME_NAMES) else "?", latency_ms)
+
+    # Фонова задача періодичного запису буфера
+    async def run(self, interval_ms=1000):
+        while True:
+            if self.flush_due():
+                self.flush()
+            await asyncio.sleep(interval_ms / 1000)
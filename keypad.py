@@ -0,0 +1,117 @@
+# Клавіатура автомата: матриця кнопок, піни рядків і стовпців, профілі таймінгу; перевірка і гаряче перезавантаження без перезапуску
+# Кнопки, які можуть бути діями сенсорів; порядок задає коди дій у sensors.bin і не змінюється
+KEYS = ("1", "2", "3", "4", "5", "6", "7", "8", "9", "0", "E", "C")
+
+# GPIO ESP32: 6-11 зайняті flash, 1 і 3 - UART0 консолі, 34-39 лише входи, 20, 24, 28-31 не виведені
+GPIO_PINS = tuple(range(0, 20)) + (21, 22, 23, 25, 26, 27) + tuple(range(32, 40))
+RESERVED_PINS = (1, 3, 6, 7, 8, 9, 10, 11)
+INPUT_ONLY_PINS = (34, 35, 36, 37, 38, 39)
+
+# Допустима тривалість утримання кнопки в профілі (мс)
+PRESS_MS = (50, 2000)
+
+
+# Конфігурація за замовчуванням: клавіатура Necta 4x3
+def default_keypad():
+    return {
+        "rows": {"R0": 5, "R1": 17, "R2": 16, "R3": 4},
+        "cols": {"C0": 25, "C1": 26, "C2": 27},
+        "keys": {
+            "1": ["R0", "C0"], "2": ["R0", "C1"], "3": ["R0", "C2"],
+            "4": ["R1", "C0"], "5": ["R1", "C1"], "6": ["R1", "C2"],
+            "7": ["R2", "C0"], "8": ["R2", "C1"], "9": ["R2", "C2"],
+            "0": ["R3", "C0"], "E": ["R3", "C1"], "C": ["R3", "C2"],
+        },
+        "profile": "standard",
+        "profiles": {"standard": {"press_ms": 300}, "short": {"press_ms": 150}, "long": {"press_ms": 500}},
+    }
+
+
+def _pin_number(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError("pin {}".format(value))
+    if value not in GPIO_PINS or value in RESERVED_PINS:
+        raise ValueError("GPIO {} is reserved".format(value))
+    if value in INPUT_ONLY_PINS:
+        raise ValueError("GPIO {} is input only".format(value))
+    return value
+
+
+# Перевірка конфігурації клавіатури; fixed_pins - номери GPIO інших пристроїв. Повертає нормалізовану копію,
+# помилка дає ValueError з описом
+def validate(config, fixed_pins=()):
+    rows = dict(config["rows"])
+    cols = dict(config["cols"])
+    if not rows or not cols:
+        raise ValueError("empty matrix")
+    used = {}
+    for name, number in list(rows.items()) + list(cols.items()):
+        if name in rows and name in cols:
+            raise ValueError("line {} is both row and column".format(name))
+        number = _pin_number(number)
+        if number in fixed_pins:
+            raise ValueError("GPIO {} is already used".format(number))
+        if number in used:
+            raise ValueError("GPIO {} used by {} and {}".format(number, used[number], name))
+        used[number] = name
+
+    keys = {}
+    positions = {}
+    for key, position in config["keys"].items():
+        if key not in KEYS:
+            raise ValueError("unknown key {}".format(key))
+        row, col = position
+        if row not in rows or col not in cols:
+            raise ValueError("key {} uses unknown line".format(key))
+        if (row, col) in positions:
+            raise ValueError("keys {} and {} share {}/{}".format(positions[(row, col)], key, row, col))
+        positions[(row, col)] = key
+        keys[key] = [row, col]
+
+    profiles = {}
+    for name, profile in config["profiles"].items():
+        press_ms = profile["press_ms"]
+        if isinstance(press_ms, bool) or not isinstance(press_ms, int) or not PRESS_MS[0] <= press_ms <= PRESS_MS[1]:
+            raise ValueError("profile {} press_ms".format(name))
+        profiles[name] = {"press_ms": press_ms}
+    if config["profile"] not in profiles:
+        raise ValueError("unknown profile {}".format(config["profile"]))
+    return {"rows": rows, "cols": cols, "keys": keys, "profile": config["profile"], "profiles": profiles}
+
+
+# Номери GPIO рядка і стовпця кожної кнопки
+def pin_pairs(config):
+    return {key: (config["rows"][row], config["cols"][col]) for key, (row, col) in config["keys"].items()}
+
+
+class Keypad:
+    def __init__(self, pin_class):
+        self.pin_class = pin_class
+        self.config = None
+        self.pins = {}  # GPIO -> постійний об'єкт Pin
+        self.lines = {}  # Ім'я рядка або стовпця -> Pin
+        self.table = {}  # Кнопка -> (Pin рядка, Pin стовпця), готово для планів секвенсора
+        self.press_ms = 300
+
+    # Застосування перевіреної конфігурації: піни, що більше не використовуються, опускаються і стають входами
+    def apply(self, config):
+        numbers = set(config["rows"].values()) | set(config["cols"].values())
+        for number in list(self.pins):
+            if number not in numbers:
+                self.pins[number].value(0)
+                self.pin_class(number, self.pin_class.IN)
+                del self.pins[number]
+        for number in numbers:
+            if number not in self.pins:
+                self.pins[number] = self.pin_class(number, self.pin_class.OUT, value=0)
+        self.lines = {}
+        for name, number in list(config["rows"].items()) + list(config["cols"].items()):
+            self.lines[name] = self.pins[number]
+        self.table = {key: (self.lines[row], self.lines[col]) for key, (row, col) in config["keys"].items()}
+        self.press_ms = config["profiles"][config["profile"]]["press_ms"]
+        self.config = config
+
+    # Усі лінії клавіатури в низький рівень
+    def release_all(self):
+        for pin in self.pins.values():
+            pin.value(0)
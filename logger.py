@@ -0,0 +1,129 @@
+# Журнал з рівнями: кільцевий буфер у RAM, придушення повторів і асинхронний вивід у UART
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from array import array
+
+from clock import ticks_ms, ticks_diff
+
+# Рівні журналу
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# Позначка відсутнього аргументу, щоб виклики без аргументів не створювали кортежів
+_UNSET = object()
+
+# Функція для підстановки аргументів у повідомлення лише тоді, коли рівень увімкнено
+def _format(fmt, a, b, c):
+    if a is _UNSET:
+        return fmt
+    if b is _UNSET:
+        return fmt % (a,)
+    if c is _UNSET:
+        return fmt % (a, b)
+    return fmt % (a, b, c)
+
+
+class Logger:
+    def __init__(self, capacity=64, level=INFO, rate_limit=20):
+        self.level = level
+        self.capacity = capacity
+        self.rate_limit = rate_limit  # Максимум записів за секунду
+        # Кільцевий буфер записів: час, рівень і текст у заздалегідь виділених масивах
+        self.times = array("L", [0] * capacity)
+        self.levels = bytearray(capacity)
+        self.messages = [None] * capacity
+        self.head = 0  # Загальна кількість записів
+        self.flushed = 0  # Кількість записів, виведених у UART
+        self.last_message = None
+        self.repeats = 0
+        self.window_start = ticks_ms()
+        self.window_count = 0
+        self.dropped = 0
+
+    def debug(self, fmt, a=_UNSET, b=_UNSET, c=_UNSET):
+        if DEBUG >= self.level:
+            self._emit(DEBUG, _format(fmt, a, b, c))
+
+    def info(self, fmt, a=_UNSET, b=_UNSET, c=_UNSET):
+        if INFO >= self.level:
+            self._emit(INFO, _format(fmt, a, b, c))
+
+    def warning(self, fmt, a=_UNSET, b=_UNSET, c=_UNSET):
+        if WARNING >= self.level:
+            self._emit(WARNING, _format(fmt, a, b, c))
+
+    def error(self, fmt, a=_UNSET, b=_UNSET, c=_UNSET):
+        if ERROR >= self.level:
+            self._emit(ERROR, _format(fmt, a, b, c))
+
+    # Запис у буфер з придушенням однакових повідомлень поспіль і обмеженням частоти
+    def _emit(self, level, message):
+        if message == self.last_message:
+            self.repeats += 1
+            return
+        if self.repeats:
+            self._store(INFO, "Previous message repeated %d times" % self.repeats)
+            self.repeats = 0
+        self.last_message = message
+
+        now = ticks_ms()
+        if ticks_diff(now, self.window_start) >= 1000:
+            if self.dropped:
+                self._store(WARNING, "%d log messages dropped by rate limit" % self.dropped)
+                self.dropped = 0
+            self.window_start = now
+            self.window_count = 0
+        if self.window_count >= self.rate_limit and level < ERROR:
+            self.dropped += 1
+            return
+        self.window_count += 1
+        self._store(level, message)
+
+    def _store(self, level, message):
+        i = self.head % self.capacity
+        self.times[i] = ticks_ms() & 0x3FFFFFFF
+        self.levels[i] = level
+        self.messages[i] = message
+        self.head += 1
+
+    # Форматування запису з позиції n у рядок журналу
+    def format_entry(self, n):
+        i = n % self.capacity
+        t = self.times[i]
+        return "[%d.%03d] %s %s" % (t // 1000, t % 1000, LEVEL_NAMES.get(self.levels[i], "?"), self.messages[i])
+
+    # Вивід у UART усіх записів, які ще не були виведені
+    def flush(self):
+        if self.head - self.flushed > self.capacity:
+            print("[log] %d entries lost before flush" % (self.head - self.flushed - self.capacity))
+            self.flushed = self.head - self.capacity
+        while self.flushed < self.head:
+            print(self.format_entry(self.flushed))
+            self.flushed += 1
+
+    # Останні n записів як рядки, від найстаріших до найновіших
+    def tail(self, n):
+        start = max(self.head - min(n, self.capacity), 0)
+        for k in range(start, self.head):
+            yield self.format_entry(k)
+
+    # Фонова задача виводу буфера
+    async def run(self, interval_ms=200):
+        while True:
+            self.flush()
+            await asyncio.sleep(interval_ms / 1000)
+
+
+# Спільний журнал прошивки
+logger = Logger()
+
+# Функція для логування з рівнем INFO
+def log(message):
+    logger.info(message)
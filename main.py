@@ -1,84 +1,58 @@
-import uasyncio as asyncio
-import usocket as socket
-from machine import Pin, I2C, Timer, reset, WDT
-import ujson
-import network
-import os
-import time
-import gc
+# Мітка часу ставиться до решти імпортів, щоб етап "imports" у журналі завантаження був повним
+from boot_timeline import BootTimeline
+boot = BootTimeline()
+
+import sys
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+from hal import Pin, I2C, reset, WDT, lightsleep
+from clock import ticks_ms, ticks_diff
+from timers import TimerWheel
+from logger import logger, log, INFO
+from sensor_index import index_key
+from edges import detect_edges, PRESS
+from sensor_irq import SensorInterrupt
+from i2c_bus import I2CBus
+from expander_health import ExpanderHealth
+from settings_store import SettingsStore
+from sequencer import Sequencer, build_output_pins, compile_plans, POLICIES, FIFO
+from metrics import LatencyMetrics, CONFIRMED
+from debounce import Debouncer
+from memory import MemoryManager
+from sensor_store import SensorStore, ACTION_SLOTS, NO_ACTION
+from journal import Journal, DONE, CANCELLED, BOUNCE, OUTCOME_CODES
+from keypad import Keypad, KEYS, default_keypad, validate as validate_keypad
+from power import PowerManager, ACTIVE
+
+boot.mark("imports")
 
 # Налаштування пінів для підключення компонентів
 pins = {
     "SCL": {"number": 22, "direction": "input", "default_state": 0},
     "SDA": {"number": 21, "direction": "input", "default_state": 0},
+    "I2C_INT": {"number": 19, "direction": "input", "default_state": 1},
     "I2C_POWER": {"number": 23, "direction": "output", "default_state": 0}, 
     "WIFI_BUTTON": {"number": 14, "direction": "input", "default_state": 1}, 
     "FREE_MODE_BUTTON": {"number": 32, "direction": "input", "default_state": 1}, 
     "FREE_MODE_CONTACT": {"number": 33, "direction": "output", "default_state": 0},  
-    "R0": {"number": 5, "direction": "output", "default_state": 0},  
-    "R1": {"number": 17, "direction": "output", "default_state": 0},  
-    "R2": {"number": 16, "direction": "output", "default_state": 0},  
-    "R3": {"number": 4, "direction": "output", "default_state": 0},  
-    "C0": {"number": 25, "direction": "output", "default_state": 0},  
-    "C1": {"number": 26, "direction": "output", "default_state": 0},  
-    "C2": {"number": 27, "direction": "output", "default_state": 0},  
     "ENTER": {"number": 15, "direction": "output", "default_state": 0},  
     "ESC": {"number": 2, "direction": "output", "default_state": 0},  
     "LEFT_SUGAR": {"number": 13, "direction": "output", "default_state": 0},  
     "RIGHT_SUGAR": {"number": 12, "direction": "output", "default_state": 0}
 }
 
-# Налаштування клавіатури, де комбінації рядків і стовпців представляють кнопки
-button_combinations = {
-    "1": ("R0", "C0"),
-    "2": ("R0", "C1"),
-    "3": ("R0", "C2"),
-    "4": ("R1", "C0"),
-    "5": ("R1", "C1"),
-    "6": ("R1", "C2"),
-    "7": ("R2", "C0"),
-    "8": ("R2", "C1"),
-    "9": ("R2", "C2"),
-    "0": ("R3", "C0"),
-    "E": ("R3", "C1"),
-    "C": ("R3", "C2")
-}
+# Клавіатура автомата: рядки, стовпці і кнопки задаються в налаштуваннях ("keypad"), див. keypad.default_keypad()
+keypad = Keypad(Pin)
 
-# Налаштування сенсорів з адресами і пін-кодами
-sensors = {
-    "Sensor1": {"address": 35, "pin": 0, "settings": ["None", "None"]},
-    "Sensor2": {"address": 35, "pin": 1, "settings": ["None", "None"]},
-    "Sensor3": {"address": 35, "pin": 2, "settings": ["None", "None"]},
-    "Sensor4": {"address": 35, "pin": 3, "settings": ["None", "None"]},
-    "Sensor5": {"address": 35, "pin": 4, "settings": ["None", "None"]},
-    "Sensor6": {"address": 35, "pin": 5, "settings": ["None", "None"]},
-    "Sensor7": {"address": 35, "pin": 6, "settings": ["None", "None"]},
-    "Sensor8": {"address": 35, "pin": 7, "settings": ["None", "None"]},
-    "Sensor9": {"address": 36, "pin": 0, "settings": ["None", "None"]},
-    "Sensor10": {"address": 36, "pin": 1, "settings": ["None", "None"]},
-    "Sensor11": {"address": 36, "pin": 2, "settings": ["None", "None"]},
-    "Sensor12": {"address": 36, "pin": 3, "settings": ["None", "None"]},
-    "Sensor13": {"address": 36, "pin": 4, "settings": ["None", "None"]},
-    "Sensor14": {"address": 36, "pin": 5, "settings": ["None", "None"]},
-    "Sensor15": {"address": 36, "pin": 6, "settings": ["None", "None"]},
-    "Sensor16": {"address": 36, "pin": 7, "settings": ["None", "None"]},
-    "Sensor17": {"address": 34, "pin": 0, "settings": ["None", "None"]},
-    "Sensor18": {"address": 34, "pin": 1, "settings": ["None", "None"]},
-    "Sensor19": {"address": 34, "pin": 2, "settings": ["None", "None"]},
-    "Sensor20": {"address": 34, "pin": 3, "settings": ["None", "None"]},
-    "Sensor21": {"address": 34, "pin": 4, "settings": ["None", "None"]},
-    "Sensor22": {"address": 34, "pin": 5, "settings": ["None", "None"]},
-    "Sensor23": {"address": 34, "pin": 6, "settings": ["None", "None"]},
-    "Sensor24": {"address": 34, "pin": 7, "settings": ["None", "None"]},
-    "Sensor25": {"address": 33, "pin": 0, "settings": ["None", "None"]},
-    "Sensor26": {"address": 33, "pin": 1, "settings": ["None", "None"]},
-    "Sensor27": {"address": 33, "pin": 2, "settings": ["None", "None"]},
-    "Sensor28": {"address": 33, "pin": 3, "settings": ["None", "None"]},
-    "Sensor29": {"address": 33, "pin": 4, "settings": ["None", "None"]},
-    "Sensor30": {"address": 33, "pin": 5, "settings": ["None", "None"]},
-    "Sensor31": {"address": 33, "pin": 6, "settings": ["None", "None"]},
-    "Sensor32": {"address": 33, "pin": 7, "settings": ["None", "None"]}
-}
+# Розкладка сенсорів за замовчуванням: Sensor1-8 на адресі 35, Sensor9-16 на 36, Sensor17-24 на 34, Sensor25-32 на 33,
+# у межах адреси номер піна дорівнює порядковому номеру сенсора
+sensor_addresses = (35, 36, 34, 33)
+
+# Сховище сенсорів: адреси, піни і коди дій у компактних масивах з окремим бінарним файлом
+sensor_store = SensorStore(KEYS)
+sensor_store.load_layout(sensor_addresses)
 
 # Налаштування загальної системи
 settings = {
@@ -88,524 +62,476 @@ settings = {
     "calibration_interval": True,  # Інтервал калібрування сенсорів
     "free_mode_timeout": 3,  # Таймаут безкоштовного режиму (хвилини)
     "access_point_deactivation_time": 30,  # Час деактивації точки доступу (хвилини)
-    "sensors": sensors  # Налаштування сенсорів
+    "sensor_interrupt_mode": False,  # Читати сенсори за сигналом INT замість постійного опитування
+    "sensor_fallback_poll": 1000,  # Резервне опитування сенсорів у режимі INT (мс)
+    "i2c_rescan_interval": 30,  # Планове пересканування шини I2C (секунди)
+    "log_level": 20,  # Рівень журналу: 10 DEBUG, 20 INFO, 30 WARNING, 40 ERROR
+    "latency_metrics": True,  # Вимірювати затримку від сенсора до клавіатури (/metrics)
+    "vend_queue_policy": "fifo",  # Черга продажів: fifo, latest (останнє натискання) або reject (відкидати під час продажу)
+    "vend_queue_depth": 4,  # Максимум натискань, що чекають у черзі
+    "vend_queue_expiry": 10000,  # Натискання, що чекало довше (мс), не виконується
+    "keypad": default_keypad(),  # Матриця клавіатури, піни рядків і стовпців, профілі таймінгу
+    "power_idle_after": 10,  # Без натискань довше (хвилини) - повільне опитування; 0 вимикає
+    "power_idle_poll": 500,  # Інтервал опитування в режимі простою (мс)
+    "power_lightsleep": False,  # machine.lightsleep між опитуваннями в режимі простою
+    "ap_idle_timeout": 5,  # Вимикати точку доступу, якщо клієнтів немає довше (хвилини); 0 - лише за access_point_deactivation_time
+    "settings_version": 0  # Лічильник змін налаштувань і сенсорів, з нього формується ETag
 }
 
-# Функція для отримання поточного часу у вигляді рядка
-def get_timestamp():
-    t = time.localtime()
-    return "{:04}-{:02}-{:02} {:02}:{:02}:{:02}".format(t[0], t[1], t[2], t[3], t[4], t[5])
-
-# Функція для логування з додаванням часу
-def log(message):
-    timestamp = get_timestamp()
-    print(f"[{timestamp}] {message}")
-    
-# Змінні для відстеження стану пристроїв і часу останнього логування
-prev_devices = set()
-last_log_time = time.time()    
-
-# Збереження налаштувань у файл
+# Налаштування, зміна яких потребує перезавантаження контролера
+RESTART_SETTINGS = ("sensor_interrupt_mode",)
+
+# Сховище налаштувань з атомарним і відкладеним записом
+settings_store = SettingsStore('settings.json')
+
+# Негайне збереження налаштувань у файл
 def save_settings():
     log("Saving settings to file")
-    with open('settings.json', 'w') as f:
-        ujson.dump(settings, f)
-    log("Settings saved")
+    if settings_store.save_now(settings):
+        log("Settings saved")
+    else:
+        log("Settings unchanged, write skipped")
 
 # Функція для відкладеного перезавантаження системи
 async def delayed_reset(delay):
-    log(f"Delaying system reset for {delay} seconds")
+    logger.info("Delaying system reset for %d seconds", delay)
     await asyncio.sleep(delay)
+    # Незаписані зміни і журнал не повинні загубитися під час перезавантаження
+    settings_store.flush()
+    journal.flush()
     log("System reset")
     reset()
 
-# Завантаження налаштувань з файлу
-try:
-    log("Loading settings from file")
-    with open('settings.json', 'r') as f:
-        settings = ujson.load(f)
-        sensors = settings["sensors"]
-    log("Settings loaded successfully")
-except OSError:
-    log("Settings file not found, saving default settings")
-    save_settings()
-
-# Ініціалізація I2C інтерфейсу для сенсорів
-log("Initializing I2C interface for sensors")
-i2c = I2C(0, scl=Pin(pins["SCL"]["number"], Pin.IN, Pin.PULL_UP), sda=Pin(pins["SDA"]["number"], Pin.IN, Pin.PULL_UP), freq=100000)
-devices = i2c.scan()
-log(f"I2C devices found: {devices}")
-
-# Блокування для запобігання обробці інших сигналів під час виконання комбінації
-execution_lock = asyncio.Lock()
-
-
-# Функція для обробки дій при натисканні сенсора
-async def handle_sensor_action(sensor):
-    async with execution_lock:
-        log(f"Handling action for sensor: {sensor}")
-        delay_between_clicks = settings["delay_between_clicks"] / 1000.0  # Перетворюємо мілісекунди в секунди
-        sensor_activation_delay = settings["sensor_activation_delay"] / 1000.0  # Перетворюємо мілісекунди в секунди
-        clamp_C_before_combination = settings["clamp_C_before_combination"]
-        start_time = time.ticks_ms()  # Записуємо час початку натискання
-
-        address = sensors[sensor]["address"]
-        pin = sensors[sensor]["pin"]
-
-        # Оновлення списку пристроїв перед обробкою сигналу
-        global devices
-        devices = i2c.scan()
-        log(f"Updated I2C devices: {devices}")
-
-        # Перевірка фізичної присутності сенсора
-        if address not in devices:
-            log(f"Sensor {sensor} not physically present, skipping")
-            return
-
-        # Перевірка стану сенсора
-        try:
-            state = i2c.readfrom(address, 1)[0]
-            log(f"Sensor {sensor} state: {state}")
-        except OSError:
-            log(f"Sensor {sensor} not responding, skipping")
-            return  # Якщо сенсор не відповідає, виходимо з функції
-
-        # Надсилаємо інформацію про активний сенсор на клієнт
-        global last_active_sensor
-        last_active_sensor = {"name": sensor, "active": True}
-        log(f"Sending sensor event: {last_active_sensor}")  # Додаємо журналювання
-        await send_sensor_event(last_active_sensor)
-
-        while True:
-            elapsed_time = time.ticks_diff(time.ticks_ms(), start_time)
-            if (state & (1 << pin)) == 0:
-                log(f"Sensor {sensor} released before activation delay")
-                return  # Якщо сенсор не натиснутий, виходимо з функції
-            if elapsed_time >= sensor_activation_delay * 1000:
-                break  # Виходимо з циклу, коли досягнута затримка активації
-            await asyncio.sleep(0.01)  # Чекаємо 10 мс перед наступною перевіркою
-
-        # Перевіряємо, чи сенсор все ще натиснутий після затримки
-        try:
-            state = i2c.readfrom(address, 1)[0]
-            log(f"Sensor {sensor} state after delay: {state}")
-        except OSError:
-            log(f"Sensor {sensor} not responding, skipping")
-            return  # Якщо сенсор не відповідає, виходимо з функції
-        if (state & (1 << pin)) == 0:
-            log(f"Sensor {sensor} released after activation delay")
-            return
-
-        sensor_settings = sensors[sensor]["settings"]
-
-        if clamp_C_before_combination:
-            # Затискаємо "C" перед комбінацією
-            execute_action("C")
-            await asyncio.sleep(0.3)  # Затримка 300мс
-            # Відпускаємо "C" після затримки
-            row, col = button_combinations["C"]
-            Pin(pins[row]["number"], Pin.OUT).value(0)
-            Pin(pins[col]["number"], Pin.OUT).value(0)
-            await asyncio.sleep(delay_between_clicks)  # Пауза між "C" та комбінацією
-
-        if sensor_settings[0] == "None":
-            log("No action for setting 0")
-        else:
-            log(f"Executing action for setting 0: {sensor_settings[0]}")
-            execute_action(sensor_settings[0])
-        await asyncio.sleep(0.3)  # Затримка 300мс
-        if sensor_settings[0] in button_combinations:
-            row, col = button_combinations[sensor_settings[0]]
-            Pin(pins[row]["number"], Pin.OUT).value(0)
-            Pin(pins[col]["number"], Pin.OUT).value(0)
-        await asyncio.sleep(delay_between_clicks)  # Використовуємо затримку між кліками з налаштувань
-        if sensor_settings[1] == "None":
-            log("No action for setting 1")
-        else:
-            log(f"Executing action for setting 1: {sensor_settings[1]}")
-            execute_action(sensor_settings[1])
-        await asyncio.sleep(0.3)  # Затримка 300мс
-        if sensor_settings[1] in button_combinations:
-            row, col = button_combinations[sensor_settings[1]]
-            Pin(pins[row]["number"], Pin.OUT).value(0)
-            Pin(pins[col]["number"], Pin.OUT).value(0)
-
-
-
-# Функція для виконання дії, яка відповідає заданому налаштуванню
-def execute_action(action):
-    log(f"Executing action: {action}")
-    if action != "None" and action in button_combinations:
-        row, col = button_combinations[action]
-        try:
-            log(f"Setting high: {row} (Pin {pins[row]['number']}) and {col} (Pin {pins[col]['number']})")
-            Pin(pins[row]["number"], Pin.OUT).value(1)
-            Pin(pins[col]["number"], Pin.OUT).value(1)
-        except ValueError as e:
-            log(f"Error setting pin: {e}, row: {row}, col: {col}")
-    else:
-        log(f"Invalid or None action: {action}")
+# Індекс сенсорів (адреса, пін) -> ім'я сенсора
+sensor_index = {}
 
-# Функція для постійного сканування I2C пристроїв
-import time
+# Готова відповідь /get_sensors; скидається при кожній зміні налаштувань
+sensors_response = None
 
-# Змінні для відстеження стану пристроїв і часу останнього логування
-prev_devices = set()
-last_log_time = time.time()
+def invalidate_sensors_cache():
+    global sensors_response
+    sensors_response = None
 
-# Функція для постійного сканування I2C пристроїв
+# Завантаження налаштувань з файлу
+def load_settings():
+    global settings, sensor_index
+    log("Loading settings from file")
+    loaded_settings = settings_store.load()
+    sensors_loaded = sensor_store.load()
+    if loaded_settings is not None:
+        # Старий settings.json містить сенсори; вони переносяться в бінарне сховище один раз
+        legacy_sensors = loaded_settings.pop("sensors", None)
+        settings = loaded_settings
+        log("Settings loaded successfully")
+        if legacy_sensors is not None:
+            if not sensors_loaded:
+                sensor_store.load_dict(legacy_sensors)
+                sensor_store.save()
+                log("Sensors migrated from settings.json to binary store")
+            save_settings()
+    else:
+        log("Settings file not found, saving default settings")
+        save_settings()
+    if not sensors_loaded and sensor_store.crc is None:
+        sensor_store.save()
+    sensor_index = sensor_store.index()
+    debouncer.configure(sensor_store.names())
+    invalidate_sensors_cache()
+
+# Створення інтерфейсу I2C; після перезапуску живлення розширювачів інтерфейс створюється заново
+def init_i2c():
+    return I2C(0, scl=Pin(pins["SCL"]["number"], Pin.IN, Pin.PULL_UP), sda=Pin(pins["SDA"]["number"], Pin.IN, Pin.PULL_UP), freq=100000)
+
+# Номери GPIO, зайняті не клавіатурою
+def fixed_pin_numbers():
+    return [config["number"] for config in pins.values()]
+
+# Ініціалізація обладнання: шина I2C, лінія INT і вихідні піни
+def init_hardware():
+    global i2c, bus, sensor_irq, out_pins, wifi_button, free_mode_button
+
+    # Ініціалізація I2C інтерфейсу для сенсорів
+    log("Initializing I2C interface for sensors")
+    i2c = init_i2c()
+    # Перше сканування виконує задача scan_i2c, коли цикл подій уже працює
+    bus = I2CBus(i2c, settings.get("i2c_rescan_interval", 30) * 1000)
+
+    # Лінія INT розширювачів, якщо увімкнено режим переривань
+    sensor_irq = None
+    if settings.get("sensor_interrupt_mode", False):
+        sensor_irq = SensorInterrupt(Pin(pins["I2C_INT"]["number"], Pin.IN, Pin.PULL_UP))
+        log("Sensor interrupt mode enabled")
+
+    # Постійні об'єкти Pin для всіх виходів, щоб не створювати їх під час продажу
+    out_pins = build_output_pins(pins, Pin)
+
+    # Клавіатура з налаштувань; пошкоджена конфігурація замінюється типовою, щоб продажі працювали
+    try:
+        settings["keypad"] = validate_keypad(settings.get("keypad") or default_keypad(), fixed_pin_numbers())
+    except (KeyError, ValueError, TypeError, AttributeError) as e:
+        logger.info("Invalid keypad configuration (%s), using default", e)
+        settings["keypad"] = default_keypad()
+    keypad.apply(settings["keypad"])
+
+    # Кнопки з підтяжкою читаються щотакту, тому об'єкти Pin створюються один раз
+    wifi_button = Pin(pins["WIFI_BUTTON"]["number"], Pin.IN, Pin.PULL_UP)
+    free_mode_button = Pin(pins["FREE_MODE_BUTTON"]["number"], Pin.IN, Pin.PULL_UP)
+
+# Гістограми затримки від фронту сенсора до клавіатури автомата
+latency = LatencyMetrics()
+
+# Керування пам'яттю: збирання сміття лише поза продажем
+memory = MemoryManager()
+
+# Секвенсор клавіатури, який виконує скомпільовані плани сенсорів
+sequencer = Sequencer(latency, memory)
+memory.idle = sequencer.idle
+
+# Журнал продажів у кільцевому файлі на flash
+journal = Journal()
+
+# Функція для запису події сенсора в журнал разом з його поточними діями
+def journal_event(name, outcome, latency_ms=0):
+    i = sensor_store.number(name)
+    if i is None:
+        return
+    base = i * ACTION_SLOTS
+    journal.record(i + 1, sensor_store.action_codes[base], sensor_store.action_codes[base + 1], outcome, latency_ms)
+
+# Завершення плану секвенсором: виконаний або перерваний продаж
+def record_vend(name, finished, latency_ms):
+    journal_event(name, DONE if finished else CANCELLED, latency_ms)
+
+# Натискання, яке черга продажів відкинула
+def record_drop(name, reason):
+    logger.info("Sensor %s press dropped: %s", name, reason)
+    journal_event(name, OUTCOME_CODES[reason])
+
+sequencer.on_finish = record_vend
+sequencer.on_drop = record_drop
+sequencer.release_all = keypad.release_all
+
+# Антидребезг сенсорів: у чергу секвенсора потрапляють лише підтверджені натискання
+debouncer = Debouncer()
+
+# Адаптивне опитування і облік часу в станах живлення
+power = PowerManager()
+
+# Стан розширювачів: помилки, пауза опитування і перезапуск живлення
+health = ExpanderHealth()
+
+# Встановлені розширювачі, яких більше немає на шині, чекають повторного сканування за своєю паузою
+def missing_expander_due(now):
+    for address in health.fitted:
+        if not bus.present(address) and health.due(address, now):
+            return True
+    return False
+
+# Задача-власник шини I2C: пересканування лише після помилки читання, за розкладом або для зниклого розширювача
 async def scan_i2c():
-    global devices, prev_devices, last_log_time
     while True:
-        devices = set(i2c.scan())
-        current_time = time.time()
-
-        # Логувати, якщо відбулися зміни в пристроях
-        if devices != prev_devices:
-            print(f"[{get_timestamp()}] I2C scan complete. Devices found: {sorted(devices)}")
-            prev_devices = devices
-            last_log_time = current_time
-        # Логувати раз на 3 секунди, якщо змін не було
-        elif (current_time - last_log_time) >= 3:
-            print(f"[{get_timestamp()}] I2C scan: No changes. Devices found: {sorted(devices)}")
-            last_log_time = current_time
-
-        await asyncio.sleep(1)
-
-# Запуск сканування I2C
-asyncio.create_task(scan_i2c())
+        now = ticks_ms()
+        if not calibrating and (bus.rescan_due() or missing_expander_due(now)):
+            async with bus.lock:
+                changed = bus.scan()
+            if changed:
+                logger.info("I2C scan complete. Devices found: %s", bus.devices)
+            else:
+                logger.debug("I2C scan: No changes. Devices found: %s", bus.devices)
+            # Зниклий розширювач рахується як помилка, щоб дійти до перезапуску живлення; адреси, що не відповідали
+            # з моменту завантаження, вважаються невстановленими (автомат може мати не всі розширювачі)
+            now = ticks_ms()
+            for address in bus.devices:
+                health.found(address)
+            for address in health.fitted:
+                if not bus.present(address) and health.due(address, now):
+                    if health.failed(address, now) == 1:
+                        logger.error("Expander %d missing from I2C bus", address)
+        # У режимі простою шина перевіряється рідше
+        await asyncio.sleep(1 if power.state == ACTIVE else 5)
+
+# Застосування налаштувань, які можна змінити без перезавантаження
+def apply_settings():
+    bus.rescan_interval = settings.get("i2c_rescan_interval", 30) * 1000
+    sequencer.plans = compile_plans(settings, sensor_store, keypad)
+    logger.level = settings.get("log_level", INFO)
+    latency.enabled = settings.get("latency_metrics", True)
+    debouncer.activation_ms = settings["sensor_activation_delay"]
+    policy = settings.get("vend_queue_policy", FIFO)
+    sequencer.policy = policy if policy in POLICIES else FIFO
+    sequencer.max_depth = settings.get("vend_queue_depth", 4)
+    sequencer.expiry_ms = settings.get("vend_queue_expiry", 10000)
+    power.idle_after_ms = settings.get("power_idle_after", 10) * 60000
+    power.idle_poll_ms = settings.get("power_idle_poll", 500)
+    power.lightsleep = settings.get("power_lightsleep", False)
 
 
 # Змінні для відстеження стану сенсорів
 prev_state = {}
-pressed_sensors = {}
+edge_events = []
+confirmed_sensors = []
+long_presses = []
 last_active_sensor = None
 
+# Програмні таймери на циклі подій замість апаратних machine.Timer
+timer_wheel = TimerWheel()
+
+# Час останнього такту основного циклу: watchdog годується, лише поки цикл живий
+main_loop_tick = ticks_ms()
+calibrating = False
+
 # Функція для скидання watchdog таймера
-def reset_wdt(timer):
-    log("Feeding watchdog timer")
-    wdt.feed()
+def reset_wdt():
+    if ticks_diff(ticks_ms(), main_loop_tick) < 5000:
+        logger.debug("Feeding watchdog timer")
+        wdt.feed()
+    else:
+        logger.error("Main loop stalled, watchdog not fed")
+
+# Перезапуск живлення розширювачів без блокування циклу подій; поки він триває, шина не опитується
+async def power_cycle_expanders():
+    global calibrating
+    calibrating = True
+    out_pins["I2C_POWER"].value(1)
+    try:
+        await asyncio.sleep(0.3)  # Затримка 300мс
+    finally:
+        out_pins["I2C_POWER"].value(0)
+        # Інтерфейс створюється заново, якщо шина зависла; попередні стани входів більше не дійсні
+        async with bus.lock:
+            bus.i2c = init_i2c()
+        bus.invalidate()
+        prev_state.clear()
+        calibrating = False
 
 # Функція для калібрування сенсорів
-def calibrate_sensors(timer):
-    if settings.get("calibration_interval", False):
+async def calibrate_sensors():
+    if settings.get("calibration_interval", False) and not calibrating:
         log("Calibrating sensors")
-        Pin(pins["I2C_POWER"]["number"], Pin.OUT).value(1)
-        time.sleep(0.3)  # Затримка 300мс
-        Pin(pins["I2C_POWER"]["number"], Pin.OUT).value(0)
+        await power_cycle_expanders()
 
-# Таймер для калібрування сенсорів кожні 2 години
-calibration_timer = Timer(-1)
-calibration_timer.init(period=7200000, mode=Timer.PERIODIC, callback=calibrate_sensors)
-log("Calibration timer initialized")
+# Відновлення розширювачів, що не відповідають: перезапуск живлення поза розкладом калібрування
+async def recover_expanders():
+    logger.info("Expanders %s failing, power cycling I2C (recovery %d)", health.failing(), health.recoveries)
+    try:
+        if not calibrating:
+            await power_cycle_expanders()
+    finally:
+        health.recovery_finished(ticks_ms())
 
 # Обробник таймера для таймауту безкоштовного режиму
-def free_mode_timeout_handler(timer):
+def free_mode_timeout_handler():
     log("Free mode timeout handler triggered")
-    Pin(pins["FREE_MODE_CONTACT"]["number"], Pin.OUT).value(0)
+    out_pins["FREE_MODE_CONTACT"].value(0)
     log("FREE_MODE_CONTACT deactivated")
 
-clients = []
-
-# Функція для надсилання подій сенсорів клієнту
-async def send_sensor_event(event):
-    name = event["name"]
-    active = event["active"]
-
-    log(f"Sending sensor event: {event}")
-
-    for client in clients:
-        try:
-            data = f"data: {ujson.dumps({'name': name, 'active': active})}\n\n"
-            await client.awrite(data)
-        except Exception as e:
-            log(f"Failed to send event: {e}")
-            if client in clients:
-                clients.remove(client)
-
-# Обробник підключень SSE (Server-Sent Events)
-async def sse_handler(reader, writer):
-    global clients
-    clients.append(writer)
-    log("New SSE connection established")
-    try:
-        await writer.awrite("HTTP/1.1 200 OK\r\n")
-        await writer.awrite("Content-Type: text/event-stream\r\n\r\n")
-        while True:
-            await asyncio.sleep(3600)
-    except asyncio.CancelledError:
-        log("SSE connection closed")
-        if writer in clients:
-            clients.remove(writer)
-        await writer.aclose()
-
-# Функція для запуску точки доступу WiFi та HTTP-сервера
+# Веб-інтерфейс (точка доступу, HTTP-сервер, SSE) завантажується лише при першому запуску точки доступу
+web = None
+
+# Модуль прошивки для веб-інтерфейсу: на MicroPython main.py виконується як вбудований __main__, якого немає в sys.modules
+def firmware_module():
+    module = sys.modules.get(__name__)
+    if module is None:
+        import __main__ as module
+    return module
+
+def load_web():
+    global web
+    if web is None:
+        started = ticks_ms()
+        import web as module
+        module.attach(firmware_module())
+        web = module
+        logger.info("Web interface loaded in %d ms", ticks_diff(ticks_ms(), started))
+    return web
+
+# Невдалий запуск не лишає wifi_active увімкненим: кнопка WIFI_BUTTON зможе спробувати ще раз
 async def start_wifi_ap_and_server():
-    global ap, server
-
-    log("Starting WiFi AP and HTTP server")
-    # Очищуємо пам'ять перед запуском точки доступу
-    gc.collect()
-    log("Memory collected before starting WiFi AP")
-
-    ap = network.WLAN(network.AP_IF)
-    ap.active(True)
-    ap.config(essid="Necta Astro", authmode=network.AUTH_OPEN)
-    ap.ifconfig(('192.168.1.1', '255.255.255.0', '192.168.1.1', '8.8.8.8'))
-    log("WiFi Access Point 'Necta Astro' started")
-
-    addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
-    server = await asyncio.start_server(http_handler, addr[0], addr[1])
-    log("HTTP server started")
-
-    timeout = min(settings.get("access_point_deactivation_time", 10), 30) * 60000
-    wifi_button_timer.init(period=timeout, mode=Timer.ONE_SHOT, callback=stop_wifi_ap_and_server)
-
-    while True:
-        await asyncio.sleep(3600)
-
-
-# Функція для зупинки точки доступу WiFi та HTTP-сервера
-def stop_wifi_ap_and_server(timer):
-    global ap, server, wifi_active
-    log("Stopping WiFi Access Point and server")
-    ap.active(False)
-    server.close()
-    wifi_active = False
-    log("WiFi Access Point and server stopped")
-
-# Функція для активації піну
-async def activate_pin(pin_name):
-    log(f"Activating pin: {pin_name}")
-    if pin_name in button_combinations:
-        row, col = button_combinations[pin_name]
-        try:
-            log(f"Activating pin combination - row: {row}, col: {col}")
-            Pin(pins[row]["number"], Pin.OUT).value(1)
-            Pin(pins[col]["number"], Pin.OUT).value(1)
-            log(f"Pin {pin_name} activated")
-        except ValueError as e:
-            log(f"Error activating pin: {e}")
-    elif pin_name in pins:
-        pin_number = pins[pin_name]["number"]
-        try:
-            log(f"Activating pin {pin_name} with pin number {pin_number}")
-            pin = Pin(pin_number, Pin.OUT)
-            pin.value(1)
-            log(f"Pin {pin_name} state after activation: {pin.value()}")
-        except ValueError as e:
-            log(f"Error activating pin: {e}")
-    else:
-        log(f"Invalid pin name: {pin_name}")
-
-# Функція для деактивації піну
-async def deactivate_pin(pin_name):
-    log(f"Deactivating pin: {pin_name}")
-    if pin_name in button_combinations:
-        row, col = button_combinations[pin_name]
-        try:
-            log(f"Deactivating pin combination - row: {row}, col: {col}")
-            Pin(pins[row]["number"], Pin.OUT).value(0)
-            Pin(pins[col]["number"], Pin.OUT).value(0)
-            log(f"Pin {pin_name} deactivated")
-        except ValueError as e:
-            log(f"Error deactivating pin: {e}")
-    elif pin_name in pins:
-        pin_number = pins[pin_name]["number"]
-        try:
-            log(f"Deactivating pin {pin_name} with pin number {pin_number}")
-            pin = Pin(pin_number, Pin.OUT)
-            pin.value(0)
-            log(f"Pin {pin_name} state after deactivation: {pin.value()}")
-        except ValueError as e:
-            log(f"Error deactivating pin: {e}")
-    else:
-        log(f"Invalid pin name: {pin_name}")
-
-# Обробник HTTP запитів
-async def http_handler(reader, writer):
-    try:
-        request_line = await reader.readline()
-        request_line = request_line.decode()
-        if request_line == '':
-            return
-        method, path, _ = request_line.split()
-        log(f"HTTP request received: {method} {path}")
-
-        while True:
-            header = await reader.readline()
-            if header == b'\r\n':
-                break
-            if header.startswith(b'Content-Length:'):
-                content_length = int(header.split(b' ')[1].strip())
-
-        if path == '/activate_pin' and method == 'POST':
-            post_data = await reader.read(content_length)
-            data = ujson.loads(post_data)
-            log(f"Data received for activation: {data}")
-            pin_name = data.get('pin')
-            await activate_pin(pin_name)
-            response = "HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\nPin activated"
-            await writer.awrite(response)
-        elif path == '/deactivate_pin' and method == 'POST':
-            post_data = await reader.read(content_length)
-            data = ujson.loads(post_data)
-            log(f"Data received for deactivation: {data}")
-            pin_name = data.get('pin')
-            await deactivate_pin(pin_name)
-            response = "HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n\r\nPin deactivated"
-            await writer.awrite(response)
-        elif path == '/':
-            await serve_file(writer, 'www/index.html', 'text/html')
-        elif path == '/script.js':
-            await serve_file(writer, 'www/script.js', 'application/javascript')
-        elif path == '/styles.css':
-            await serve_file(writer, 'www/styles.css', 'text/css')
-        elif path == '/save_settings' and method == 'POST':
-            post_data = await reader.read(content_length)
-            new_settings = ujson.loads(post_data)
-            
-            # Перетворюємо відповідні значення з рядків на числа
-            new_settings["delay_between_clicks"] = int(new_settings["delay_between_clicks"])
-            new_settings["sensor_activation_delay"] = int(new_settings["sensor_activation_delay"])
-            new_settings["free_mode_timeout"] = int(new_settings["free_mode_timeout"])
-            new_settings["access_point_deactivation_time"] = int(new_settings["access_point_deactivation_time"])
-
-            # Додаємо відсутні ключі pin і address
-            for sensor in new_settings["sensors"]:
-                new_settings["sensors"][sensor]["pin"] = sensors[sensor]["pin"]
-                new_settings["sensors"][sensor]["address"] = sensors[sensor]["address"]
-
-            settings.update(new_settings)
-            save_settings()  # Зберігаємо налаштування у файл
-            log(f"Settings updated: {new_settings}")
-            response = "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n{\"status\": \"success\"}"
-            await writer.awrite(response)
-            
-            # Запускаємо перезавантаження контролера з затримкою
-            asyncio.create_task(delayed_reset(1))  # Затримка 1 секунда перед перезавантаженням
-        elif path == '/get_sensors':
-            sensor_data = {
-                "sensors": [{"name": name, "settings": sensor["settings"]} for name, sensor in sorted(sensors.items(), key=lambda x: int(x[0].replace('Sensor', '')))],
-                "settings": {
-                    "delay_between_clicks": settings["delay_between_clicks"],
-                    "sensor_activation_delay": settings["sensor_activation_delay"],
-                    "free_mode_timeout": settings["free_mode_timeout"],
-                    "access_point_deactivation_time": settings["access_point_deactivation_time"],
-                    "clamp_C_before_combination": settings["clamp_C_before_combination"],
-                    "calibration_interval": settings["calibration_interval"]
-                }
-            }
-            response = "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n" + ujson.dumps(sensor_data)
-            await writer.awrite(response)
-        elif path == '/sse':
-            await sse_handler(reader, writer)
-        else:
-            response = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n\r\n404 Not Found"
-            await writer.awrite(response)
-    except Exception as e:
-        log(f"Exception in http_handler: {e}")
-    finally:
-        await writer.aclose()
-
-# Функція для обслуговування файлів з веб-інтерфейсу
-async def serve_file(writer, filepath, content_type):
+    global wifi_active
     try:
-        log(f"Serving file: {filepath}")
-        with open(filepath, 'r') as f:
-            content = f.read()
-        response = "HTTP/1.1 200 OK\r\nContent-Type: {}\r\n\r\n{}".format(content_type, content)
-        await writer.awrite(response)
-    except OSError:
-        log(f"File not found: {filepath}")
-        response = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n\r\n404 Not Found"
-        await writer.awrite(response)
+        await load_web().start_wifi_ap_and_server()
     except Exception as e:
-        log(f"Exception in serve_file: {e}")
-    finally:
-        await writer.aclose()
+        logger.error("Failed to start WiFi AP: %s", e)
+        wifi_active = False
+
+async def stop_wifi_ap_and_server():
+    if web is not None:
+        await web.stop_wifi_ap_and_server()
+
+# Дострокове вимкнення точки доступу, якщо жоден клієнт HTTP чи SSE не з'являвся ap_idle_timeout хвилин
+def check_ap_idle():
+    timeout = settings.get("ap_idle_timeout", 5) * 60000
+    if web is not None and wifi_active and timeout and web.client_idle_ms() >= timeout:
+        logger.info("No web clients for %d minutes, stopping WiFi AP early", timeout // 60000)
+        return stop_wifi_ap_and_server()
+
+# Подія для клієнтів SSE; до запуску веб-інтерфейсу клієнтів немає
+def publish_event(data):
+    if web is not None:
+        web.sse_hub.publish(data)
+
+# Перевірка змін перед збереженням: нова клавіатура нормалізується в new_values, а кожна дія кожного сенсора
+# (з урахуванням змін) має бути кнопкою клавіатури, щоб невідомі дії відкидались тут, а не під час продажу
+def check_settings(new_values, sensor_updates):
+    if "keypad" in new_values:
+        new_values["keypad"] = validate_keypad(new_values["keypad"], fixed_pin_numbers())
+    keys = new_values.get("keypad", settings["keypad"])["keys"]
+    if new_values.get("clamp_C_before_combination", settings["clamp_C_before_combination"]) and "C" not in keys:
+        raise ValueError("keypad has no C key")
+    updated = dict(sensor_updates)
+    for i in range(sensor_store.count):
+        for action in updated.get(i, sensor_store.actions_of(i)):
+            if action != NO_ACTION and action not in keys:
+                raise ValueError("{} uses {} missing from keypad".format(sensor_store.name(i), action))
+
+# Застосування вже перевірених змін разом: налаштування, дії сенсорів, скомпільовані плани і запис на flash;
+# повертає True, якщо змінився ключ, що потребує перезавантаження
+def commit_settings(new_values, sensor_updates):
+    restart_required = False
+    for key in RESTART_SETTINGS:
+        if key in new_values and new_values[key] != settings.get(key):
+            restart_required = True
+
+    sensors_changed = False
+    for i, actions in sensor_updates:
+        if sensor_store.set_actions(i, actions):
+            sensors_changed = True
+
+    changed = sensors_changed
+    for key, value in new_values.items():
+        if settings.get(key) != value:
+            changed = True
+    if not changed:
+        return False
+
+    keypad_changed = "keypad" in new_values and new_values["keypad"] != settings.get("keypad")
+    settings.update(new_values)
+    settings["settings_version"] = settings.get("settings_version", 0) + 1
+    # Нова матриця застосовується без перезавантаження: піни перебудовуються, плани компілюються заново
+    if keypad_changed:
+        keypad.apply(settings["keypad"])
+        logger.info("Keypad reloaded: %d keys, profile %s", len(keypad.table), settings["keypad"]["profile"])
+    apply_settings()
+    invalidate_sensors_cache()
+
+    # Серія змін об'єднується в один запис у flash; файл сенсорів малий і пишеться лише при зміні
+    settings_store.request_save(settings)
+    if sensors_changed:
+        sensor_store.save()
+    return restart_required
+
+# Таймери калібрування, безкоштовного режиму, вимкнення точки доступу і watchdog
+calibration_timer = timer_wheel.timer(calibrate_sensors, "calibration")
+free_mode_timer = timer_wheel.timer(free_mode_timeout_handler, "free_mode")
+ap_timer = timer_wheel.timer(stop_wifi_ap_and_server, "ap_shutdown")
+ap_idle_timer = timer_wheel.timer(check_ap_idle, "ap_idle")
+watchdog_timer = timer_wheel.timer(reset_wdt, "watchdog")
 
 # Основний цикл програми
 async def main_loop():
-    global wdt, wifi_button_timer, wifi_active
+    global wdt, wifi_active, last_active_sensor, main_loop_tick
     wdt = WDT(timeout=15000)
-    free_mode_timer = Timer(-1)
-    wifi_button_timer = Timer(-1)
+    watchdog_timer.start(1000, periodic=True)
     wifi_button_pressed_time = None
     wifi_active = False
-    sensor_pressed_times = {}
+    bus_generation = bus.generation
+    signalled = True
+    last_poll_time = ticks_ms()
+    booting = True
 
     log("Entering main loop")
 
     while True:
-        devices = i2c.scan()
-        current_addresses = set(devices)
-        log(f"Main loop I2C scan. Devices found: {current_addresses}")
-
-        for address in list(prev_state.keys()):
-            if address not in current_addresses:
-                log(f"Device removed: {address}")
-                del prev_state[address]
-
-        for address in devices:
-            try:
-                state = i2c.readfrom(address, 1)[0]
-                if address not in prev_state:
-                    prev_state[address] = 0xFF
-                for pin in range(8):
-                    if (state & (1 << pin)) != 0 and (prev_state[address] & (1 << pin)) == 0:
-                        sensor_name = None
-                        for sensor, details in sensors.items():
-                            if details["address"] == address and details["pin"] == pin:
-                                sensor_name = sensor
-                                break
-                        if sensor_name:
-                            log(f"Sensor pressed - Address: {address}, Pin: {pin}, Sensor: {sensor_name}")
-                            if sensor_name not in pressed_sensors:
-                                pressed_sensors[sensor_name] = True
-                                sensor_pressed_times[sensor_name] = time.ticks_ms()
-                                asyncio.create_task(handle_sensor_action(sensor_name))
-                    elif (state & (1 << pin)) == 0 and (prev_state[address] & (1 << pin)) != 0:
-                        log(f"Sensor released - Address: {address}, Pin: {pin}")
-                        for sensor, details in sensors.items():
-                            if details["address"] == address and details["pin"] == pin:
-                                if sensor in pressed_sensors:
-                                    del pressed_sensors[sensor]
-                                if sensor in sensor_pressed_times:
-                                    del sensor_pressed_times[sensor]
-                prev_state[address] = state
-            except OSError as e:
-                log(f"Error reading from address {address}: {e}")
-                if address in prev_state:
-                    del prev_state[address]
-
-        # Перевірка тривалості натискання сенсорів
-        for sensor_name, press_time in sensor_pressed_times.items():
-            if time.ticks_diff(time.ticks_ms(), press_time) >= 5000:  # 5000 мс = 5 секунд
-                log(f"Sensor {sensor_name} pressed for 5 seconds, calibrating sensors")
-                calibrate_sensors(None)
-                del sensor_pressed_times[sensor_name]  # Уникнення повторної калібрування
-
-        if Pin(pins["FREE_MODE_BUTTON"]["number"], Pin.IN, Pin.PULL_UP).value() == 0:
-            log("Free mode button pressed")
-            Pin(pins["FREE_MODE_CONTACT"]["number"], Pin.OUT).value(1)
-            log("FREE_MODE_CONTACT activated")
-            timeout = settings.get("free_mode_timeout", 1) * 60000
-            free_mode_timer.init(period=timeout, mode=Timer.ONE_SHOT, callback=free_mode_timeout_handler)
-
-        if Pin(pins["WIFI_BUTTON"]["number"], Pin.IN, Pin.PULL_UP).value() == 0:
+        # У режимі INT читаємо шину лише після сигналу або при резервному опитуванні
+        edge_events.clear()
+        # Під час калібрування розширювачі знеструмлені, шину не опитуємо
+        if calibrating:
+            pass
+        elif sensor_irq is None or signalled or ticks_diff(ticks_ms(), last_poll_time) >= settings.get("sensor_fallback_poll", 1000):
+            last_poll_time = ticks_ms()
+
+            # Список пристроїв береться з кешу шини; стани зниклих адрес забуваємо
+            if bus_generation != bus.generation:
+                bus_generation = bus.generation
+                for address in list(prev_state.keys()):
+                    if not bus.present(address):
+                        logger.info("Device removed: %d", address)
+                        del prev_state[address]
+
+            # Збираємо фронти всіх розширювачів; незмінені адреси не дають подій, адреси з помилками чекають паузу
+            for address in bus.devices:
+                if not health.due(address, last_poll_time):
+                    continue
+                try:
+                    state = await bus.read(address)
+                except OSError as e:
+                    failures = health.failed(address, ticks_ms())
+                    if failures == 1:
+                        logger.error("Error reading from address %d: %s", address, e)
+                    else:
+                        logger.debug("Error reading from address %d: %s (%d in a row)", address, e, failures)
+                    if address in prev_state:
+                        del prev_state[address]
+                    continue
+                health.ok(address, last_poll_time)
+                detect_edges(prev_state, address, state, edge_events)
+
+            # Перезапуск живлення окремою задачею; опитування інших розширювачів не чекає на нього
+            if health.recovery_due(ticks_ms()):
+                health.recovery_started(ticks_ms())
+                asyncio.create_task(recover_expanders())
+
+        now = ticks_ms()
+        for address, pin, edge in edge_events:
+            sensor_name = sensor_index.get(index_key(address, pin))
+            if edge == PRESS:
+                if sensor_name:
+                    logger.info("Sensor pressed - Address: %d, Pin: %d, Sensor: %s", address, pin, sensor_name)
+                    latency.edge(sensor_name)
+                    debouncer.press(sensor_name, now)
+            else:
+                logger.info("Sensor released - Address: %d, Pin: %d", address, pin)
+                if sensor_name and debouncer.release(sensor_name, now):
+                    logger.info("Sensor %s released before activation delay", sensor_name)
+                    latency.abandon(sensor_name)
+                    journal_event(sensor_name, BOUNCE)
+
+        # Підтверджені натискання йдуть у чергу секвенсора в порядку натискання
+        confirmed_sensors.clear()
+        long_presses.clear()
+        debouncer.update(now, confirmed_sensors, long_presses)
+        for sensor_name in confirmed_sensors:
+            latency.mark(sensor_name, CONFIRMED)
+            last_active_sensor = {"name": sensor_name, "active": True}
+            logger.debug("Sending sensor event: %s", last_active_sensor)
+            publish_event(last_active_sensor)
+            # Комбінацію виконує секвенсор за планом, скомпільованим під час завантаження налаштувань
+            if sequencer.submit(sensor_name, debouncer.pressed_at(sensor_name)):
+                logger.info("Queueing action plan for sensor: %s", sensor_name)
+
+        # Тривале утримання сенсора запускає калібрування
+        for sensor_name in long_presses:
+            logger.info("Sensor %s pressed for 5 seconds, calibrating sensors", sensor_name)
+            asyncio.create_task(calibrate_sensors())
+
+        if free_mode_button.value() == 0:
+            out_pins["FREE_MODE_CONTACT"].value(1)
+            logger.debug("Free mode button pressed, FREE_MODE_CONTACT activated")
+            # Відлік таймауту починається заново, поки кнопку утримують
+            free_mode_timer.start(settings.get("free_mode_timeout", 1) * 60000)
+
+        if wifi_button.value() == 0:
             if wifi_button_pressed_time is None:
-                wifi_button_pressed_time = time.ticks_ms()
-            elif time.ticks_diff(time.ticks_ms(), wifi_button_pressed_time) >= 10000:
+                wifi_button_pressed_time = ticks_ms()
+            elif ticks_diff(ticks_ms(), wifi_button_pressed_time) >= 10000:
                 log("WIFI_BUTTON held for 10 seconds, resetting settings")
-                try:
-                    os.remove('settings.json')
-                except OSError:
-                    pass
+                settings_store.remove()
+                sensor_store.remove()
+                journal.flush()
                 reset()
         else:
             if wifi_button_pressed_time is not None:
-                if time.ticks_diff(time.ticks_ms(), wifi_button_pressed_time) < 10000:
+                if ticks_diff(ticks_ms(), wifi_button_pressed_time) < 10000:
                     log("WIFI_BUTTON pressed")
                     if not wifi_active:
                         log("Activating WiFi Access Point")
@@ -613,18 +539,84 @@ async def main_loop():
                         wifi_active = True
                 wifi_button_pressed_time = None
 
-        wdt.feed()
-        await asyncio.sleep(0.1)
+        # Будь-яка подія повертає швидке опитування; без подій довше за power_idle_after - повільне
+        now = ticks_ms()
+        if edge_events or debouncer.active() or not sequencer.idle() or wifi_button_pressed_time is not None:
+            power.activity(now)
+        else:
+            power.update(now)
+
+        main_loop_tick = ticks_ms()
+        # Завантаження завершене після першого повного такту з опитуванням сенсорів
+        if booting:
+            booting = False
+            boot.mark("first_poll")
+            logger.info("Boot milestones: %s", boot.summary())
+        # Такт циклу скорочується до найближчого спливання затримки активації
+        wait_ms = power.poll_ms()
+        due = debouncer.due_in(ticks_ms())
+        if due is not None and due < wait_ms:
+            wait_ms = due
+        sleep_ms = 0
+        if power.can_sleep() and sequencer.idle() and not debouncer.active():
+            # Сон зупиняє цикл подій, тому він не довший за найближчий програмний таймер (watchdog - щосекунди),
+            # а watchdog годується безпосередньо перед сном. GPIO19 (INT) не може будити ESP32,
+            # тож затримка реакції така сама, як і в повільного опитування
+            sleep_ms = wait_ms
+            timer_due = timer_wheel.due_in(ticks_ms())
+            if timer_due is not None and timer_due < sleep_ms:
+                sleep_ms = timer_due
+            # Таймер уже настав: коротке очікування дає задачі таймерів спрацювати до наступного сну
+            if not sleep_ms:
+                wait_ms = 1
+        if sleep_ms:
+            wdt.feed()
+            lightsleep(sleep_ms)
+            power.slept(sleep_ms)
+            signalled = True
+            await asyncio.sleep(0)
+        elif sensor_irq is None:
+            await asyncio.sleep(wait_ms / 1000)
+        else:
+            # Сигнал INT перериває очікування одразу, без затримки до наступного такту
+            signalled = await sensor_irq.wait(wait_ms)
 
     log("Exiting main loop")
 
 # Головна функція для запуску програми
 async def main():
     log("Starting main function")
+
+    # Фонові задачі: власник шини I2C, відкладене збереження, секвенсор клавіатури, вивід журналу, збирання сміття, запис журналу продажів і програмні таймери
+    asyncio.create_task(scan_i2c())
+    asyncio.create_task(settings_store.run())
+    asyncio.create_task(sequencer.run())
+    asyncio.create_task(logger.run())
+    asyncio.create_task(memory.run())
+    asyncio.create_task(journal.run())
+    asyncio.create_task(timer_wheel.run())
+
+    # Таймер для калібрування сенсорів кожні 2 години
+    calibration_timer.start(7200000, periodic=True)
+    log("Calibration timer initialized")
+    boot.mark("tasks")
+
     await asyncio.gather(main_loop())
 
-log("Starting asyncio event loop")
-asyncio.run(main())
-log("Event loop finished")
+# Точка входу прошивки: ініціалізація і запуск циклу подій
+def run():
+    load_settings()
+    boot.mark("settings")
+    init_hardware()
+    boot.mark("hardware")
+    apply_settings()
+    memory.configure()
+    boot.mark("apply")
+    log("Starting asyncio event loop")
+    asyncio.run(main())
+    log("Event loop finished")
+
+if __name__ == "__main__":
+    run()
 
 
@@ -0,0 +1,148 @@
+# Керування пам'яттю: збирання сміття лише у вікнах простою, поріг gc і телеметрія купи
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+import gc
+
+from clock import ticks_ms, ticks_us, ticks_diff
+
+try:
+    import esp32
+except ImportError:
+    esp32 = None
+
+
+# Вільна і зайнята пам'ять купи MicroPython; під CPython цих функцій немає
+def heap_free():
+    return gc.mem_free() if hasattr(gc, "mem_free") else None
+
+def heap_alloc():
+    return gc.mem_alloc() if hasattr(gc, "mem_alloc") else None
+
+
+class MemoryManager:
+    def __init__(self, idle=None, interval_ms=10000, low_water=16384, threshold_fraction=4):
+        self.idle = idle  # Функція, яка повертає True, коли можна збирати сміття
+        self.interval_ms = interval_ms  # Планове збирання у простої не частіше ніж раз на інтервал
+        self.low_water = low_water  # Якщо вільно менше (байт), збираємо при першому вікні простою
+        self.threshold_fraction = threshold_fraction
+        self.paused = 0  # Вкладені паузи на час продажу
+        self.saved_threshold = -1  # Поріг gc до паузи, відновлюється після продажу
+        self.pending = False  # Після продажу потрібне збирання
+        self.last_collect = ticks_ms()
+        self.collections = 0
+        self.last_collect_us = 0
+        self.max_collect_us = 0
+        self.peak_alloc = 0
+        self.min_free = None
+        self.largest_free = None
+
+    # Поріг автоматичного збирання: частина купи, щоб збирання не накопичувалось до повного вичерпання
+    def configure(self):
+        free = heap_free()
+        if free is None or not hasattr(gc, "threshold"):
+            return
+        gc.collect()
+        gc.threshold((heap_free() + heap_alloc()) // self.threshold_fraction)
+
+    # Без планового збирання на час продажу: поріг алокацій знімається, але автоматичний gc лишається
+    # увімкненим, тож вичерпана купа дає збирання, а не MemoryError у будь-якій задачі. Якщо вільної
+    # пам'яті мало, збираємо перед планом. CPython не має gc.threshold, там вимикається циклічний збирач
+    def pause(self):
+        if not self.paused:
+            if hasattr(gc, "threshold"):
+                if heap_free() < self.low_water:
+                    self.collect()
+                self.saved_threshold = gc.threshold()
+                gc.threshold(-1)
+            else:
+                gc.disable()
+        self.paused += 1
+
+    def resume(self):
+        self.paused -= 1
+        if not self.paused:
+            if hasattr(gc, "threshold"):
+                gc.threshold(self.saved_threshold)
+            else:
+                gc.enable()
+            self.pending = True
+
+    def sample(self):
+        alloc = heap_alloc()
+        if alloc is None:
+            return
+        free = heap_free()
+        if alloc > self.peak_alloc:
+            self.peak_alloc = alloc
+        if self.min_free is None or free < self.min_free:
+            self.min_free = free
+
+    def collect(self):
+        self.sample()
+        start = ticks_us()
+        gc.collect()
+        elapsed = ticks_diff(ticks_us(), start)
+        self.last_collect = ticks_ms()
+        self.last_collect_us = elapsed
+        if elapsed > self.max_collect_us:
+            self.max_collect_us = elapsed
+        self.collections += 1
+        self.pending = False
+
+    # Чи настав час збирання: після продажу, за розкладом або при нестачі пам'яті
+    def collect_due(self):
+        if self.pending:
+            return True
+        if ticks_diff(ticks_ms(), self.last_collect) >= self.interval_ms:
+            return True
+        free = heap_free()
+        return free is not None and free < self.low_water
+
+    # Найбільший блок, який вдається виділити (байт); двійковий пошук, лише на запит діагностики
+    def probe_largest_free(self):
+        free = heap_free()
+        if free is None:
+            return None
+        gc.collect()
+        low, high = 0, heap_free()
+        while high - low > 64:
+            size = (low + high) // 2
+            try:
+                block = bytearray(size)
+                del block
+                low = size
+            except MemoryError:
+                high = size
+        gc.collect()
+        self.largest_free = low
+        return low
+
+    def stats(self):
+        self.sample()
+        stats = {
+            "free": heap_free(),
+            "alloc": heap_alloc(),
+            "peak_alloc": self.peak_alloc,
+            "min_free": self.min_free,
+            "largest_free": self.largest_free,
+            "collections": self.collections,
+            "last_collect_us": self.last_collect_us,
+            "max_collect_us": self.max_collect_us,
+            "last_collect_age_ms": ticks_diff(ticks_ms(), self.last_collect),
+        }
+        if esp32 is not None:
+            # Купа ESP-IDF: (усього, вільно, найбільший вільний блок, мінімум вільного) по регіонах
+            stats["idf_heap"] = esp32.idf_heap_info(esp32.HEAP_DATA)
+        return stats
+
+    # Фонова задача: збирання сміття лише тоді, коли секвенсор простоює
+    async def run(self, tick_ms=100):
+        while True:
+            await asyncio.sleep(tick_ms / 1000)
+            if self.paused or (self.idle is not None and not self.idle()):
+                continue
+            if self.collect_due():
+                self.collect()
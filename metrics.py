@@ -0,0 +1,84 @@
+# Затримка від натискання сенсора до клавіатури автомата: мітки ticks_us на кожному етапі і гістограми з фіксованими кошиками
+from array import array
+
+from clock import ticks_us, ticks_diff
+
+# Етапи обробки натискання; час кожного етапу відраховується від фронту сенсора
+CONFIRMED = 0  # Натискання підтверджене після затримки активації
+FIRST_PIN = 1  # Перший пін клавіатури встановлено
+DONE = 2  # Послідовність завершена
+
+STAGE_NAMES = ("debounce_confirmed", "first_pin", "sequence_done")
+
+# Верхні межі кошиків (мкс); останній кошик +Inf
+BUCKETS_US = (1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000, 500000, 1000000, 2000000, 5000000, 10000000)
+
+
+class LatencyMetrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        stages = len(STAGE_NAMES)
+        self.width = len(BUCKETS_US) + 1
+        # Лічильники кошиків усіх етапів в одному заздалегідь виділеному масиві
+        self.counts = array("L", [0] * (stages * self.width))
+        self.sums = [0] * stages  # Сума затримок етапу (мкс)
+        self.edges = {}  # ім'я сенсора -> ticks_us фронту
+        self.abandoned = 0
+
+    # Фронт натискання сенсора: початок відліку
+    def edge(self, name):
+        if not self.enabled:
+            return
+        self.edges[name] = ticks_us()
+
+    # Позначка етапу; після останнього етапу відлік для сенсора закривається
+    def mark(self, name, stage):
+        if not self.enabled:
+            return
+        start = self.edges.get(name)
+        if start is None:
+            return
+        self.observe(stage, ticks_diff(ticks_us(), start))
+        if stage == DONE:
+            del self.edges[name]
+
+    # Натискання не дійшло до клавіатури (відпущено або сенсор не відповідає)
+    def abandon(self, name):
+        if self.edges.pop(name, None) is not None:
+            self.abandoned += 1
+
+    def observe(self, stage, elapsed_us):
+        base = stage * self.width
+        i = 0
+        for bound in BUCKETS_US:
+            if elapsed_us <= bound:
+                break
+            i += 1
+        self.counts[base + i] += 1
+        self.sums[stage] += elapsed_us
+
+    def reset(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        for i in range(len(self.sums)):
+            self.sums[i] = 0
+        self.edges.clear()
+        self.abandoned = 0
+
+    # Рядки у текстовому форматі Prometheus; кошики накопичувальні, час у секундах
+    def render(self):
+        yield "# HELP vend_latency_seconds Time from sensor edge to each processing stage\n"
+        yield "# TYPE vend_latency_seconds histogram\n"
+        for stage, name in enumerate(STAGE_NAMES):
+            base = stage * self.width
+            total = 0
+            for i, bound in enumerate(BUCKETS_US):
+                total += self.counts[base + i]
+                yield 'vend_latency_seconds_bucket{{stage="{}",le="{}"}} {}\n'.format(name, bound / 1000000, total)
+            total += self.counts[base + len(BUCKETS_US)]
+            yield 'vend_latency_seconds_bucket{{stage="{}",le="+Inf"}} {}\n'.format(name, total)
+            yield 'vend_latency_seconds_sum{{stage="{}"}} {}\n'.format(name, self.sums[stage] / 1000000)
+            yield 'vend_latency_seconds_count{{stage="{}"}} {}\n'.format(name, total)
+        yield "# HELP vend_presses_abandoned_total Presses that never reached the keypad\n"
+        yield "# TYPE vend_presses_abandoned_total counter\n"
+        yield "vend_presses_abandoned_total {}\n".format(self.abandoned)
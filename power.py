@@ -0,0 +1,76 @@
+# Енергоспоживання: швидке опитування під час роботи, повільне після періоду простою, облік часу в кожному стані
+from clock import ticks_ms, ticks_diff
+
+# Стани
+ACTIVE = 0  # Швидке опитування сенсорів
+IDLE = 1  # Повільне опитування, дозволено lightsleep між опитуваннями
+
+STATE_NAMES = ("active", "idle")
+
+
+class PowerManager:
+    def __init__(self, fast_poll_ms=100, idle_poll_ms=500, idle_after_ms=600000, lightsleep=False):
+        self.fast_poll_ms = fast_poll_ms
+        self.idle_poll_ms = idle_poll_ms
+        self.idle_after_ms = idle_after_ms  # Без подій довше - перехід у IDLE; 0 вимикає
+        self.lightsleep = lightsleep
+        now = ticks_ms()
+        self.state = ACTIVE
+        self.state_since = now
+        self.last_activity = now
+        self.state_ms = [0] * len(STATE_NAMES)  # Накопичений час завершених періодів кожного стану
+        self.transitions = 0
+        self.sleep_ms = 0  # Загальний час у lightsleep
+        self.sleeps = 0
+        self.radio_since = None  # Коли увімкнено точку доступу; None, якщо радіо вимкнене
+        self.radio_ms = 0
+
+    def _enter(self, state, now):
+        self.state_ms[self.state] += ticks_diff(now, self.state_since)
+        self.state = state
+        self.state_since = now
+        self.transitions += 1
+
+    # Фронт сенсора, продаж або інша робота: одразу повертаємось до швидкого опитування
+    def activity(self, now):
+        self.last_activity = now
+        if self.state != ACTIVE:
+            self._enter(ACTIVE, now)
+
+    # Перехід у IDLE після idle_after_ms без активності
+    def update(self, now):
+        if self.state == ACTIVE and self.idle_after_ms and ticks_diff(now, self.last_activity) >= self.idle_after_ms:
+            self._enter(IDLE, now)
+
+    # Інтервал опитування для поточного стану (мс)
+    def poll_ms(self):
+        return self.idle_poll_ms if self.state == IDLE else self.fast_poll_ms
+
+    # lightsleep лише в IDLE і з вимкненим радіо: сон зупиняє і WiFi, і цикл подій
+    def can_sleep(self):
+        return self.lightsleep and self.state == IDLE and self.radio_since is None
+
+    def slept(self, ms):
+        self.sleep_ms += ms
+        self.sleeps += 1
+
+    def radio(self, on, now):
+        if on and self.radio_since is None:
+            self.radio_since = now
+        elif not on and self.radio_since is not None:
+            self.radio_ms += ticks_diff(now, self.radio_since)
+            self.radio_since = None
+
+    def stats(self):
+        now = ticks_ms()
+        time_ms = {}
+        for state, name in enumerate(STATE_NAMES):
+            time_ms[name] = self.state_ms[state] + (ticks_diff(now, self.state_since) if state == self.state else 0)
+        return {
+            "state": STATE_NAMES[self.state],
+            "time_ms": time_ms,
+            "transitions": self.transitions,
+            "lightsleep_ms": self.sleep_ms,
+            "lightsleeps": self.sleeps,
+            "radio_ms": self.radio_ms + (ticks_diff(now, self.radio_since) if self.radio_since is not None else 0),
+        }
@@ -0,0 +1,5 @@
+# Індекс сенсорів за парою (адреса I2C, пін) для пошуку за один крок
+
+# Функція для обчислення ключа індексу з адреси розширювача та номера піна
+def index_key(address, pin):
+    return (address << 3) | pin
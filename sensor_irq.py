@@ -0,0 +1,35 @@
+# Сигнал про зміну входів від лінії INT розширювачів PCF8574
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    from uasyncio import ThreadSafeFlag
+except ImportError:
+    ThreadSafeFlag = None
+
+
+# Обгортка над піном INT: переривання встановлює прапорець, цикл опитування чекає на нього
+class SensorInterrupt:
+    def __init__(self, pin):
+        # ThreadSafeFlag можна безпечно встановлювати з переривання; на хості замість нього Event
+        self.flag = ThreadSafeFlag() if ThreadSafeFlag is not None else asyncio.Event()
+        self.count = 0
+        # INT активний низьким рівнем, тому реагуємо на спадаючий фронт
+        pin.irq(trigger=pin.IRQ_FALLING, handler=self._irq)
+
+    # Обробник переривання: лише встановлює прапорець, без виділення пам'яті
+    def _irq(self, pin):
+        self.count += 1
+        self.flag.set()
+
+    # Очікування сигналу не довше timeout_ms; повертає True, якщо була зміна входів
+    async def wait(self, timeout_ms):
+        try:
+            await asyncio.wait_for(self.flag.wait(), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            return False
+        if ThreadSafeFlag is None:
+            self.flag.clear()
+        return True
@@ -0,0 +1,177 @@
+# Компактне сховище конфігурації сенсорів: адреси, піни і коди дій у bytearray за номером сенсора, бінарний файл з контрольною сумою
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+
+import os
+
+from sensor_index import index_key
+from settings_store import replace_file
+
+# Формат файлу: MAGIC, версія, кількість сенсорів, кількість дій на сенсор,
+# адреси, піни, коди дій, CRC32 (little-endian) усього, що після MAGIC і версії
+MAGIC = b"SNS"
+FORMAT_VERSION = 1
+
+# Кількість дій (натискань) на один сенсор
+ACTION_SLOTS = 2
+
+# Код 0 - порожня дія
+NO_ACTION = "None"
+
+NAME_PREFIX = "Sensor"
+
+
+class SensorStore:
+    def __init__(self, actions, path="sensors.bin", capacity=32):
+        self.actions = (NO_ACTION,) + tuple(actions)  # код -> дія
+        self.codes = {action: code for code, action in enumerate(self.actions)}
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.capacity = capacity
+        self.count = 0
+        self.addresses = bytearray(capacity)
+        self.pins = bytearray(capacity)
+        self.action_codes = bytearray(capacity * ACTION_SLOTS)
+        self.crc = None  # CRC останнього записаного або завантаженого вмісту
+        self.write_count = 0
+
+    # Ім'я сенсора за індексом (Sensor1 має індекс 0)
+    def name(self, i):
+        return NAME_PREFIX + str(i + 1)
+
+    # Індекс сенсора за ім'ям; None для невідомого імені
+    def number(self, name):
+        if not name.startswith(NAME_PREFIX):
+            return None
+        try:
+            i = int(name[len(NAME_PREFIX):]) - 1
+        except ValueError:
+            return None
+        if 0 <= i < self.count:
+            return i
+        return None
+
+    def names(self):
+        for i in range(self.count):
+            yield self.name(i)
+
+    # Розкладка за замовчуванням: по pins_per_address сенсорів на кожну адресу по порядку
+    def load_layout(self, addresses, pins_per_address=8):
+        self.count = min(len(addresses) * pins_per_address, self.capacity)
+        for i in range(self.count):
+            self.addresses[i] = addresses[i // pins_per_address]
+            self.pins[i] = i % pins_per_address
+        for i in range(len(self.action_codes)):
+            self.action_codes[i] = 0
+
+    # Міграція зі старого формату settings.json: словник {"SensorN": {"address", "pin", "settings"}}
+    def load_dict(self, sensors):
+        count = 0
+        for name in sensors:
+            if name.startswith(NAME_PREFIX):
+                count = max(count, int(name[len(NAME_PREFIX):]))
+        self.count = min(count, self.capacity)
+        for name, details in sensors.items():
+            i = int(name[len(NAME_PREFIX):]) - 1
+            if i >= self.count:
+                continue
+            self.addresses[i] = details["address"]
+            self.pins[i] = details["pin"]
+            for slot in range(ACTION_SLOTS):
+                actions = details.get("settings", ())
+                action = actions[slot] if slot < len(actions) else NO_ACTION
+                # Невідомі дії в старому файлі виконувались як пауза, тобто як порожня дія
+                self.action_codes[i * ACTION_SLOTS + slot] = self.codes.get(action, 0)
+
+    # Дії сенсора як список рядків, у форматі відповіді /get_sensors
+    def actions_of(self, i):
+        base = i * ACTION_SLOTS
+        return [self.actions[self.action_codes[base + slot]] for slot in range(ACTION_SLOTS)]
+
+    # Заміна дій сенсора; невідома дія дає ValueError; повертає True, якщо щось змінилось
+    def set_actions(self, i, actions):
+        if len(actions) > ACTION_SLOTS:
+            raise ValueError("too many actions")
+        codes = bytearray(ACTION_SLOTS)
+        for slot, action in enumerate(actions):
+            if action not in self.codes:
+                raise ValueError("unknown action")
+            codes[slot] = self.codes[action]
+        base = i * ACTION_SLOTS
+        if self.action_codes[base:base + ACTION_SLOTS] == codes:
+            return False
+        self.action_codes[base:base + ACTION_SLOTS] = codes
+        return True
+
+    # Індекс (адреса, пін) -> ім'я сенсора; як і раніше, перший сенсор з такою парою має пріоритет
+    def index(self):
+        index = {}
+        for i in range(self.count):
+            key = index_key(self.addresses[i], self.pins[i])
+            if key not in index:
+                index[key] = self.name(i)
+        return index
+
+    def encode(self):
+        count = self.count
+        body = bytes((count, ACTION_SLOTS)) + self.addresses[:count] + self.pins[:count] + self.action_codes[:count * ACTION_SLOTS]
+        crc = binascii.crc32(body) & 0xFFFFFFFF
+        return MAGIC + bytes((FORMAT_VERSION,)) + body + crc.to_bytes(4, "little"), crc
+
+    def decode(self, data):
+        if len(data) < 10 or data[:3] != MAGIC:
+            raise ValueError("bad magic")
+        if data[3] != FORMAT_VERSION:
+            raise ValueError("unsupported version")
+        body = data[4:-4]
+        crc = binascii.crc32(body) & 0xFFFFFFFF
+        if crc != int.from_bytes(data[-4:], "little"):
+            raise ValueError("bad checksum")
+        count, slots = body[0], body[1]
+        if slots != ACTION_SLOTS or count > self.capacity or len(body) != 2 + count * (2 + slots):
+            raise ValueError("bad layout")
+        codes = body[2 + 2 * count:]
+        for code in codes:
+            if code >= len(self.actions):
+                raise ValueError("unknown action code")
+        self.count = count
+        self.addresses[:count] = body[2:2 + count]
+        self.pins[:count] = body[2 + count:2 + 2 * count]
+        self.action_codes[:count * slots] = codes
+        return crc
+
+    # Завантаження з файлу; якщо основний файл пошкоджено, пробуємо тимчасовий
+    def load(self):
+        for path in (self.path, self.tmp_path):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self.crc = self.decode(data)
+            except (OSError, ValueError):
+                continue
+            if path == self.tmp_path:
+                replace_file(self.tmp_path, self.path)
+            return True
+        return False
+
+    # Запис через тимчасовий файл; повертає False, якщо вміст не змінився
+    def save(self):
+        data, crc = self.encode()
+        if crc == self.crc:
+            return False
+        with open(self.tmp_path, "wb") as f:
+            f.write(data)
+        replace_file(self.tmp_path, self.path)
+        self.crc = crc
+        self.write_count += 1
+        return True
+
+    def remove(self):
+        self.crc = None
+        for path in (self.path, self.tmp_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
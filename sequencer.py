@@ -0,0 +1,308 @@
+# Секвенсор клавіатури: заздалегідь скомпільовані плани натискань і одна задача виконання
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from clock import ticks_ms, ticks_diff
+from logger import logger
+from metrics import FIRST_PIN, DONE
+
+# Тривалість утримання кнопки клавіатури за замовчуванням (мс); профіль клавіатури може її змінити
+PRESS_TIME_MS = 300
+
+# Політики черги продажів
+FIFO = "fifo"  # Черга за порядком натискань до max_depth
+LATEST = "latest"  # Нове натискання замінює все, що чекає в черзі
+REJECT = "reject"  # Натискання під час продажу відкидається
+
+POLICIES = (FIFO, LATEST, REJECT)
+
+# Причини, з яких натискання не дійшло до клавіатури
+DUPLICATE = "duplicate"  # Сенсор уже чекає в черзі
+REJECTED = "rejected"  # Черга повна або політика REJECT під час продажу
+SUPERSEDED = "superseded"  # Замінене новішим натисканням (LATEST)
+EXPIRED = "expired"  # Чекало в черзі довше за expiry_ms
+
+# Функція для створення постійних об'єктів Pin для всіх вихідних пінів
+def build_output_pins(pins, pin_class):
+    out_pins = {}
+    for name, config in pins.items():
+        if config["direction"] == "output":
+            out_pins[name] = pin_class(config["number"], pin_class.OUT, value=config["default_state"])
+    return out_pins
+
+# Функція для додавання паузи до плану; пауза приєднується до попереднього кроку
+def _append_delay(plan, delay_ms):
+    if plan:
+        pin, level, delay = plan[-1]
+        plan[-1] = (pin, level, delay + delay_ms / 1000)
+    else:
+        plan.append((None, 0, delay_ms / 1000))
+
+# Функція для додавання натискання кнопки: рядок і стовпець високі, утримання, потім низькі
+# keys - таблиця кнопка -> (Pin рядка, Pin стовпця) з Keypad
+def _append_press(plan, action, keys, press_ms=PRESS_TIME_MS):
+    pair = keys.get(action)
+    if pair is not None:
+        row, col = pair
+        plan.append((row, 1, 0))
+        plan.append((col, 1, press_ms / 1000))
+        plan.append((row, 0, 0))
+        plan.append((col, 0, 0))
+    else:
+        # Порожня ("None") або невідома дія зберігає таймінг послідовності
+        _append_delay(plan, press_ms)
+
+# Функція для компіляції дій сенсора у плаский план кроків (пін, рівень, пауза в секундах)
+def compile_plan(actions, clamp_c, delay_between_clicks, keys, press_ms=PRESS_TIME_MS):
+    plan = []
+    if clamp_c:
+        # Затискаємо "C" перед комбінацією
+        _append_press(plan, "C", keys, press_ms)
+        _append_delay(plan, delay_between_clicks)
+    for i, action in enumerate(actions):
+        if i:
+            _append_delay(plan, delay_between_clicks)
+        _append_press(plan, action, keys, press_ms)
+    return plan
+
+# Функція для компіляції планів усіх сенсорів з поточних налаштувань, сховища сенсорів і клавіатури
+def compile_plans(settings, sensor_store, keypad):
+    plans = {}
+    clamp_c = settings["clamp_C_before_combination"]
+    delay_between_clicks = settings["delay_between_clicks"]
+    for i in range(sensor_store.count):
+        plans[sensor_store.name(i)] = compile_plan(sensor_store.actions_of(i), clamp_c, delay_between_clicks, keypad.table, keypad.press_ms)
+    return plans
+
+# Функція для компіляції довільної послідовності кнопок: окремий план на кожну кнопку, щоб звітувати про прогрес
+def compile_keys(keys, hold_ms, gap_ms, table):
+    steps = []
+    for i, key in enumerate(keys):
+        plan = []
+        _append_press(plan, key, table, hold_ms)
+        if i < len(keys) - 1:
+            _append_delay(plan, gap_ms)
+        steps.append(plan)
+    return steps
+
+
+# Послідовність кнопок з веб-інтерфейсу, яку секвенсор виконує між планами продажів
+class KeySequence:
+    def __init__(self, seq_id, keys, steps, max_ms):
+        self.id = seq_id
+        self.keys = keys
+        self.steps = steps
+        self.max_ms = max_ms  # Обмеження загального часу виконання
+        self.state = "queued"  # queued, running, done, cancelled, timeout
+        self.done = 0  # Скільки кнопок уже натиснуто
+        self.cancel_requested = False
+        self.on_progress = None  # Функція (послідовність) після кожної кнопки і зміни стану
+
+    # Скасування: поточна кнопка дотискається, наступні не виконуються
+    def cancel(self):
+        self.cancel_requested = True
+
+    def finished(self):
+        return self.state not in ("queued", "running")
+
+    def status(self):
+        return {"id": self.id, "state": self.state, "done": self.done, "total": len(self.keys)}
+
+    def _report(self):
+        if self.on_progress is not None:
+            self.on_progress(self)
+
+
+class Sequencer:
+    def __init__(self, latency=None, memory=None, policy=FIFO, max_depth=4, expiry_ms=10000):
+        self.plans = {}
+        self.policy = policy
+        self.max_depth = max_depth
+        self.expiry_ms = expiry_ms  # Натискання, що чекало довше, не виконується
+        self.latency = latency  # LatencyMetrics або None
+        self.memory = memory  # MemoryManager або None: збирання сміття заборонене на час плану
+        self.on_finish = None  # Функція (ім'я, виконано повністю, мс від натискання до першого піна)
+        self.pressed_at = {}  # ім'я -> ticks_ms натискання сенсора
+        self.on_drop = None  # Функція (ім'я, причина) для натискань, що не дійшли до клавіатури
+        self.release_all = None  # Функція, що опускає всі лінії клавіатури (Keypad.release_all)
+        self.queued_at = {}  # ім'я -> ticks_ms постановки в чергу
+        self.dropped = {DUPLICATE: 0, REJECTED: 0, SUPERSEDED: 0, EXPIRED: 0}
+        self.max_queue_depth = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0
+        self.wait_max_ms = 0
+        self.last_wait_ms = 0
+        self.sequence = None  # KeySequence, що очікує або виконується
+        self.queue = []
+        self.event = asyncio.Event()
+        self.busy = False
+        self.completed = 0
+
+    # Постановка плану сенсора в чергу за поточною політикою; повертає False, якщо натискання відкинуто
+    def submit(self, name, pressed_at=None):
+        if name in self.queue:
+            self._drop(name, DUPLICATE)
+            return False
+        if self.policy == REJECT and (self.busy or self.queue):
+            self._drop(name, REJECTED)
+            return False
+        if self.policy == LATEST:
+            while self.queue:
+                old = self.queue.pop(0)
+                self._forget(old)
+                self._drop(old, SUPERSEDED)
+        elif len(self.queue) >= self.max_depth:
+            self._drop(name, REJECTED)
+            return False
+        self.queue.append(name)
+        self.queued_at[name] = ticks_ms()
+        if pressed_at is not None:
+            self.pressed_at[name] = pressed_at
+        if len(self.queue) > self.max_queue_depth:
+            self.max_queue_depth = len(self.queue)
+        self.event.set()
+        return True
+
+    def _forget(self, name):
+        self.queued_at.pop(name, None)
+        self.pressed_at.pop(name, None)
+
+    def _drop(self, name, reason):
+        self.dropped[reason] += 1
+        if self.latency is not None and reason != DUPLICATE:
+            self.latency.abandon(name)
+        if self.on_drop is not None:
+            self._notify(self.on_drop, name, reason)
+
+    # Виклик зовнішнього обробника (журнал, метрики); його помилка не зупиняє задачу секвенсора
+    def _notify(self, hook, *args):
+        try:
+            hook(*args)
+        except Exception as e:
+            logger.error("Sequencer hook failed: %s", e)
+
+    # Постановка послідовності кнопок; одночасно може бути лише одна
+    def submit_sequence(self, sequence):
+        if self.sequence is not None and not self.sequence.finished():
+            return False
+        self.sequence = sequence
+        self.event.set()
+        return True
+
+    # Виконання послідовності кнопка за кнопкою з перевіркою скасування і ліміту часу
+    async def run_sequence(self, sequence):
+        sequence.state = "running"
+        sequence._report()
+        started = ticks_ms()
+        if self.memory is not None:
+            self.memory.pause()
+        try:
+            for plan in sequence.steps:
+                if sequence.cancel_requested:
+                    sequence.state = "cancelled"
+                    break
+                if ticks_diff(ticks_ms(), started) >= sequence.max_ms:
+                    sequence.state = "timeout"
+                    break
+                await self.execute(plan)
+                sequence.done += 1
+                sequence._report()
+            else:
+                sequence.state = "done"
+        finally:
+            if self.memory is not None:
+                self.memory.resume()
+            if not sequence.finished():
+                sequence.state = "cancelled"
+            # Скасована або перервана за лімітом часу послідовність не лишає натиснутих кнопок
+            if sequence.state != "done" and self.release_all is not None:
+                self.release_all()
+            sequence._report()
+
+    # Стан черги для діагностики
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "max_depth_seen": self.max_queue_depth,
+            "busy": self.busy,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "wait_last_ms": self.last_wait_ms,
+            "wait_max_ms": self.wait_max_ms,
+            "wait_avg_ms": self.wait_total_ms // self.wait_count if self.wait_count else 0,
+        }
+
+    # Виконання одного плану; при скасуванні всі лінії клавіатури (або піни плану) повертаються в низький рівень
+    async def execute(self, plan):
+        self.busy = True
+        finished = False
+        try:
+            for pin, level, delay in plan:
+                if pin is not None:
+                    pin.value(level)
+                if delay:
+                    await asyncio.sleep(delay)
+            finished = True
+        finally:
+            if not finished:
+                if self.release_all is not None:
+                    self.release_all()
+                else:
+                    for pin, level, delay in plan:
+                        if pin is not None:
+                            pin.value(0)
+            self.busy = False
+
+    # Чи простоює секвенсор: нічого не виконується і черга порожня
+    def idle(self):
+        return not self.busy and not self.queue and (self.sequence is None or self.sequence.finished())
+
+    # Задача секвенсора: виконує плани з черги по одному
+    async def run(self):
+        while True:
+            while not self.queue and (self.sequence is None or self.sequence.state != "queued"):
+                self.event.clear()
+                await self.event.wait()
+            if self.sequence is not None and self.sequence.state == "queued":
+                await self.run_sequence(self.sequence)
+                continue
+            name = self.queue.pop(0)
+            waited = ticks_diff(ticks_ms(), self.queued_at.pop(name))
+            if waited > self.expiry_ms:
+                self.pressed_at.pop(name, None)
+                self._drop(name, EXPIRED)
+                continue
+            self.last_wait_ms = waited
+            self.wait_count += 1
+            self.wait_total_ms += waited
+            if waited > self.wait_max_ms:
+                self.wait_max_ms = waited
+            plan = self.plans.get(name)
+            if plan:
+                # Перший крок плану виконується синхронно одразу після позначки
+                if self.memory is not None:
+                    self.memory.pause()
+                if self.latency is not None:
+                    self.latency.mark(name, FIRST_PIN)
+                pressed_at = self.pressed_at.pop(name, None)
+                wait_ms = 0 if pressed_at is None else ticks_diff(ticks_ms(), pressed_at)
+                finished = False
+                try:
+                    await self.execute(plan)
+                    finished = True
+                finally:
+                    if self.memory is not None:
+                        self.memory.resume()
+                    if self.on_finish is not None:
+                        self._notify(self.on_finish, name, finished, wait_ms)
+                self.completed += 1
+                if self.latency is not None:
+                    self.latency.mark(name, DONE)
+            else:
+                self.pressed_at.pop(name, None)
+                if self.latency is not None:
+                    self.latency.abandon(name)
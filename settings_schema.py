@@ -0,0 +1,54 @@
+# Схема загальних налаштувань: тип і допустимі значення кожного ключа для часткових оновлень
+from sequencer import POLICIES
+
+# ключ -> (тип, мінімум, максимум) для чисел, (bool,) для прапорців, (str, допустимі значення) для переліків,
+# (dict,) для вкладених структур, які перевіряє власний модуль (клавіатура - keypad.validate)
+SCHEMA = {
+    "delay_between_clicks": (int, 0, 5000),
+    "sensor_activation_delay": (int, 0, 5000),
+    "clamp_C_before_combination": (bool,),
+    "calibration_interval": (bool,),
+    "free_mode_timeout": (int, 1, 1440),
+    "access_point_deactivation_time": (int, 1, 30),
+    "sensor_interrupt_mode": (bool,),
+    "sensor_fallback_poll": (int, 100, 60000),
+    "i2c_rescan_interval": (int, 1, 3600),
+    "log_level": (int, 10, 40),
+    "latency_metrics": (bool,),
+    "vend_queue_policy": (str, POLICIES),
+    "vend_queue_depth": (int, 1, 16),
+    "vend_queue_expiry": (int, 0, 600000),
+    "keypad": (dict,),
+    "power_idle_after": (int, 0, 1440),
+    "power_idle_poll": (int, 100, 2000),
+    "power_lightsleep": (bool,),
+    "ap_idle_timeout": (int, 0, 30),
+}
+
+
+# Функція для перевірки і приведення значення; веб-інтерфейс надсилає числа рядками
+def coerce(key, value):
+    rule = SCHEMA.get(key)
+    if rule is None:
+        raise ValueError("unknown setting " + key)
+    kind = rule[0]
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        if value in ("true", "false"):
+            return value == "true"
+        raise ValueError(key)
+    if kind is dict:
+        if not isinstance(value, dict):
+            raise ValueError(key)
+        return value
+    if kind is int:
+        if isinstance(value, bool):
+            raise ValueError(key)
+        value = int(value)
+        if not rule[1] <= value <= rule[2]:
+            raise ValueError(key)
+        return value
+    if value not in rule[1]:
+        raise ValueError(key)
+    return value
@@ -0,0 +1,125 @@
+# Збереження налаштувань: атомарний запис через тимчасовий файл і відкладене об'єднане збереження
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+try:
+    import uhashlib as hashlib
+except ImportError:
+    import hashlib
+
+import os
+
+from clock import ticks_ms, ticks_diff
+from logger import logger
+
+
+# Функція для заміни файлу тимчасовою копією
+def replace_file(tmp_path, path):
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # FAT не дозволяє перейменування поверх наявного файлу
+        os.remove(path)
+        os.rename(tmp_path, path)
+
+# Функція для обчислення хешу серіалізованих налаштувань
+def content_digest(content):
+    return hashlib.sha256(content.encode()).digest()
+
+
+class SettingsStore:
+    def __init__(self, path, debounce_ms=2000):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.debounce_ms = debounce_ms  # Вікно об'єднання змін перед записом у flash (мс)
+        self.digest = None  # Хеш останнього записаного або завантаженого вмісту
+        self.pending = None  # Налаштування, що очікують запису
+        self.pending_since = None
+        self.write_count = 0
+        self.skip_count = 0
+        self.write_errors = 0
+
+    # Завантаження налаштувань; якщо основний файл пошкоджено, пробуємо тимчасовий
+    def load(self):
+        for path in (self.path, self.tmp_path):
+            try:
+                with open(path, "r") as f:
+                    content = f.read()
+                data = json.loads(content)
+            except (OSError, ValueError):
+                continue
+            self.digest = content_digest(content)
+            if path == self.tmp_path:
+                # Запис обірвався після створення тимчасового файлу: завершуємо перейменування
+                self._replace()
+            return data
+        return None
+
+    # Негайний запис; повертає False, якщо вміст не змінився і запис пропущено.
+    # Відкладені зміни знімаються лише після успішного запису, помилка flash виходить як OSError
+    def save_now(self, data):
+        content = json.dumps(data)
+        digest = content_digest(content)
+        if digest == self.digest:
+            self.pending = None
+            self.pending_since = None
+            self.skip_count += 1
+            return False
+        with open(self.tmp_path, "w") as f:
+            f.write(content)
+        self._replace()
+        self.pending = None
+        self.pending_since = None
+        self.digest = digest
+        self.write_count += 1
+        return True
+
+    # Заміна основного файлу тимчасовим
+    def _replace(self):
+        replace_file(self.tmp_path, self.path)
+
+    # Відкладений запис: серія змін за вікно debounce_ms дає один запис у flash
+    def request_save(self, data):
+        self.pending = data
+        self.pending_since = ticks_ms()
+
+    # Чи є незаписані зміни, для яких вже минуло вікно об'єднання
+    def flush_due(self):
+        return self.pending is not None and ticks_diff(ticks_ms(), self.pending_since) >= self.debounce_ms
+
+    # Запис незбережених змін, якщо вони є. Помилка flash не зупиняє фонову задачу:
+    # зміни лишаються в pending і записуються знову після наступного вікна об'єднання
+    def flush(self):
+        if self.pending is None:
+            return False
+        try:
+            return self.save_now(self.pending)
+        except OSError as e:
+            self.write_errors += 1
+            self.pending_since = ticks_ms()
+            logger.error("Settings write failed, will retry: %s", e)
+            return False
+
+    # Видалення збережених налаштувань (скидання до заводських)
+    def remove(self):
+        self.pending = None
+        self.digest = None
+        for path in (self.path, self.tmp_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # Фонова задача відкладеного запису
+    async def run(self, interval_ms=100):
+        while True:
+            if self.flush_due():
+                self.flush()
+            await asyncio.sleep(interval_ms / 1000)
@@ -0,0 +1 @@
+# Симулятор обладнання ESP32 для запуску прошивки під CPython
@@ -0,0 +1,273 @@
+# Прогін прошивки на симуляторі з віртуальним часом: доба продажів швидше за реальний час
+# Запуск: python -m sim --hours 24 --vends-per-hour 20
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import main
+import clock
+from logger import logger
+from sim.board import board, VirtualClockLoop
+from boot_timeline import BootTimeline
+from power import PowerManager
+from keypad import pin_pairs
+from sim import clients
+
+# Сторінки, які по колу опитують клієнти веб-інтерфейсу під час прогону
+HTTP_PATHS = ("/get_sensors", "/diag", "/metrics", "/journal/summary", "/i2c_stats")
+
+
+# Функція для побудови випадкового розкладу натискань (пуассонівський потік)
+# У режимі burst кожна подія - кілька різних сенсорів, натиснутих майже одночасно
+def random_timeline(hours, vends_per_hour, seed, burst=1):
+    rng = random.Random(seed)
+    names = list(main.sensor_store.names())
+    timeline = []
+    t = 5.0
+    end = hours * 3600
+    while True:
+        t += rng.expovariate(vends_per_hour / 3600)
+        if t >= end:
+            break
+        offset = 0.0
+        for name in rng.sample(names, burst):
+            timeline.append((t + offset, "press", name, rng.randint(600, 1500)))
+            offset += rng.uniform(0.05, 0.5)
+    timeline.sort()
+    return timeline
+
+
+# Функція для налаштувань симуляції: кожен сенсор набирає дві цифри
+def simulation_settings(seed, interrupt_mode, log_level, policy="fifo", overrides=None):
+    rng = random.Random(seed)
+    settings = dict(main.settings)
+    # Сенсори записуються у старому форматі settings.json, тож прогін також перевіряє міграцію
+    store = main.sensor_store
+    settings["sensors"] = {}
+    for i in range(store.count):
+        settings["sensors"][store.name(i)] = {"address": store.addresses[i], "pin": store.pins[i],
+                                              "settings": [str(rng.randint(1, 9)), str(rng.randint(1, 9))]}
+    settings["clamp_C_before_combination"] = True
+    settings["sensor_interrupt_mode"] = interrupt_mode
+    settings["log_level"] = log_level
+    settings["vend_queue_policy"] = policy
+    if overrides:
+        settings.update(overrides)
+    return settings
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+# Функція для прогону розкладу; повертає словник результатів
+# http_clients і sse_clients додають одночасних клієнтів веб-інтерфейсу, trace_memory вимірює пікову пам'ять хоста
+def simulate(timeline, settings, duration_s=0.0, tail=30.0, http_clients=0, sse_clients=0, http_interval=2.0, trace_memory=False):
+    workdir = tempfile.mkdtemp(prefix="sim-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with open("settings.json", "w") as f:
+            json.dump(settings, f)
+
+        loop = VirtualClockLoop()
+        asyncio.set_event_loop(loop)
+        board.reset_world()
+        board.clock = loop.time
+        clock.set_time_source(loop.time)
+        # Етапи завантаження і час у станах живлення рахуються від нуля віртуального часу
+        main.boot = BootTimeline()
+        main.power = PowerManager()
+        board.configure(main.pins, pin_pairs(settings["keypad"]), settings["sensors"])
+
+        # Рівень журналу діє вже під час завантаження налаштувань; вікно обмеження частоти - у віртуальному часі
+        logger.level = settings["log_level"]
+        logger.window_start = clock.ticks_ms()
+        main.load_settings()
+        main.init_hardware()
+        main.apply_settings()
+
+        presses = []
+        load = clients.ClientStats()
+        load_tasks = []
+        # Веб-інтерфейс завантажується без точки доступу; клієнти звертаються до обробника напряму
+        if http_clients or sse_clients:
+            web = main.load_web()
+            for i in range(http_clients):
+                load_tasks.append(loop.create_task(clients.http_client(web.http_handler, HTTP_PATHS, http_interval, load, i * http_interval / http_clients)))
+            for i in range(sse_clients):
+                load_tasks.append(loop.create_task(clients.sse_client(web.http_handler, load)))
+
+        # Події розкладу ставляться на плату заздалегідь: після lightsleep плата застосовує пропущені події
+        # раніше, ніж прошивка прочитає входи, як і справжні сенсори, що змінюються під час сну
+        def schedule(t, callback, *args):
+            board.at(t, callback, *args)
+            loop.call_at(t, board.settle, t)
+
+        last = 0.0
+        for t, kind, target, duration in timeline:
+            if kind == "press":
+                schedule(t, board.set_sensor, target, True)
+                schedule(t + duration / 1000, board.set_sensor, target, False)
+                presses.append(t)
+            elif kind == "button":
+                number = main.pins[target]["number"]
+                schedule(t, board.set_button, number, True)
+                schedule(t + duration / 1000, board.set_button, number, False)
+            elif kind == "fault":
+                schedule(t, board.inject_fault, int(target))
+            last = max(last, t)
+
+        async def drive():
+            await asyncio.sleep(max(last + tail, duration_s))
+
+        if trace_memory:
+            tracemalloc.start()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        main_task = loop.create_task(main.main())
+        loop.run_until_complete(drive())
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        virtual = loop.time()
+        peak_memory = 0
+        if trace_memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        main_task.cancel()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        loop.close()
+
+        # Журнал продажів лежить у робочому каталозі симуляції
+        by_sensor, by_hour, outcomes = main.journal.summary()
+        journal_latencies = [record[5] for record in main.journal.records() if record[4] == 0]
+    finally:
+        os.chdir(cwd)
+
+    # Затримка від натискання до першої кнопки: якщо всі натискання виконані, зіставляємо їх з клавіатурою по порядку,
+    # інакше беремо власні виміри прошивки з журналу продажів. Кожен продаж - дві цифри, з "C" перед ними, якщо її затискають
+    keys_per_vend = 3 if settings["clamp_C_before_combination"] else 2
+    vend_starts = [t for i, (t, key) in enumerate(board.key_events) if i % keys_per_vend == 0]
+    if len(vend_starts) == len(presses):
+        latencies = [(start - press) * 1000 for press, start in zip(presses, vend_starts)]
+    else:
+        latencies = journal_latencies
+    return {
+        "presses": len(presses),
+        "vends": len(vend_starts),
+        "dropped": len(presses) - len(vend_starts),
+        "latency_p50_ms": percentile(latencies, 0.5),
+        "latency_p99_ms": percentile(latencies, 0.99),
+        "latency_max_ms": max(latencies) if latencies else 0.0,
+        "vends_per_min": len(vend_starts) * 60 / max(virtual, 1e-9),
+        "peak_memory_kb": peak_memory / 1024,
+        "http_requests": load.requests,
+        "http_errors": load.errors,
+        "http_service_p99_ms": percentile(load.service_us, 0.99) / 1000,
+        "sse_events": load.sse_events,
+        "virtual_s": virtual,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "i2c_scans": board.scan_count,
+        "i2c_reads": board.read_count,
+        "i2c_bus_time_s": board.bus_time_us / 1e6,
+        "wdt_violations": board.wdt_violations,
+        "power_cycles": board.power_cycles,
+        "expanders": main.health.stats(),
+        "power": main.power.stats(),
+        "outcomes": outcomes,
+        "queue": main.sequencer.stats(),
+    }
+
+
+def print_report(result):
+    hours = result["virtual_s"] / 3600
+    print("Simulated {:.2f} h in {:.1f} s wall ({:.0f}x real time)".format(hours, result["wall_s"], result["virtual_s"] / max(result["wall_s"], 1e-9)))
+    print("  presses: {presses}, vends: {vends}, dropped: {dropped}, {vends_per_min:.2f} vends/min".format(**result))
+    print("  press-to-keypad latency: p50 {:.0f} ms, p99 {:.0f} ms, max {:.0f} ms".format(
+        result["latency_p50_ms"], result["latency_p99_ms"], result["latency_max_ms"]))
+    print("  host CPU: {:.1f} s total, {:.2f} s per simulated hour".format(result["cpu_s"], result["cpu_s"] / max(hours, 1e-9)))
+    print("  I2C: {} scans, {} reads, modelled bus time {:.1f} s ({:.2f}% of uptime)".format(
+        result["i2c_scans"], result["i2c_reads"], result["i2c_bus_time_s"], 100 * result["i2c_bus_time_s"] / max(result["virtual_s"], 1e-9)))
+    print("  watchdog violations: {}".format(result["wdt_violations"]))
+    expanders = result["expanders"]
+    print("  expanders: {} power cycles, {} recoveries, read errors {}".format(result["power_cycles"], expanders["recoveries"],
+        ", ".join("{} {}".format(address, state["errors"]) for address, state in sorted(expanders["expanders"].items()) if state["errors"]) or "none"))
+    power = result["power"]
+    print("  power: active {:.1f} h, idle {:.1f} h, {} transitions, lightsleep {:.1f} h in {} sleeps, radio on {:.1f} h".format(
+        power["time_ms"]["active"] / 3.6e6, power["time_ms"]["idle"] / 3.6e6, power["transitions"],
+        power["lightsleep_ms"] / 3.6e6, power["lightsleeps"], power["radio_ms"] / 3.6e6))
+    print("  journal outcomes: " + ", ".join("{} {}".format(name, count) for name, count in result["outcomes"].items() if count))
+    queue = result["queue"]
+    print("  vend queue ({}): max depth {}, wait avg {} ms, max {} ms".format(queue["policy"], queue["max_depth_seen"], queue["wait_avg_ms"], queue["wait_max_ms"]))
+    if result["http_requests"] or result["sse_events"]:
+        print("  web clients: {http_requests} requests, {http_errors} errors, service p99 {http_service_p99_ms:.2f} ms, {sse_events} SSE events".format(**result))
+    if result["peak_memory_kb"]:
+        print("  peak host memory: {:.0f} KiB".format(result["peak_memory_kb"]))
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sim", description="Replay vending traffic on the simulated controller")
+    parser.add_argument("--hours", type=float, default=24.0, help="simulated duration in hours")
+    parser.add_argument("--vends-per-hour", type=float, default=20.0, help="mean press rate for the random timeline")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--burst", type=int, default=1, help="sensors pressed together at each arrival")
+    parser.add_argument("--policy", default="fifo", choices=("fifo", "latest", "reject"), help="vend queue policy")
+    parser.add_argument("--timeline", help="JSON file with [time_s, \"press\"|\"button\"|\"fault\", name, hold_ms] entries")
+    parser.add_argument("--interrupt", action="store_true", help="use the PCF8574 INT line instead of polling")
+    parser.add_argument("--delay-between-clicks", type=int, help="override delay_between_clicks (ms)")
+    parser.add_argument("--activation-delay", type=int, help="override sensor_activation_delay (ms)")
+    parser.add_argument("--no-clamp", action="store_true", help="do not press \"C\" before each combination")
+    parser.add_argument("--idle-after", type=int, help="override power_idle_after (minutes without activity, 0 disables)")
+    parser.add_argument("--lightsleep", action="store_true", help="allow lightsleep between polls in the idle state")
+    parser.add_argument("--http-clients", type=int, default=0, help="concurrent web clients polling the HTTP API")
+    parser.add_argument("--sse-clients", type=int, default=0, help="SSE subscribers connected for the whole run")
+    parser.add_argument("--trace-memory", action="store_true", help="measure peak host memory with tracemalloc (slower)")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON instead of a report")
+    parser.add_argument("--verbose", action="store_true", help="print firmware log output")
+    parser.add_argument("--metrics", action="store_true", help="print the firmware /metrics output after the run")
+    args = parser.parse_args(argv)
+
+    if args.timeline:
+        with open(args.timeline) as f:
+            timeline = [tuple(entry) for entry in json.load(f)]
+    else:
+        timeline = random_timeline(args.hours, args.vends_per_hour, args.seed, args.burst)
+    overrides = {}
+    if args.delay_between_clicks is not None:
+        overrides["delay_between_clicks"] = args.delay_between_clicks
+    if args.activation_delay is not None:
+        overrides["sensor_activation_delay"] = args.activation_delay
+    if args.no_clamp:
+        overrides["clamp_C_before_combination"] = False
+    if args.idle_after is not None:
+        overrides["power_idle_after"] = args.idle_after
+    if args.lightsleep:
+        overrides["power_lightsleep"] = True
+    settings = simulation_settings(args.seed, args.interrupt, 10 if args.verbose else 30, args.policy, overrides)
+    duration_s = args.hours * 3600 if not args.timeline else 0.0
+    result = simulate(timeline, settings, duration_s, http_clients=args.http_clients, sse_clients=args.sse_clients,
+                      trace_memory=args.trace_memory)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print_report(result)
+    if args.metrics:
+        print("".join(main.latency.render()), end="")
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
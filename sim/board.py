@@ -0,0 +1,195 @@
+# Модель плати для симулятора: рівні пінів, розширювачі PCF8574, кнопки і клавіатура автомата
+import asyncio
+import heapq
+import time
+
+# Орієнтовна тривалість операцій на шині I2C 100 кГц (мкс): сканування 112 адрес і читання одного байта
+SCAN_COST_US = 112 * 100
+READ_COST_US = 300
+
+
+# Розширювач PCF8574: байт входів, лінія INT опускається при зміні входів
+class PCF8574:
+    def __init__(self, address):
+        self.address = address
+        self.state = 0x00
+
+
+# Віртуальний годинник циклу подій: коли всі задачі чекають, час одразу переходить до наступного таймера
+class VirtualClockLoop(asyncio.SelectorEventLoop):
+    def __init__(self):
+        super().__init__()
+        self._now = 0.0
+        select = self._selector.select
+
+        def virtual_select(timeout=None):
+            events = select(0)
+            if not events and timeout:
+                self._now += timeout
+            return events
+
+        self._selector.select = virtual_select
+
+    def time(self):
+        return self._now
+
+    # Час, проведений у lightsleep: задачі і таймери циклу стоять
+    def advance(self, seconds):
+        self._now += seconds
+
+
+class Board:
+    def __init__(self):
+        self.reset_world()
+
+    # Скидання стану плати перед новою симуляцією
+    def reset_world(self):
+        self.clock = time.monotonic
+        self.levels = {}  # номер піна -> рівень
+        self.pull_ups = set()
+        self.irq_handlers = {}  # номер піна -> (тригер, обробник, об'єкт Pin)
+        self.expanders = {}
+        self.sensor_map = {}  # ім'я сенсора -> (адреса, пін)
+        self.keypad_pins = set()  # номери пінів рядків і стовпців клавіатури
+        self.keys = {}  # (пін рядка, пін стовпця) -> кнопка
+        self.active_key = None
+        self.key_events = []  # (час, кнопка) натискань клавіатури автомата
+        self.int_pin = None
+        self.power_pin = None
+        self.bus_time_us = 0
+        self.scan_count = 0
+        self.read_count = 0
+        self.wdt_timeout = None
+        self.wdt_last_feed = None
+        self.wdt_violations = 0
+        self.resets = 0
+        self.stuck = set()  # Адреси розширювачів, що відповідають на сканування, але не на читання
+        self.power_cycles = 0
+        self.world = []  # (час, номер, функція, аргументи) подій фізичного світу за розкладом
+        self.world_seq = 0
+
+    # Опис підключень з конфігурації прошивки
+    # keys - кнопка -> (GPIO рядка, GPIO стовпця), див. keypad.pin_pairs()
+    def configure(self, pins, keys, sensors):
+        self.keypad_pins = set()
+        self.keys = {}
+        for name, (row_number, col_number) in keys.items():
+            self.keypad_pins.add(row_number)
+            self.keypad_pins.add(col_number)
+            self.keys[(row_number, col_number)] = name
+        if "I2C_INT" in pins:
+            self.int_pin = pins["I2C_INT"]["number"]
+        self.power_pin = pins["I2C_POWER"]["number"]
+        for name, details in sensors.items():
+            self.sensor_map[name] = (details["address"], details["pin"])
+            if details["address"] not in self.expanders:
+                self.expanders[details["address"]] = PCF8574(details["address"])
+
+    def now(self):
+        return self.clock()
+
+    # Подія фізичного світу (натискання, кнопка, збій) на заданий момент віртуального часу
+    def at(self, t, callback, *args):
+        heapq.heappush(self.world, (t, self.world_seq, callback, args))
+        self.world_seq += 1
+
+    # Застосування подій, час яких настав (або до моменту until); викликається таймером циклу подій
+    # з точним часом події, щоб похибка суми float не відкладала її, і після lightsleep, поки цикл стояв
+    def settle(self, until=None):
+        now = self.now() if until is None else max(until, self.now())
+        while self.world and self.world[0][0] <= now:
+            t, seq, callback, args = heapq.heappop(self.world)
+            callback(*args)
+
+    # Розширювачі живляться, поки I2C_POWER низький
+    def powered(self):
+        return not self.levels.get(self.power_pin, 0)
+
+    def read_pin(self, number):
+        if number in self.levels:
+            return self.levels[number]
+        return 1 if number in self.pull_ups else 0
+
+    def write_pin(self, number, level):
+        old = self.read_pin(number)
+        self.levels[number] = level
+        # Зняття живлення скидає завислі розширювачі
+        if number == self.power_pin and level and not old:
+            self.power_cycles += 1
+            self.stuck.clear()
+        if number in self.keypad_pins:
+            self._update_keypad()
+        if old and not level:
+            self._irq(number)
+
+    # Визначення натиснутої кнопки клавіатури за рядком і стовпцем у високому рівні
+    def _update_keypad(self):
+        key = None
+        for (row, col), name in self.keys.items():
+            if self.levels.get(row, 0) and self.levels.get(col, 0):
+                key = name
+                break
+        if key != self.active_key:
+            self.active_key = key
+            if key is not None:
+                self.key_events.append((self.now(), key))
+
+    def _irq(self, number):
+        entry = self.irq_handlers.get(number)
+        if entry is not None:
+            trigger, handler, pin = entry
+            if handler is not None:
+                handler(pin)
+
+    # Імпульс INT: PCF8574 опускає лінію при зміні входів, читання її відпускає
+    def _signal_change(self):
+        if self.int_pin is not None:
+            self.levels[self.int_pin] = 1
+            self.write_pin(self.int_pin, 0)
+            self.levels[self.int_pin] = 1
+
+    # Натискання і відпускання сенсора
+    def set_sensor(self, name, pressed):
+        address, pin = self.sensor_map[name]
+        expander = self.expanders[address]
+        old = expander.state
+        if pressed:
+            expander.state |= 1 << pin
+        else:
+            expander.state &= ~(1 << pin)
+        if expander.state != old:
+            self._signal_change()
+
+    # Кнопки з підтяжкою: натиснута кнопка дає низький рівень
+    def set_button(self, number, pressed):
+        self.levels[number] = 0 if pressed else 1
+
+    def i2c_scan(self):
+        self.scan_count += 1
+        self.bus_time_us += SCAN_COST_US
+        if not self.powered():
+            return []
+        return sorted(self.expanders)
+
+    def i2c_read(self, address):
+        self.read_count += 1
+        self.bus_time_us += READ_COST_US
+        if not self.powered() or address not in self.expanders:
+            raise OSError(19)
+        if address in self.stuck:
+            raise OSError(5)
+        return self.expanders[address].state
+
+    # Збій розширювача: читання не вдаються до перезапуску живлення
+    def inject_fault(self, address):
+        self.stuck.add(address)
+
+    def wdt_feed(self):
+        now = self.now()
+        if self.wdt_last_feed is not None and (now - self.wdt_last_feed) * 1000 > self.wdt_timeout:
+            self.wdt_violations += 1
+        self.wdt_last_feed = now
+
+
+# Єдиний екземпляр плати, з яким працюють класи sim.machine
+board = Board()
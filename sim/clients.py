@@ -0,0 +1,93 @@
+# Клієнти HTTP і SSE для симулятора: з'єднання в пам'яті без сокетів, обробник прошивки викликається напряму
+import asyncio
+import time
+
+
+# Запис відповіді прошивки в буфер замість сокета
+class MemoryWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.closed = False
+        self.failed = False  # Маршрут писав str: роутер ковтає виняток, тому відповідь рахується як помилка
+
+    def write(self, data):
+        if self.closed:
+            raise OSError(32)
+        # Як asyncio.StreamWriter: str замість bytes — помилка маршруту, а не тихе перетворення
+        if isinstance(data, str):
+            self.failed = True
+            raise TypeError("data must be bytes-like, not str")
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    async def wait_closed(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def status(self):
+        try:
+            return int(self.data.split(b" ", 2)[1])
+        except (IndexError, ValueError):
+            return 0
+
+
+# Лічильники навантаження: запити, помилки, час обслуговування на хості, події SSE
+class ClientStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.service_us = []
+        self.sse_events = 0
+        self.sse_bytes = 0
+
+
+# Один запит через обробник прошивки; з'єднання закривається після відповіді
+async def request(handler, method, path, stats, body=b""):
+    reader = asyncio.StreamReader()
+    headers = "{} {} HTTP/1.1\r\nHost: 192.168.1.1\r\nConnection: close\r\n".format(method, path)
+    if body:
+        headers += "Content-Length: {}\r\n".format(len(body))
+    reader.feed_data(headers.encode() + b"\r\n" + body)
+    reader.feed_eof()
+    writer = MemoryWriter()
+    start = time.perf_counter()
+    await handler(reader, writer)
+    stats.service_us.append((time.perf_counter() - start) * 1e6)
+    stats.requests += 1
+    if writer.failed or not 200 <= writer.status() < 300:
+        stats.errors += 1
+    return writer
+
+
+# Клієнт веб-інтерфейсу: по колу опитує сторінки з інтервалом у віртуальному часі
+async def http_client(handler, paths, interval, stats, offset=0.0):
+    await asyncio.sleep(offset)
+    i = 0
+    while True:
+        await request(handler, "GET", paths[i % len(paths)], stats)
+        i += 1
+        await asyncio.sleep(interval)
+
+
+# Підписник SSE: з'єднання тримається до кінця прогону, події рахуються в буфері
+async def sse_client(handler, stats):
+    reader = asyncio.StreamReader()
+    reader.feed_data(b"GET /sse HTTP/1.1\r\nHost: 192.168.1.1\r\n\r\n")
+    writer = MemoryWriter()
+    task = asyncio.ensure_future(handler(reader, writer))
+    try:
+        while True:
+            await asyncio.sleep(1)
+            if writer.data:
+                stats.sse_events += writer.data.count(b"\ndata: ")
+                stats.sse_bytes += len(writer.data)
+                writer.data = bytearray()
+    finally:
+        task.cancel()
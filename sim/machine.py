@@ -0,0 +1,105 @@
+# Заміна модуля machine для симулятора: Pin, I2C, Timer, WDT і reset поверх моделі плати
+import asyncio
+
+from sim.board import board
+
+
+# Запит на перезавантаження контролера, перерваний симулятором
+class SimulatedReset(Exception):
+    pass
+
+
+class Pin:
+    IN = 1
+    OUT = 3
+    PULL_UP = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        if pull == Pin.PULL_UP:
+            board.pull_ups.add(id)
+        if value is not None:
+            board.write_pin(id, value)
+
+    def value(self, value=None):
+        if value is None:
+            return board.read_pin(self.id)
+        board.write_pin(self.id, 1 if value else 0)
+
+    def on(self):
+        board.write_pin(self.id, 1)
+
+    def off(self):
+        board.write_pin(self.id, 0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING):
+        board.irq_handlers[self.id] = (trigger, handler, self)
+
+
+class I2C:
+    def __init__(self, id, scl=None, sda=None, freq=100000):
+        self.id = id
+
+    def scan(self):
+        return board.i2c_scan()
+
+    def readfrom(self, address, nbytes):
+        return bytes((board.i2c_read(address),)) * nbytes
+
+    def readfrom_into(self, address, buf):
+        state = board.i2c_read(address)
+        for i in range(len(buf)):
+            buf[i] = state
+
+
+# Програмний таймер на циклі подій asyncio (віртуальний час під симулятором)
+class Timer:
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1):
+        self.id = id
+        self._handle = None
+
+    def init(self, period=1000, mode=PERIODIC, callback=None):
+        self.deinit()
+        self._period = period / 1000
+        self._mode = mode
+        self._callback = callback
+        self._handle = asyncio.get_event_loop().call_later(self._period, self._fire)
+
+    def _fire(self):
+        if self._mode == Timer.PERIODIC:
+            self._handle = asyncio.get_event_loop().call_later(self._period, self._fire)
+        else:
+            self._handle = None
+        self._callback(self)
+
+    def deinit(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+class WDT:
+    def __init__(self, id=0, timeout=5000):
+        board.wdt_timeout = timeout
+        board.wdt_last_feed = board.now()
+
+    def feed(self):
+        board.wdt_feed()
+
+
+def reset():
+    board.resets += 1
+    raise SimulatedReset()
+
+
+# Легкий сон: цикл подій зупиняється, віртуальний годинник стрибає вперед на тривалість сну
+def lightsleep(time_ms=None):
+    loop = asyncio.get_event_loop()
+    if time_ms and hasattr(loop, "advance"):
+        loop.advance(time_ms / 1000)
+    board.settle()
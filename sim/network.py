@@ -0,0 +1,29 @@
+# Заміна модуля network для симулятора: точка доступу без радіо
+AP_IF = 1
+STA_IF = 0
+AUTH_OPEN = 0
+
+
+class WLAN:
+    def __init__(self, interface):
+        self.interface = interface
+        self._active = False
+        self._config = {}
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = bool(state)
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kwargs)
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._config.get("ifconfig", ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0"))
+        self._config["ifconfig"] = config
+
+    def isconnected(self):
+        return False
@@ -0,0 +1,93 @@
+# Розсилка подій SSE: одна серіалізація на подію, обмежені черги клієнтів, heartbeat і повтор за Last-Event-ID
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+
+from logger import logger
+
+# Коментар SSE, який браузер ігнорує; невдалий запис означає мертве з'єднання
+HEARTBEAT = b": heartbeat\n\n"
+
+
+class SSEClient:
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.queue_size = queue_size
+        self.queue = []
+        self.event = asyncio.Event()
+        self.dropped = 0
+
+    # Додавання події в чергу; при переповненні відкидається найстаріша
+    def push(self, payload):
+        if len(self.queue) >= self.queue_size:
+            self.queue.pop(0)
+            self.dropped += 1
+        self.queue.append(payload)
+        self.event.set()
+
+
+class SSEHub:
+    def __init__(self, max_clients=4, queue_size=8, history_size=16, heartbeat_ms=15000):
+        self.clients = []
+        self.max_clients = max_clients
+        self.queue_size = queue_size
+        self.history_size = history_size  # Скільки останніх подій зберігати для повтору
+        self.history = []  # (id, готовий до надсилання payload)
+        self.heartbeat = heartbeat_ms / 1000
+        self.next_id = 1
+        self.rejected = 0
+
+    # Публікація події: серіалізується один раз і ставиться в черги всіх клієнтів без очікування
+    def publish(self, data):
+        event_id = self.next_id
+        self.next_id += 1
+        payload = "id: {}\ndata: {}\n\n".format(event_id, json.dumps(data)).encode()
+        if len(self.history) >= self.history_size:
+            self.history.pop(0)
+        self.history.append((event_id, payload))
+        for client in self.clients:
+            client.push(payload)
+        return event_id
+
+    # Події, новіші за last_event_id, для клієнта, що перепідключився
+    def replay(self, last_event_id):
+        for event_id, payload in self.history:
+            if event_id > last_event_id:
+                yield payload
+
+    # Обслуговування одного клієнта до розриву з'єднання; повертає False, якщо досягнуто ліміту клієнтів
+    async def serve(self, writer, last_event_id=None):
+        if len(self.clients) >= self.max_clients:
+            self.rejected += 1
+            return False
+        client = SSEClient(writer, self.queue_size)
+        self.clients.append(client)
+        logger.info("New SSE connection established, %d clients", len(self.clients))
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            if last_event_id is not None:
+                for payload in self.replay(last_event_id):
+                    writer.write(payload)
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(client.event.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    writer.write(HEARTBEAT)
+                    await writer.drain()
+                    continue
+                client.event.clear()
+                while client.queue:
+                    writer.write(client.queue.pop(0))
+                await writer.drain()
+        except OSError as e:
+            logger.info("SSE connection closed: %s", e)
+        finally:
+            self.clients.remove(client)
+        return True
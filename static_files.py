@@ -0,0 +1,51 @@
+# Віддача статичних файлів веб-інтерфейсу частинами з багаторазового буфера
+import os
+
+# Розмір частини файлу, що надсилається за один запис у сокет
+CHUNK_SIZE = 1024
+
+# Скільки секунд браузер може використовувати файл без перевірки ETag
+CACHE_MAX_AGE = 3600
+
+# Спільний буфер для читання файлів; write() копіює дані, тому буфер одразу придатний для наступної частини
+_buffer = bytearray(CHUNK_SIZE)
+_view = memoryview(_buffer)
+
+# Функція для обчислення ETag з розміру і часу зміни файлу
+def file_etag(stat, suffix=""):
+    return '"%x-%x%s"' % (stat[6], stat[8], suffix)
+
+# Функція для вибору файлу: стиснений .gz варіант, якщо клієнт приймає gzip і файл є
+def _select_file(filepath, accept_encoding):
+    if "gzip" in accept_encoding:
+        try:
+            return filepath + ".gz", os.stat(filepath + ".gz"), True
+        except OSError:
+            pass
+    return filepath, os.stat(filepath), False
+
+# Функція для надсилання файлу; повертає код статусу відповіді
+async def serve_file(writer, filepath, content_type, headers):
+    try:
+        path, stat, gzipped = _select_file(filepath, headers.get("accept-encoding", ""))
+    except OSError:
+        writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\nContent-Length: 13\r\n\r\n404 Not Found")
+        await writer.drain()
+        return 404
+
+    etag = file_etag(stat, "-gz" if gzipped else "")
+    if headers.get("if-none-match") == etag:
+        writer.write("HTTP/1.1 304 Not Modified\r\nETag: {}\r\nCache-Control: max-age={}\r\n\r\n".format(etag, CACHE_MAX_AGE).encode())
+        await writer.drain()
+        return 304
+
+    writer.write("HTTP/1.1 200 OK\r\nContent-Type: {}\r\nContent-Length: {}\r\nETag: {}\r\nCache-Control: max-age={}\r\nVary: Accept-Encoding\r\n{}\r\n".format(
+        content_type, stat[6], etag, CACHE_MAX_AGE, "Content-Encoding: gzip\r\n" if gzipped else "").encode())
+    with open(path, "rb") as f:
+        while True:
+            n = f.readinto(_buffer)
+            if not n:
+                break
+            writer.write(_view[:n])
+            await writer.drain()
+    return 200
@@ -0,0 +1,64 @@
+# Тести прошивки на хості (CPython): модулі з кореня репозиторію, machine і network підміняє пакет sim
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+# Цикл подій на віртуальному годиннику: asyncio.sleep і ticks_ms ідуть разом, без реальних пауз
+@pytest.fixture
+def loop():
+    from sim.board import VirtualClockLoop
+
+    loop = VirtualClockLoop()
+    _set_time_source(loop.time)
+    yield loop
+    _set_time_source(time.monotonic)
+    loop.close()
+
+
+# Зміна джерела часу стрибком переносить вікно обмеження журналу, тому воно починається заново
+def _set_time_source(source):
+    import clock
+    from logger import logger
+
+    clock.set_time_source(source)
+    logger.window_start = clock.ticks_ms()
+    logger.window_count = 0
+
+
+# Віртуальний час у мс з округленням: суми пауз у float дають 799.999... замість 800
+def now_ms():
+    return round(asyncio.get_event_loop().time() * 1000)
+
+
+# Pin, що записує кожну зміну рівня з часом у мс
+class FakePin:
+    OUT = 1
+    IN = 0
+    log = []
+
+    def __init__(self, number, mode=-1, value=None):
+        self.number = number
+        self.level = 0 if value is None else value
+
+    def value(self, level=None):
+        if level is None:
+            return self.level
+        self.level = level
+        FakePin.log.append((now_ms(), self.number, level))
+
+
+# Клавіатура за замовчуванням на FakePin
+@pytest.fixture
+def keypad():
+    from keypad import Keypad, default_keypad
+
+    FakePin.log = []
+    keypad = Keypad(FakePin)
+    keypad.apply(default_keypad())
+    return keypad
@@ -0,0 +1,132 @@
+# Автомат антидребезгу на фейковому годиннику: дребезг, довге натискання і одночасні натискання
+from debounce import Debouncer, IDLE, PENDING, CONFIRMED, LATCHED, RELEASED
+
+
+# Годинник у мілісекундах, який рухає лише тест; кожен крок викликає update, як такт основного циклу
+class FakeClock:
+    def __init__(self, debouncer):
+        self.now = 1000
+        self.debouncer = debouncer
+        self.confirmed = []
+        self.long_presses = []
+
+    def advance(self, ms, step=10):
+        end = self.now + ms
+        while self.now < end:
+            self.now = min(end, self.now + step)
+            self.debouncer.update(self.now, self.confirmed, self.long_presses)
+
+    def press(self, name):
+        self.debouncer.press(name, self.now)
+
+    def release(self, name):
+        return self.debouncer.release(name, self.now)
+
+
+def make(names=("Sensor1", "Sensor2", "Sensor3")):
+    debouncer = Debouncer(activation_ms=200, release_ms=50, long_press_ms=5000)
+    debouncer.configure(names)
+    return debouncer, FakeClock(debouncer)
+
+
+def test_bounce_before_activation_is_dropped():
+    debouncer, clock = make()
+    # Контакт замикається і розмикається кілька разів швидше за затримку активації
+    for _ in range(3):
+        clock.press("Sensor1")
+        clock.advance(30)
+        assert clock.release("Sensor1")
+        clock.advance(20)
+    assert clock.confirmed == []
+    assert debouncer.bounces == 3
+    assert debouncer.state("Sensor1") == IDLE
+    assert not debouncer.active()
+
+
+def test_stable_press_confirmed_once_after_activation_delay():
+    debouncer, clock = make()
+    clock.press("Sensor1")
+    assert debouncer.due_in(clock.now) == 200
+    clock.advance(190)
+    assert clock.confirmed == []
+    assert debouncer.state("Sensor1") == PENDING
+    clock.advance(10)
+    assert clock.confirmed == ["Sensor1"]
+    clock.advance(500)
+    assert clock.confirmed == ["Sensor1"]
+    assert debouncer.state("Sensor1") == CONFIRMED
+
+
+def test_release_bounce_does_not_confirm_again():
+    debouncer, clock = make()
+    clock.press("Sensor1")
+    clock.advance(300)
+    # Дребезг при відпусканні: повторний фронт у вікні release_ms - те саме натискання
+    assert not clock.release("Sensor1")
+    assert debouncer.state("Sensor1") == RELEASED
+    clock.advance(20)
+    clock.press("Sensor1")
+    assert debouncer.state("Sensor1") == CONFIRMED
+    clock.advance(100)
+    clock.release("Sensor1")
+    clock.advance(50)
+    assert debouncer.state("Sensor1") == IDLE
+    assert clock.confirmed == ["Sensor1"]
+    assert debouncer.bounces == 1
+
+
+def test_long_press_latches_once():
+    debouncer, clock = make()
+    clock.press("Sensor2")
+    clock.advance(4990)
+    assert clock.long_presses == []
+    clock.advance(10)
+    assert clock.long_presses == ["Sensor2"]
+    assert debouncer.state("Sensor2") == LATCHED
+    clock.advance(10000)
+    assert clock.long_presses == ["Sensor2"]
+    assert clock.confirmed == ["Sensor2"]
+    clock.release("Sensor2")
+    clock.advance(50)
+    assert debouncer.state("Sensor2") == IDLE
+
+
+def test_short_press_is_not_long():
+    debouncer, clock = make()
+    clock.press("Sensor2")
+    clock.advance(4000)
+    clock.release("Sensor2")
+    clock.advance(2000)
+    assert clock.long_presses == []
+
+
+def test_simultaneous_presses_confirmed_in_press_order():
+    debouncer, clock = make()
+    clock.press("Sensor3")
+    clock.advance(20)
+    clock.press("Sensor1")
+    clock.press("Sensor2")
+    assert debouncer.due_in(clock.now) == 180
+    clock.advance(200)
+    assert clock.confirmed == ["Sensor3", "Sensor1", "Sensor2"]
+    assert debouncer.order == []
+
+
+def test_simultaneous_press_with_one_bounce():
+    debouncer, clock = make()
+    clock.press("Sensor1")
+    clock.press("Sensor2")
+    clock.advance(50)
+    clock.release("Sensor2")
+    clock.advance(200)
+    assert clock.confirmed == ["Sensor1"]
+    assert debouncer.state("Sensor2") == IDLE
+    assert debouncer.due_in(clock.now) is None
+
+
+def test_unknown_sensor_ignored():
+    debouncer, clock = make()
+    clock.press("Sensor9")
+    assert not clock.release("Sensor9")
+    assert not debouncer.active()
+
@@ -0,0 +1,56 @@
+# Фронти входів PCF8574 на записаних послідовностях байтів, як їх читає основний цикл
+from edges import detect_edges, INITIAL_STATE, PRESS, RELEASE
+
+
+# Прогін послідовності (адреса, байт) через detect_edges; повертає всі події по порядку
+def replay(reads, prev_state=None):
+    prev_state = {} if prev_state is None else prev_state
+    events = []
+    for address, state in reads:
+        detect_edges(prev_state, address, state, events)
+    return events
+
+
+def test_first_read_releases_all_low_pins():
+    # Розширювач ще не опитувався: стан вважається 0xFF, тож кожен нульовий біт - відпускання
+    events = replay([(35, 0x0F)])
+    assert events == [(35, pin, RELEASE) for pin in range(4, 8)]
+
+
+def test_unchanged_byte_gives_no_events():
+    prev_state = {35: 0x00}
+    events = []
+    assert detect_edges(prev_state, 35, 0x00, events) == 0
+    assert events == []
+
+
+def test_press_and_release():
+    # Sensor3 (пін 2) натиснутий на трьох опитуваннях поспіль і відпущений
+    events = replay([(35, 0x00), (35, 0x04), (35, 0x04), (35, 0x04), (35, 0x00)], {35: 0x00})
+    assert events == [(35, 2, PRESS), (35, 2, RELEASE)]
+
+
+def test_bounce_reports_every_toggle():
+    # Дребезг контакту на піні 5: кожна зміна - окрема подія, фільтрує їх Debouncer
+    events = replay([(36, 0x20), (36, 0x00), (36, 0x20), (36, 0x00), (36, 0x20)], {36: 0x00})
+    assert events == [(36, 5, PRESS), (36, 5, RELEASE), (36, 5, PRESS), (36, 5, RELEASE), (36, 5, PRESS)]
+
+
+def test_simultaneous_pins_in_pin_order():
+    # Одне читання з кількома зміненими бітами: події в порядку номерів пінів
+    events = replay([(34, 0x81)], {34: 0x02})
+    assert events == [(34, 0, PRESS), (34, 1, RELEASE), (34, 7, PRESS)]
+
+
+def test_expanders_tracked_separately():
+    prev_state = {35: 0x00, 33: 0x00}
+    events = replay([(35, 0x01), (33, 0x01), (35, 0x01), (33, 0x00)], prev_state)
+    assert events == [(35, 0, PRESS), (33, 0, PRESS), (33, 0, RELEASE)]
+    assert prev_state == {35: 0x01, 33: 0x00}
+
+
+def test_return_value_counts_new_events():
+    prev_state = {35: INITIAL_STATE}
+    events = [("earlier",)]
+    assert detect_edges(prev_state, 35, 0xF0, events) == 4
+    assert len(events) == 5
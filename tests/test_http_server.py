@@ -0,0 +1,122 @@
+# Розбір запитів і постійні з'єднання HTTP-сервера на потоках asyncio в пам'яті
+import asyncio
+
+import pytest
+
+from http_server import Router, HTTPError, read_request, send_response
+from sim.clients import MemoryWriter
+
+
+# Потік створюється всередині циклу подій, який запускає тест
+def stream(data, eof=True):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    if eof:
+        reader.feed_eof()
+    return reader
+
+
+def parse(data, max_header_bytes=2048, max_body=64):
+    async def scenario():
+        return await read_request(stream(data), max_header_bytes, max_body)
+    return asyncio.run(scenario())
+
+
+def status_of(data, max_header_bytes=2048, max_body=64):
+    with pytest.raises(HTTPError) as error:
+        parse(data, max_header_bytes, max_body)
+    return error.value.status
+
+
+def test_parses_request_line_headers_and_body():
+    request = parse(b"POST /settings?x=1 HTTP/1.1\r\nHost: a\r\nContent-Length: 4\r\n\r\nabcd")
+    assert (request.method, request.path, request.param("x")) == ("POST", "/settings", "1")
+    assert request.headers["host"] == "a"
+    assert request.body == b"abcd"
+    assert request.keep_alive
+
+
+def test_closed_connection_returns_none():
+    assert parse(b"") is None
+
+
+@pytest.mark.parametrize("data", [
+    b"GET /\r\n\r\n",
+    b"GET / HTTP/1.1\r\nNo colon here\r\n\r\n",
+    b"GET / HTTP/1.1\r\nHost: a\r\n",
+    b"POST / HTTP/1.1\r\nContent-Length: abc\r\n\r\n",
+    b"POST / HTTP/1.1\r\nContent-Length: -1\r\n\r\n",
+])
+def test_malformed_request_is_400(data):
+    assert status_of(data) == 400
+
+
+def test_body_over_limit_is_413():
+    assert status_of(b"POST / HTTP/1.1\r\nContent-Length: 65\r\n\r\n" + b"x" * 65) == 413
+
+
+def test_headers_over_limit_are_431():
+    assert status_of(b"GET / HTTP/1.1\r\nX-Pad: " + b"x" * 100 + b"\r\n\r\n", max_header_bytes=64) == 431
+
+
+def make_router(idle_timeout=5):
+    router = Router(max_body=64, idle_timeout=idle_timeout)
+
+    @router.route("GET", "/ping")
+    async def ping(request, writer):
+        await send_response(writer, request, 200, "pong")
+
+    return router
+
+
+def responses(writer):
+    return writer.data.count(b"HTTP/1.1 ")
+
+
+def serve(data):
+    async def scenario():
+        writer = MemoryWriter()
+        await make_router().handle(stream(data), writer)
+        return writer
+    return asyncio.run(scenario())
+
+
+def test_wrong_method_is_405_with_allow():
+    writer = serve(b"POST /ping HTTP/1.1\r\n\r\n")
+    assert writer.status() == 405
+    assert b"Allow: GET\r\n" in writer.data
+
+
+def test_oversized_body_closes_connection_with_413():
+    data = b"POST /ping HTTP/1.1\r\nContent-Length: 100\r\n\r\n" + b"x" * 100 + b"GET /ping HTTP/1.1\r\n\r\n"
+    writer = serve(data)
+    assert writer.status() == 413
+    assert responses(writer) == 1
+    assert writer.closed
+
+
+def test_keep_alive_serves_several_requests():
+    data = b"GET /ping HTTP/1.1\r\n\r\n" * 3
+    writer = serve(data)
+    assert responses(writer) == 3
+    assert writer.data.count(b"Connection: keep-alive") == 3
+
+
+def test_connection_close_ends_after_one_request():
+    data = b"GET /ping HTTP/1.1\r\nConnection: close\r\n\r\nGET /ping HTTP/1.1\r\n\r\n"
+    writer = serve(data)
+    assert responses(writer) == 1
+
+
+def test_idle_keep_alive_connection_times_out():
+    async def scenario():
+        router = make_router(idle_timeout=0.05)
+        writer = MemoryWriter()
+        # Клієнт не закриває з'єднання і не надсилає наступного запиту
+        reader = stream(b"GET /ping HTTP/1.1\r\n\r\n", eof=False)
+        await asyncio.wait_for(router.handle(reader, writer), 1)
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert responses(writer) == 1
+    assert writer.closed
@@ -0,0 +1,149 @@
+# Кільцевий журнал продажів у тимчасовому каталозі: переповнення кільця, повторне відкриття, підсумки, CSV і помилки flash
+import asyncio
+
+import pytest
+
+import journal as journal_module
+from journal import Journal, DONE, CANCELLED, BOUNCE, HEADER_SIZE, RECORD_SIZE
+from sequencer import Sequencer, EXPIRED
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Час запису в секундах задає тест
+    now = [7200]
+    monkeypatch.setattr(journal_module.time, "time", lambda: now[0])
+    return now
+
+
+def make(tmp_path, **kwargs):
+    return Journal(str(tmp_path / "journal.bin"), **kwargs)
+
+
+def sensors(journal):
+    return [record[1] for record in journal.records()]
+
+
+def test_file_created_full_size(tmp_path):
+    journal = make(tmp_path, capacity=8)
+    journal.open()
+    assert (tmp_path / "journal.bin").stat().st_size == HEADER_SIZE + 8 * RECORD_SIZE
+    assert journal.count() == 0
+
+
+def test_records_buffered_until_batch(tmp_path, clock):
+    journal = make(tmp_path, capacity=8, batch=4)
+    for sensor in range(1, 4):
+        journal.record(sensor, 1, 2, DONE)
+    assert journal.flush_count == 0
+    assert sensors(journal) == [1, 2, 3]
+    journal.record(4, 1, 2, DONE)
+    assert journal.flush_count == 1
+    assert journal.pending == 0
+
+
+def test_wrap_around_keeps_newest_in_order(tmp_path, clock):
+    journal = make(tmp_path, capacity=5, batch=3)
+    for sensor in range(1, 13):
+        journal.record(sensor, 0, 0, DONE)
+    # 12 записів у кільці на 5: у файлі останні 5 записаних, решта ще в буфері
+    assert journal.head == 12
+    journal.record(13, 0, 0, DONE)
+    assert sensors(journal) == [8, 9, 10, 11, 12, 13]
+    journal.flush()
+    assert sensors(journal) == [9, 10, 11, 12, 13]
+    assert journal.count() == 5
+
+
+def test_reopen_keeps_records(tmp_path, clock):
+    journal = make(tmp_path, capacity=6, batch=2)
+    for sensor in range(1, 10):
+        journal.record(sensor, 0, 0, DONE)
+    journal.flush()
+    reopened = make(tmp_path, capacity=6, batch=2)
+    assert sensors(reopened) == [4, 5, 6, 7, 8, 9]
+    reopened.record(10, 0, 0, DONE)
+    reopened.flush()
+    assert sensors(make(tmp_path, capacity=6)) == [5, 6, 7, 8, 9, 10]
+
+
+def test_reopen_with_other_capacity_starts_over(tmp_path, clock):
+    journal = make(tmp_path, capacity=4, batch=1)
+    journal.record(1, 0, 0, DONE)
+    assert sensors(make(tmp_path, capacity=8)) == []
+
+
+def test_summary_and_csv(tmp_path, clock):
+    journal = make(tmp_path, capacity=16, batch=4)
+    journal.record(1, 1, 2, DONE, 250)
+    clock[0] = 7200 + 3600 + 5
+    journal.record(1, 1, 2, DONE, 300)
+    journal.record(2, 3, 0, CANCELLED, 100)
+    journal.record(3, 0, 0, BOUNCE)
+    journal.record(2, 3, 0, DONE, 70000)
+    by_sensor, by_hour, outcomes = journal.summary()
+    assert by_sensor == {1: 2, 2: 1}
+    assert by_hour == {7200: 1, 10800: 2}
+    assert outcomes["done"] == 3
+    assert outcomes["cancelled"] == 1
+    assert outcomes["bounce"] == 1
+
+    rows = list(journal.csv_rows(("None", "1", "2", "3")))
+    assert rows[0] == "time,sensor,action1,action2,outcome,latency_ms\n"
+    assert rows[1] == "7200,1,1,2,done,250\n"
+    assert rows[3] == "10805,2,3,None,cancelled,100\n"
+    # Затримка обмежена розміром поля запису
+    assert rows[5] == "10805,2,3,None,done,65535\n"
+
+
+def test_write_error_drops_batch_and_keeps_working(tmp_path, clock):
+    journal = Journal(str(tmp_path / "missing" / "journal.bin"), capacity=8, batch=2)
+    journal.record(1, 0, 0, DONE)
+    journal.record(2, 0, 0, DONE)
+    assert journal.write_errors == 1
+    assert journal.lost == 2
+    assert journal.pending == 0
+    # Буфер не переповнюється: наступні записи приймаються, як і раніше
+    for sensor in range(3, 8):
+        journal.record(sensor, 0, 0, DONE)
+    assert journal.write_errors == 3
+    (tmp_path / "missing").mkdir()
+    journal.flush()
+    assert sensors(journal) == [7]
+
+
+def test_journal_error_does_not_stop_sequencer(tmp_path, clock):
+    journal = Journal(str(tmp_path / "missing" / "journal.bin"), batch=1)
+    sequencer = Sequencer()
+    sequencer.on_drop = lambda name, reason: journal.record(1, 0, 0, 6)
+    sequencer._drop("Sensor1", EXPIRED)
+    assert sequencer.dropped[EXPIRED] == 1
+
+    def failing_hook(name, reason):
+        raise OSError(2)
+
+    sequencer.on_drop = failing_hook
+    sequencer._drop("Sensor1", EXPIRED)
+    assert sequencer.dropped[EXPIRED] == 2
+
+
+def test_failing_finish_hook_keeps_executor_running():
+    async def scenario():
+        sequencer = Sequencer()
+        sequencer.plans = {"Sensor1": [(None, 0, 0.001)], "Sensor2": [(None, 0, 0.001)]}
+
+        def failing_hook(name, finished, wait_ms):
+            raise OSError(28)
+
+        sequencer.on_finish = failing_hook
+        task = asyncio.ensure_future(sequencer.run())
+        sequencer.submit("Sensor1")
+        await asyncio.sleep(0.02)
+        sequencer.submit("Sensor2")
+        await asyncio.sleep(0.02)
+        task.cancel()
+        return sequencer
+
+    sequencer = asyncio.run(scenario())
+    assert sequencer.completed == 2
+    assert sequencer.queue == []
@@ -0,0 +1,168 @@
+# Послідовності кнопок з веб-інтерфейсу: прогрес, скасування після поточної кнопки, ліміт часу і маршрути /keypad
+import asyncio
+import json
+
+import pytest
+
+import main
+from conftest import FakePin, now_ms
+from sequencer import Sequencer, KeySequence, compile_keys
+from sim import clients
+
+
+# Послідовність з журналом звітів прогресу (стан, натиснуто кнопок)
+def make_sequence(keypad, keys, hold_ms=100, gap_ms=50, max_ms=30000):
+    sequence = KeySequence(1, keys, compile_keys(keys, hold_ms, gap_ms, keypad.table), max_ms)
+    reports = []
+    sequence.on_progress = lambda s: reports.append((now_ms(), s.state, s.done))
+    return sequence, reports
+
+
+# Моменти натискання кнопок: піни рядків, що піднялися
+def presses(keypad):
+    rows = {pin.number for pin in keypad.lines.values() if pin.number in keypad.config["rows"].values()}
+    return [t for t, number, level in FakePin.log if level and number in rows]
+
+
+def test_progress_reports(loop, keypad):
+    sequence, reports = make_sequence(keypad, ["1", "2", "3"])
+    sequencer = Sequencer()
+    loop.run_until_complete(sequencer.run_sequence(sequence))
+    assert reports == [(0, "running", 0), (150, "running", 1), (300, "running", 2), (400, "running", 3), (400, "done", 3)]
+    assert presses(keypad) == [0, 150, 300]
+    assert sequence.status() == {"id": 1, "state": "done", "done": 3, "total": 3}
+
+
+# Скасування під час другої кнопки: вона дотискається і відпускається, третя не натискається
+def test_cancel_after_current_key(loop, keypad):
+    sequence, reports = make_sequence(keypad, ["1", "2", "3"])
+    sequencer = Sequencer()
+    sequencer.release_all = keypad.release_all
+
+    async def scenario():
+        task = asyncio.create_task(sequencer.run_sequence(sequence))
+        await asyncio.sleep(0.2)
+        sequence.cancel()
+        await task
+
+    loop.run_until_complete(scenario())
+    assert presses(keypad) == [0, 150]
+    assert reports[-1] == (300, "cancelled", 2)
+    assert not any(pin.level for pin in keypad.pins.values())
+
+
+def test_runtime_cap(loop, keypad):
+    sequence, reports = make_sequence(keypad, ["1", "2", "3", "4"], max_ms=250)
+    sequencer = Sequencer()
+    sequencer.release_all = keypad.release_all
+    loop.run_until_complete(sequencer.run_sequence(sequence))
+    assert presses(keypad) == [0, 150]
+    assert reports[-1] == (300, "timeout", 2)
+    assert not any(pin.level for pin in keypad.pins.values())
+
+
+# Скасування задачі посеред кнопки (перезавантаження налаштувань) опускає всі лінії
+def test_task_cancel_releases_keys(loop, keypad):
+    sequence, reports = make_sequence(keypad, ["1", "2"])
+    sequencer = Sequencer()
+    sequencer.release_all = keypad.release_all
+
+    async def scenario():
+        task = asyncio.create_task(sequencer.run_sequence(sequence))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    loop.run_until_complete(scenario())
+    assert sequence.state == "cancelled"
+    assert not any(pin.level for pin in keypad.pins.values())
+
+
+# Маршрути /keypad з секвенсором, що працює задачею циклу; події SSE збираються в список
+@pytest.fixture
+def web(tmp_path, monkeypatch, keypad):
+    monkeypatch.chdir(tmp_path)
+    sequencer = Sequencer()
+    sequencer.release_all = keypad.release_all
+    monkeypatch.setattr(main, "keypad", keypad)
+    monkeypatch.setattr(main, "sequencer", sequencer)
+    web = main.load_web()
+    events = []
+    monkeypatch.setattr(web.sse_hub, "publish", events.append)
+    web.events = events
+    return web
+
+
+# Запит до маршруту в циклі тесту: (статус, розібране тіло JSON)
+async def call(web, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+    writer = await clients.request(web.http_handler, method, path, clients.ClientStats(), data)
+    payload = bytes(writer.data).partition(b"\r\n\r\n")[2]
+    return writer.status(), json.loads(payload) if writer.status() < 300 else None
+
+
+def test_route_runs_sequence(loop, web):
+    async def scenario():
+        task = asyncio.create_task(main.sequencer.run())
+        status, body = await call(web, "POST", "/keypad/sequence", {"keys": ["C", "1", "E"], "hold": 100, "gap": 50})
+        assert (status, body["estimated_ms"]) == (202, 400)
+        await asyncio.sleep(1)
+        status, body = await call(web, "GET", "/keypad/sequence")
+        task.cancel()
+        return body
+
+    assert loop.run_until_complete(scenario()) == {"id": web.keypad_sequence_id, "state": "done", "done": 3, "total": 3}
+    progress = [event["keypad"] for event in web.events]
+    assert [(p["state"], p["done"]) for p in progress] == [("queued", 0), ("running", 0), ("running", 1), ("running", 2),
+                                                           ("running", 3), ("done", 3)]
+
+
+def test_route_cancel(loop, web):
+    async def scenario():
+        task = asyncio.create_task(main.sequencer.run())
+        await call(web, "POST", "/keypad/sequence", {"keys": ["1", "2", "3"], "hold": 100, "gap": 50})
+        await asyncio.sleep(0.2)
+        cancelled = await call(web, "POST", "/keypad/cancel")
+        await asyncio.sleep(1)
+        again = await call(web, "POST", "/keypad/cancel")
+        task.cancel()
+        return cancelled, again
+
+    cancelled, again = loop.run_until_complete(scenario())
+    assert cancelled == (200, {"cancelled": True})
+    assert again == (200, {"cancelled": False})
+    assert main.sequencer.sequence.status()["state"] == "cancelled"
+    assert main.sequencer.sequence.done == 2
+
+
+# Друга послідовність, поки перша не завершилась, відхиляється; після завершення приймається
+def test_route_concurrent_sequence_conflict(loop, web):
+    async def scenario():
+        task = asyncio.create_task(main.sequencer.run())
+        first = await call(web, "POST", "/keypad/sequence", {"keys": ["1", "2"]})
+        await asyncio.sleep(0.1)
+        second = await call(web, "POST", "/keypad/sequence", {"keys": ["3"]})
+        await asyncio.sleep(2)
+        third = await call(web, "POST", "/keypad/sequence", {"keys": ["3"]})
+        task.cancel()
+        return first[0], second[0], third[0]
+
+    assert loop.run_until_complete(scenario()) == (202, 409, 202)
+
+
+@pytest.mark.parametrize("body", [
+    {"keys": []},
+    {"keys": "12"},
+    {"keys": ["1", "X"]},
+    {"keys": ["1"] * 33},
+    {"keys": ["1"], "hold": 10},
+    {"keys": ["1"], "gap": 6000},
+    {"keys": ["1"], "hold": "long"},
+    # Перевищення KEYPAD_MAX_MS: 16 x 2000 мс
+    {"keys": ["1"] * 16, "hold": 2000, "gap": 0},
+])
+def test_route_rejects_invalid(loop, web, body):
+    status, _ = loop.run_until_complete(call(web, "POST", "/keypad/sequence", body))
+    assert status == 400
+    assert main.sequencer.sequence is None
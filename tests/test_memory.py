@@ -0,0 +1,82 @@
+# Пауза збирання сміття на час продажу з gc MicroPython, підміненим на хості
+import asyncio
+
+import pytest
+
+import memory
+from memory import MemoryManager
+
+
+# gc MicroPython: поріг алокацій, mem_free/mem_alloc і журнал викликів
+class FakeGC:
+    def __init__(self, free=60000, alloc=40000):
+        self.free = free
+        self.alloc = alloc
+        self.current = 25000
+        self.calls = []
+
+    def threshold(self, amount=None):
+        if amount is None:
+            return self.current
+        self.current = amount
+        self.calls.append(("threshold", amount))
+
+    def mem_free(self):
+        return self.free
+
+    def mem_alloc(self):
+        return self.alloc
+
+    def collect(self):
+        self.calls.append(("collect",))
+
+    def disable(self):
+        self.calls.append(("disable",))
+
+    def enable(self):
+        self.calls.append(("enable",))
+
+
+@pytest.fixture
+def fake_gc(monkeypatch):
+    fake = FakeGC()
+    monkeypatch.setattr(memory, "gc", fake)
+    return fake
+
+
+# Під час продажу автоматичний gc не вимикається: знімається лише поріг, після продажу він відновлюється
+def test_pause_keeps_auto_gc_enabled(fake_gc):
+    manager = MemoryManager()
+    manager.pause()
+    manager.pause()
+    assert fake_gc.current == -1
+    manager.resume()
+    assert fake_gc.current == -1
+    manager.resume()
+    assert fake_gc.current == 25000
+    assert fake_gc.calls == [("threshold", -1), ("threshold", 25000)]
+    assert manager.pending
+
+
+def test_pause_collects_when_heap_is_low(fake_gc):
+    fake_gc.free = 8000
+    manager = MemoryManager(low_water=16384)
+    manager.pause()
+    assert fake_gc.calls == [("collect",), ("threshold", -1)]
+    assert manager.collections == 1
+    manager.resume()
+
+
+def test_no_collection_while_paused(fake_gc):
+    manager = MemoryManager()
+    manager.pause()
+    manager.pending = True
+    fake_gc.calls.clear()
+
+    async def idle_ticks():
+        task = asyncio.create_task(manager.run(tick_ms=1))
+        await asyncio.sleep(0.02)
+        task.cancel()
+
+    asyncio.run(idle_ticks())
+    assert fake_gc.calls == []
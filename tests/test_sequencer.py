@@ -0,0 +1,140 @@
+# Плани секвенсора на віртуальному годиннику: таймінг проти старої послідовності 300 мс / delay_between_clicks
+import asyncio
+
+import pytest
+
+from clock import ticks_ms
+from conftest import FakePin, now_ms
+from keypad import default_keypad
+from sequencer import Sequencer, compile_plan, PRESS_TIME_MS
+
+
+# GPIO рядка і стовпця кнопки за конфігурацією за замовчуванням
+def lines(key):
+    config = default_keypad()
+    row, col = config["keys"][key]
+    return config["rows"][row], config["cols"][col]
+
+
+# Очікувані зміни рівнів старої послідовності: кнопка тисне рядок і стовпець, 300 мс, відпускає, пауза між кнопками
+def old_timeline(actions, clamp_c, delay_ms, start=0):
+    events = []
+    t = start
+    for i, action in enumerate((["C"] if clamp_c else []) + list(actions)):
+        if i:
+            t += delay_ms
+        if action != "None":
+            row, col = lines(action)
+            events += [(t, row, 1), (t, col, 1), (t + PRESS_TIME_MS, row, 0), (t + PRESS_TIME_MS, col, 0)]
+        t += PRESS_TIME_MS
+    return events, t
+
+
+def run_plan(loop, plan, sequencer=None):
+    sequencer = sequencer or Sequencer()
+    loop.run_until_complete(sequencer.execute(plan))
+    return sequencer
+
+
+@pytest.mark.parametrize("clamp_c", [True, False])
+@pytest.mark.parametrize("delay_ms", [100, 200, 400])
+def test_plan_matches_old_timing(loop, keypad, clamp_c, delay_ms):
+    plan = compile_plan(["5", "E"], clamp_c, delay_ms, keypad.table, keypad.press_ms)
+    run_plan(loop, plan)
+    expected, end = old_timeline(["5", "E"], clamp_c, delay_ms)
+    assert FakePin.log == expected
+    assert round(loop.time() * 1000) == end
+
+
+@pytest.mark.parametrize("actions", [["None", "3"], ["7", "None"], ["None", "None"]])
+def test_none_keeps_timing(loop, keypad, actions):
+    plan = compile_plan(actions, True, 200, keypad.table, keypad.press_ms)
+    run_plan(loop, plan)
+    expected, end = old_timeline(actions, True, 200)
+    assert FakePin.log == expected
+    # Порожня дія лише чекає: тривалість плану та сама, що й з кнопкою
+    assert round(loop.time() * 1000) == end == 300 + 200 + 300 + 200 + 300
+
+
+def test_unknown_action_keeps_timing(loop, keypad):
+    plan = compile_plan(["?", "1"], False, 200, keypad.table, keypad.press_ms)
+    run_plan(loop, plan)
+    assert FakePin.log == old_timeline(["None", "1"], False, 200)[0]
+
+
+def test_press_profile(loop, keypad):
+    config = default_keypad()
+    config["profile"] = "long"
+    keypad.apply(config)
+    plan = compile_plan(["2"], False, 200, keypad.table, keypad.press_ms)
+    run_plan(loop, plan)
+    row, col = lines("2")
+    assert FakePin.log == [(0, row, 1), (0, col, 1), (500, row, 0), (500, col, 0)]
+
+
+def test_plan_reuses_pin_objects(keypad):
+    plan = compile_plan(["1", "1"], True, 200, keypad.table, keypad.press_ms)
+    pins = {id(pin) for pin, _, _ in plan}
+    assert pins <= {id(pin) for pin in keypad.pins.values()}
+
+
+# Скасування посеред натискання: усі лінії клавіатури опускаються
+def test_cancel_releases_pins(loop, keypad):
+    plan = compile_plan(["1", "9"], True, 200, keypad.table, keypad.press_ms)
+    sequencer = Sequencer()
+    sequencer.release_all = keypad.release_all
+
+    async def scenario():
+        task = asyncio.create_task(sequencer.execute(plan))
+        await asyncio.sleep(0.65)  # "1" натиснута
+        assert any(pin.level for pin in keypad.pins.values())
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    loop.run_until_complete(scenario())
+    assert not any(pin.level for pin in keypad.pins.values())
+    assert not sequencer.busy
+
+
+# Без release_all секвенсор опускає піни самого плану
+def test_cancel_without_keypad_releases_plan_pins(loop, keypad):
+    plan = compile_plan(["4"], False, 200, keypad.table, keypad.press_ms)
+    sequencer = Sequencer()
+
+    async def scenario():
+        task = asyncio.create_task(sequencer.execute(plan))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    loop.run_until_complete(scenario())
+    row, col = lines("4")
+    assert keypad.pins[row].level == 0 and keypad.pins[col].level == 0
+
+
+# Задача секвенсора виконує черговані плани по одному, без накладання
+def test_queue_runs_plans_in_order(loop, keypad):
+    sequencer = Sequencer()
+    sequencer.plans = {
+        "Sensor1": compile_plan(["1"], False, 200, keypad.table, keypad.press_ms),
+        "Sensor2": compile_plan(["2"], False, 200, keypad.table, keypad.press_ms),
+    }
+    finished = []
+    sequencer.on_finish = lambda name, done, wait_ms: finished.append((now_ms(), name, done, wait_ms))
+
+    async def scenario():
+        task = asyncio.create_task(sequencer.run())
+        sequencer.submit("Sensor1", ticks_ms())
+        sequencer.submit("Sensor2", ticks_ms())
+        await asyncio.sleep(1)
+        task.cancel()
+
+    loop.run_until_complete(scenario())
+    row1, col1 = lines("1")
+    row2, col2 = lines("2")
+    assert FakePin.log == [(0, row1, 1), (0, col1, 1), (300, row1, 0), (300, col1, 0),
+                           (300, row2, 1), (300, col2, 1), (600, row2, 0), (600, col2, 0)]
+    assert finished == [(300, "Sensor1", True, 0), (600, "Sensor2", True, 300)]
+    assert sequencer.completed == 2 and sequencer.idle()
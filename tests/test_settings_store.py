@@ -0,0 +1,172 @@
+# Атомарний запис налаштувань і відновлення після обірваного запису, у тимчасовому каталозі
+import asyncio
+import json
+import os
+
+import pytest
+
+import settings_store
+from settings_store import SettingsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SettingsStore(str(tmp_path / "settings.json"))
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_save_writes_through_temp_file(store):
+    assert store.save_now({"delay_between_clicks": 200})
+    assert read(store.path) == {"delay_between_clicks": 200}
+    assert not os.path.exists(store.tmp_path)
+
+
+def test_unchanged_content_is_not_rewritten(store):
+    store.save_now({"a": 1})
+    assert not store.save_now({"a": 1})
+    assert store.write_count == 1
+    assert store.skip_count == 1
+
+
+def test_failed_write_keeps_previous_file(store, monkeypatch):
+    store.save_now({"a": 1})
+
+    # Живлення зникло посеред запису тимчасового файлу
+    class TornFile:
+        def __init__(self, path, mode):
+            self.f = open(path, mode)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.f.close()
+
+        def write(self, content):
+            self.f.write(content[:len(content) // 2])
+            raise OSError(28)
+
+    monkeypatch.setattr(settings_store, "open", TornFile, raising=False)
+    with pytest.raises(OSError):
+        store.save_now({"a": 2, "b": 3})
+    monkeypatch.undo()
+
+    assert read(store.path) == {"a": 1}
+    assert SettingsStore(store.path).load() == {"a": 1}
+
+
+def test_replace_on_fat_without_overwriting_rename(store, monkeypatch):
+    store.save_now({"a": 1})
+    rename = os.rename
+
+    def fat_rename(src, dst):
+        if os.path.exists(dst):
+            raise OSError(17)
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", fat_rename)
+    assert store.save_now({"a": 2})
+    assert read(store.path) == {"a": 2}
+    assert not os.path.exists(store.tmp_path)
+
+
+def test_recover_from_rename_interrupted_on_fat(store):
+    # На FAT основний файл уже видалено, а перейменування не відбулося: лишився лише тимчасовий
+    with open(store.tmp_path, "w") as f:
+        json.dump({"a": 2}, f)
+    assert store.load() == {"a": 2}
+    assert read(store.path) == {"a": 2}
+    assert not os.path.exists(store.tmp_path)
+
+
+def test_corrupt_main_file_falls_back_to_temp(store):
+    with open(store.path, "w") as f:
+        f.write('{"a": ')
+    with open(store.tmp_path, "w") as f:
+        json.dump({"a": 2}, f)
+    assert store.load() == {"a": 2}
+    assert read(store.path) == {"a": 2}
+
+
+def test_torn_temp_file_keeps_last_good_settings(store):
+    store.save_now({"a": 1})
+    with open(store.tmp_path, "w") as f:
+        f.write('{"a": 2, "b"')
+    assert SettingsStore(store.path).load() == {"a": 1}
+
+
+def test_nothing_readable_returns_none(store):
+    with open(store.path, "w") as f:
+        f.write("garbage")
+    assert store.load() is None
+
+
+def test_deferred_save_coalesces_changes(store):
+    store.debounce_ms = 0
+    store.request_save({"a": 1})
+    store.request_save({"a": 2})
+    assert store.flush_due()
+    assert store.flush()
+    assert read(store.path) == {"a": 2}
+    assert store.write_count == 1
+    assert not store.flush()
+
+
+# Помилка flash у фоновій задачі: задача працює далі, зміни лишаються і записуються наступною спробою
+def test_flush_error_keeps_pending_for_retry(store, monkeypatch):
+    store.debounce_ms = 0
+    store.save_now({"a": 1})
+    store.request_save({"a": 2})
+
+    def full(path, mode):
+        raise OSError(28)
+
+    monkeypatch.setattr(settings_store, "open", full, raising=False)
+    assert not store.flush()
+    assert store.write_errors == 1
+    assert store.pending == {"a": 2}
+    monkeypatch.undo()
+
+    assert store.flush()
+    assert read(store.path) == {"a": 2}
+    assert store.pending is None
+
+
+def test_failed_save_now_keeps_pending(store, monkeypatch):
+    store.request_save({"a": 1})
+
+    def full(path, mode):
+        raise OSError(28)
+
+    monkeypatch.setattr(settings_store, "open", full, raising=False)
+    with pytest.raises(OSError):
+        store.save_now({"a": 1})
+    assert store.pending == {"a": 1}
+
+
+def test_run_survives_write_error(store, monkeypatch):
+    store.debounce_ms = 0
+    attempts = []
+
+    def flaky(path, mode):
+        attempts.append(path)
+        if len(attempts) == 1:
+            raise OSError(5)
+        return open(path, mode)
+
+    async def scenario():
+        task = asyncio.create_task(store.run(interval_ms=1))
+        store.request_save({"a": 3})
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return task
+
+    monkeypatch.setattr(settings_store, "open", flaky, raising=False)
+    asyncio.run(scenario())
+    assert store.write_errors == 1
+    assert store.write_count == 1
+    assert read(store.path) == {"a": 3}
@@ -0,0 +1,102 @@
+# Розсилка SSE з повільними і мертвими клієнтами: відкидання найстаріших подій і видалення за heartbeat
+import asyncio
+
+from sse import SSEHub, HEARTBEAT
+from sim.clients import MemoryWriter
+
+
+# Клієнт, який не вичитує сокет: drain чекає, доки тест не відкриє шлюз
+class SlowWriter(MemoryWriter):
+    def __init__(self):
+        super().__init__()
+        self.gate = asyncio.Event()
+
+    async def drain(self):
+        await self.gate.wait()
+
+
+def events(writer):
+    return [int(line[4:]) for line in bytes(writer.data).split(b"\n") if line.startswith(b"id: ")]
+
+
+def test_slow_client_drops_oldest_events():
+    async def scenario():
+        hub = SSEHub(queue_size=4)
+        writer = SlowWriter()
+        task = asyncio.ensure_future(hub.serve(writer))
+        await asyncio.sleep(0)
+        for i in range(10):
+            hub.publish({"n": i})
+        client = hub.clients[0]
+        assert client.dropped == 6
+        writer.gate.set()
+        await asyncio.sleep(0.01)
+        task.cancel()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert events(writer) == [7, 8, 9, 10]
+
+
+def test_publish_does_not_wait_for_slow_client():
+    async def scenario():
+        hub = SSEHub(queue_size=4)
+        slow = SlowWriter()
+        fast = MemoryWriter()
+        tasks = [asyncio.ensure_future(hub.serve(slow)), asyncio.ensure_future(hub.serve(fast))]
+        await asyncio.sleep(0)
+        for i in range(3):
+            hub.publish({"n": i})
+            await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        return fast
+
+    assert events(asyncio.run(scenario())) == [1, 2, 3]
+
+
+def test_heartbeat_on_idle_connection():
+    async def scenario():
+        hub = SSEHub(heartbeat_ms=10)
+        writer = MemoryWriter()
+        task = asyncio.ensure_future(hub.serve(writer))
+        await asyncio.sleep(0.035)
+        task.cancel()
+        return writer
+
+    assert asyncio.run(scenario()).data.count(HEARTBEAT) >= 2
+
+
+def test_dead_client_evicted_by_heartbeat():
+    async def scenario():
+        hub = SSEHub(heartbeat_ms=10)
+        writer = MemoryWriter()
+        task = asyncio.ensure_future(hub.serve(writer))
+        await asyncio.sleep(0)
+        assert len(hub.clients) == 1
+        # Браузер пішов без закриття: запис heartbeat дає OSError
+        writer.close()
+        served = await asyncio.wait_for(task, 1)
+        return hub, served
+
+    hub, served = asyncio.run(scenario())
+    assert served
+    assert hub.clients == []
+
+
+def test_client_limit_and_replay():
+    async def scenario():
+        hub = SSEHub(max_clients=1)
+        for i in range(3):
+            hub.publish({"n": i})
+        writer = MemoryWriter()
+        task = asyncio.ensure_future(hub.serve(writer, last_event_id=1))
+        await asyncio.sleep(0)
+        rejected = await hub.serve(MemoryWriter())
+        task.cancel()
+        return hub, writer, rejected
+
+    hub, writer, rejected = asyncio.run(scenario())
+    assert not rejected
+    assert hub.rejected == 1
+    assert events(writer) == [2, 3]
@@ -0,0 +1,138 @@
+# Віддача статичних файлів через потоки asyncio: частини, Content-Length, ETag/304 і вибір .gz
+import asyncio
+import gzip
+import os
+
+import pytest
+
+import static_files
+from static_files import serve_file, file_etag, CHUNK_SIZE
+
+
+# Обгортка StreamWriter, що запам'ятовує розмір кожного запису
+class RecordingWriter:
+    def __init__(self, writer):
+        self.writer = writer
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(len(data))
+        self.writer.write(data)
+
+    async def drain(self):
+        await self.writer.drain()
+
+
+# Відповідь serve_file через сокет loopback: (статус, заголовки, тіло, розміри записів, повернутий код)
+def fetch(filepath, headers, content_type="text/html"):
+    result = {}
+
+    async def handler(reader, writer):
+        recording = RecordingWriter(writer)
+        result["status"] = await serve_file(recording, filepath, content_type, headers)
+        result["writes"] = recording.writes
+        writer.close()
+
+    async def scenario():
+        server = await asyncio.start_server(handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(scenario())
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode().split("\r\n")
+    parsed = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        parsed[name.strip().lower()] = value.strip()
+    assert int(lines[0].split(" ")[1]) == result["status"]
+    return result["status"], parsed, body, result["writes"]
+
+
+@pytest.fixture
+def page(tmp_path):
+    path = tmp_path / "index.html"
+    path.write_bytes(bytes(range(256)) * 10 + b"tail")  # 2564 байти: дві повні частини і залишок
+    return str(path)
+
+
+def test_streams_in_chunks(page):
+    status, headers, body, writes = fetch(page, {})
+    assert status == 200
+    assert body == open(page, "rb").read()
+    assert headers["content-length"] == str(len(body))
+    assert headers["content-type"] == "text/html"
+    assert headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in headers
+    # Заголовки одним записом, потім тіло частинами не більше CHUNK_SIZE
+    assert writes[1:] == [CHUNK_SIZE, CHUNK_SIZE, len(body) - 2 * CHUNK_SIZE]
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.css"
+    path.write_bytes(b"")
+    status, headers, body, writes = fetch(str(path), {}, "text/css")
+    assert status == 200
+    assert headers["content-length"] == "0"
+    assert body == b"" and len(writes) == 1
+
+
+def test_etag_not_modified(page):
+    status, headers, _, _ = fetch(page, {})
+    etag = headers["etag"]
+    assert etag == file_etag(os.stat(page))
+    status, headers, body, _ = fetch(page, {"if-none-match": etag})
+    assert status == 304
+    assert headers["etag"] == etag
+    assert body == b""
+
+
+def test_stale_etag_sends_file(page):
+    status, _, body, _ = fetch(page, {"if-none-match": '"0-0"'})
+    assert status == 200
+    assert body == open(page, "rb").read()
+
+
+def test_gzip_variant(page):
+    with open(page, "rb") as f:
+        original = f.read()
+    with open(page + ".gz", "wb") as f:
+        f.write(gzip.compress(original))
+    status, headers, body, _ = fetch(page, {"accept-encoding": "gzip, deflate"})
+    assert status == 200
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(os.path.getsize(page + ".gz"))
+    assert headers["etag"].endswith('-gz"')
+    assert gzip.decompress(body) == original
+    # ETag стисненого варіанту не підходить до звичайного файлу
+    status, _, body, _ = fetch(page, {"if-none-match": headers["etag"]})
+    assert status == 200 and body == original
+
+
+def test_gzip_missing_falls_back(page):
+    status, headers, body, _ = fetch(page, {"accept-encoding": "gzip"})
+    assert status == 200
+    assert "content-encoding" not in headers
+    assert body == open(page, "rb").read()
+
+
+def test_missing_file(tmp_path):
+    status, headers, body, _ = fetch(str(tmp_path / "missing.js"), {})
+    assert status == 404
+    assert headers["content-length"] == str(len(body))
+    assert body == b"404 Not Found"
+
+
+# Спільний буфер не повинен протікати між відповідями: другий, коротший файл без хвоста першого
+def test_shared_buffer_reuse(page, tmp_path):
+    fetch(page, {})
+    short = tmp_path / "short.txt"
+    short.write_bytes(b"abc")
+    _, _, body, _ = fetch(str(short), {}, "text/plain")
+    assert body == b"abc"
+    assert len(static_files._buffer) == CHUNK_SIZE
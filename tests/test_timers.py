@@ -0,0 +1,117 @@
+# Програмні таймери на віртуальному годиннику: час спрацювання перевіряється точно, без реальних пауз
+import asyncio
+
+from clock import ticks_ms
+from timers import TimerWheel
+
+
+# Колесо працює задачею циклу; scenario(wheel, fired) отримує журнал спрацювань [(мс, ім'я)]
+def run(loop, scenario):
+    wheel = TimerWheel()
+    fired = []
+
+    async def main():
+        task = asyncio.create_task(wheel.run())
+        await scenario(wheel, fired)
+        task.cancel()
+
+    loop.run_until_complete(main())
+    return wheel, fired
+
+
+def recorder(fired, name, then=None):
+    def callback():
+        fired.append((ticks_ms(), name))
+        if then:
+            then()
+    return callback
+
+
+def test_one_shot(loop):
+    async def scenario(wheel, fired):
+        timer = wheel.timer(recorder(fired, "a"), "a")
+        timer.start(100)
+        await asyncio.sleep(0.5)
+        assert not timer.active
+
+    _, fired = run(loop, scenario)
+    assert fired == [(100, "a")]
+
+
+def test_periodic(loop):
+    async def scenario(wheel, fired):
+        timer = wheel.timer(recorder(fired, "a"), "a")
+        timer.start(100, periodic=True)
+        await asyncio.sleep(0.35)
+        assert timer.remaining() == 50
+
+    wheel, fired = run(loop, scenario)
+    assert [t for t, _ in fired] == [100, 200, 300]
+    assert wheel.max_jitter_ms == 0
+
+
+def test_restart_postpones(loop):
+    async def scenario(wheel, fired):
+        timer = wheel.timer(recorder(fired, "a"), "a")
+        timer.start(100)
+        await asyncio.sleep(0.08)
+        timer.start(100)
+        await asyncio.sleep(0.5)
+
+    _, fired = run(loop, scenario)
+    assert fired == [(180, "a")]
+
+
+def test_restart_earlier_wakes_wheel(loop):
+    async def scenario(wheel, fired):
+        timer = wheel.timer(recorder(fired, "a"), "a")
+        timer.start(1000)
+        await asyncio.sleep(0.01)
+        timer.start(50)
+        await asyncio.sleep(1.5)
+
+    _, fired = run(loop, scenario)
+    assert fired == [(60, "a")]
+
+
+def test_cancel(loop):
+    async def scenario(wheel, fired):
+        a = wheel.timer(recorder(fired, "a"), "a")
+        b = wheel.timer(recorder(fired, "b"), "b")
+        a.start(100)
+        b.start(200)
+        await asyncio.sleep(0.05)
+        a.cancel()
+        await asyncio.sleep(0.5)
+        assert a.remaining() is None
+
+    _, fired = run(loop, scenario)
+    assert fired == [(200, "b")]
+
+
+# Колбек B запускає A на 50 мс, поки інший таймер чекає 1 с: A не має чекати на нього
+def test_start_from_callback(loop):
+    async def scenario(wheel, fired):
+        a = wheel.timer(recorder(fired, "a"), "a")
+        b = wheel.timer(recorder(fired, "b", lambda: a.start(50)), "b")
+        c = wheel.timer(recorder(fired, "c"), "c")
+        b.start(20)
+        c.start(1000)
+        await asyncio.sleep(1.5)
+
+    _, fired = run(loop, scenario)
+    assert fired == [(20, "b"), (70, "a"), (1000, "c")]
+
+
+def test_failing_callback_keeps_wheel_running(loop):
+    def broken():
+        raise RuntimeError("boom")
+
+    async def scenario(wheel, fired):
+        wheel.timer(broken, "broken").start(10)
+        wheel.timer(recorder(fired, "a"), "a").start(20)
+        await asyncio.sleep(0.1)
+
+    wheel, fired = run(loop, scenario)
+    assert fired == [(20, "a")]
+    assert wheel.fired == 2
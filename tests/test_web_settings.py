@@ -0,0 +1,56 @@
+# Перевірка змін сенсорів у PATCH /settings: дії сенсора приймаються лише списком
+import asyncio
+import json
+
+import pytest
+
+import main
+from settings_schema import coerce
+from sim import clients
+
+
+# Збережені налаштування, якщо запит пройде, пишуться в тимчасовий каталог
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return main.load_web()
+
+
+def patch(web, body):
+    stats = clients.ClientStats()
+    writer = asyncio.run(clients.request(web.http_handler, "PATCH", "/settings", stats, json.dumps(body).encode()))
+    return writer.status()
+
+
+def test_actions_list_accepted(web):
+    assert web.validate_sensor_actions({"Sensor1": ["9", "9"]}) == [(0, ["9", "9"])]
+
+
+@pytest.mark.parametrize("actions", ["99", "12", {"9": "9"}, ("9", "9")])
+def test_actions_must_be_list(web, actions):
+    with pytest.raises(ValueError):
+        web.validate_sensor_actions({"Sensor1": actions})
+
+
+@pytest.mark.parametrize("actions", ["99", "12"])
+def test_patch_string_actions_rejected(web, actions):
+    before = main.sensor_store.actions_of(0)
+    assert patch(web, {"sensors": {"Sensor1": actions}}) == 400
+    assert main.sensor_store.actions_of(0) == before
+
+
+def test_patch_unknown_sensor_rejected(web):
+    assert patch(web, {"sensors": {"Sensor99": ["1"]}}) == 400
+
+
+# Логічні налаштування приймають лише true/false (або рядки "true"/"false"), не числа
+@pytest.mark.parametrize("value", [1, 0, 1.0, "1", "yes", None])
+def test_patch_bool_rejects_non_bool(web, value):
+    before = main.settings["power_lightsleep"]
+    assert patch(web, {"settings": {"power_lightsleep": value}}) == 400
+    assert main.settings["power_lightsleep"] is before
+
+
+@pytest.mark.parametrize("value, expected", [(True, True), (False, False), ("true", True), ("false", False)])
+def test_coerce_bool(value, expected):
+    assert coerce("power_lightsleep", value) is expected
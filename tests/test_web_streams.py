@@ -0,0 +1,89 @@
+# Потокові відповіді веб-інтерфейсу через справжній сокет loopback: кожен фрагмент має бути bytes
+import asyncio
+import json
+
+import pytest
+
+import main
+from logger import logger
+from sim.clients import ClientStats, MemoryWriter, request
+from journal import Journal
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "journal", Journal(str(tmp_path / "journal.bin")))
+    return main.load_web()
+
+
+# Запит через сервер asyncio на випадковому порту; повертає (статус, тіло)
+def fetch(web, path):
+    async def scenario():
+        server = await asyncio.start_server(web.http_handler, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write("GET {} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n\r\n".format(path).encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+
+    response = asyncio.run(scenario())
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), body
+
+
+def test_journal_summary(web):
+    main.journal.record(1, 1, 2, 0, 250)
+    main.journal.flush()
+    status, body = fetch(web, "/journal/summary")
+    assert status == 200
+    summary = json.loads(body)
+    assert summary["records"] == main.journal.count()
+    assert summary["sensors"]["Sensor1"] >= 1
+
+
+def test_journal_csv(web):
+    main.journal.record(2, 1, 2, 0, 250)
+    main.journal.flush()
+    status, body = fetch(web, "/journal.csv")
+    assert status == 200
+    lines = body.decode().splitlines()
+    assert lines[0] == "time,sensor,action1,action2,outcome,latency_ms"
+    row = lines[-1].split(",")
+    assert row[1] == "2" and row[4:] == ["done", "250"]
+
+
+def test_logs(web):
+    logger.info("Stream test %d", 7)
+    status, body = fetch(web, "/logs?n=5")
+    assert status == 200
+    assert any("INFO Stream test 7" in line for line in body.decode().splitlines())
+
+
+def test_metrics(web):
+    main.latency.reset()
+    status, body = fetch(web, "/metrics")
+    assert status == 200
+    lines = body.decode().splitlines()
+    assert lines[0].startswith("# HELP vend_latency_seconds")
+    assert lines[-1] == "vend_presses_abandoned_total 0"
+
+
+def test_memory_writer_rejects_str():
+    writer = MemoryWriter()
+    with pytest.raises(TypeError):
+        writer.write("HTTP/1.1 200 OK\r\n")
+    assert writer.failed and not writer.data
+
+
+# Сторінки, які опитує навантаження симулятора: жоден маршрут не пише str
+@pytest.mark.parametrize("path", ["/get_sensors", "/diag", "/metrics", "/journal/summary", "/journal.csv", "/logs"])
+def test_routes_write_bytes(web, path):
+    stats = ClientStats()
+    writer = asyncio.run(request(web.http_handler, "GET", path, stats))
+    assert writer.status() == 200
+    assert stats.errors == 0
@@ -0,0 +1,125 @@
+# Програмні таймери на циклі подій: одноразові, періодичні й перезапускні, без апаратних machine.Timer
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from clock import ticks_ms, ticks_diff, ticks_add
+from logger import logger
+
+
+class SoftTimer:
+    def __init__(self, wheel, callback, name):
+        self.wheel = wheel
+        self.callback = callback  # Функція або корутина без аргументів
+        self.name = name
+        self.active = False
+        self.periodic = False
+        self.period = 0
+        self.deadline = 0
+        self.fired = 0
+        self.max_jitter_ms = 0
+
+    # Запуск або перезапуск: відлік починається заново від поточного моменту
+    def start(self, period_ms, periodic=False):
+        self.period = period_ms
+        self.periodic = periodic
+        self.deadline = ticks_add(ticks_ms(), period_ms)
+        self.active = True
+        self.wheel.reschedule(self.deadline)
+
+    def cancel(self):
+        self.active = False
+
+    # Скільки мс залишилось до спрацювання; None для зупиненого таймера
+    def remaining(self):
+        if not self.active:
+            return None
+        return max(0, ticks_diff(self.deadline, ticks_ms()))
+
+
+class TimerWheel:
+    def __init__(self):
+        self.timers = []
+        self.event = asyncio.Event()
+        self.next_deadline = None  # Найближчий термін, до якого спить задача
+        self.max_jitter_ms = 0
+        self.fired = 0
+
+    # Створення таймера; запускається викликом start()
+    def timer(self, callback, name=""):
+        timer = SoftTimer(self, callback, name)
+        self.timers.append(timer)
+        return timer
+
+    # Будимо задачу лише тоді, коли новий термін раніший за той, до якого вона спить
+    def reschedule(self, deadline):
+        if self.next_deadline is None or ticks_diff(deadline, self.next_deadline) < 0:
+            self.event.set()
+
+    # Спрацювання таймера: корутина запускається окремою задачею, щоб не затримувати інші таймери
+    def _fire(self, timer, now):
+        jitter = ticks_diff(now, timer.deadline)
+        if jitter > timer.max_jitter_ms:
+            timer.max_jitter_ms = jitter
+        if jitter > self.max_jitter_ms:
+            self.max_jitter_ms = jitter
+        if timer.periodic:
+            timer.deadline = ticks_add(timer.deadline, timer.period)
+            # Після довгої затримки пропущені періоди не наздоганяємо
+            if ticks_diff(timer.deadline, now) <= 0:
+                timer.deadline = ticks_add(now, timer.period)
+        else:
+            timer.active = False
+        timer.fired += 1
+        self.fired += 1
+        try:
+            result = timer.callback()
+            if hasattr(result, "send"):
+                asyncio.create_task(result)
+        except Exception as e:
+            logger.error("Timer %s callback failed: %s", timer.name, e)
+
+    # Через скільки мс спрацює найближчий таймер; None, якщо активних немає
+    def due_in(self, now):
+        due = None
+        for timer in self.timers:
+            if timer.active:
+                remaining = ticks_diff(timer.deadline, now)
+                if due is None or remaining < due:
+                    due = remaining
+        if due is not None and due < 0:
+            due = 0
+        return due
+
+    def stats(self):
+        return {
+            "fired": self.fired,
+            "max_jitter_ms": self.max_jitter_ms,
+            "timers": [{"name": t.name, "active": t.active, "remaining_ms": t.remaining(), "fired": t.fired,
+                        "max_jitter_ms": t.max_jitter_ms} for t in self.timers],
+        }
+
+    # Задача колеса: спить до найближчого терміну або до зміни таймерів.
+    # Подія скидається до перегляду, щоб start() з колбека під час перегляду розбудив наступне очікування
+    async def run(self):
+        while True:
+            self.event.clear()
+            now = ticks_ms()
+            self.next_deadline = None
+            for timer in self.timers:
+                if not timer.active:
+                    continue
+                if ticks_diff(timer.deadline, now) <= 0:
+                    self._fire(timer, now)
+                if timer.active and (self.next_deadline is None or ticks_diff(timer.deadline, self.next_deadline) < 0):
+                    self.next_deadline = timer.deadline
+            if self.next_deadline is None:
+                await self.event.wait()
+                continue
+            delay = ticks_diff(self.next_deadline, ticks_ms())
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.event.wait(), delay / 1000)
+                except asyncio.TimeoutError:
+                    pass
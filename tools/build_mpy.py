@@ -0,0 +1,71 @@
+# Збирання прошивки: модулі компілюються mpy-cross у байткод .mpy для запису на flash і для заморожування
+# Запуск: python tools/build_mpy.py [--out build] [--march xtensawin]
+# Результат: build/mpy/*.mpy (копіювати на контролер разом з main.py і www/) і build/manifest.py для збирання
+# власної прошивки MicroPython із замороженими модулями (FROZEN_MANIFEST=.../build/manifest.py)
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# main.py лишається вихідним файлом: MicroPython запускає саме його після boot.py
+ENTRY = "main.py"
+
+
+# Модулі прошивки: усі .py у корені репозиторію; sim, bench і tools на контролер не потрапляють
+def firmware_modules():
+    return sorted(name for name in os.listdir(ROOT) if name.endswith(".py") and name != ENTRY)
+
+
+# Компілятор: пакет mpy_cross з PyPI або програма mpy-cross у PATH
+def mpy_cross_command():
+    try:
+        import mpy_cross  # noqa: F401
+        return [sys.executable, "-m", "mpy_cross"]
+    except ImportError:
+        pass
+    path = shutil.which("mpy-cross")
+    if path is None:
+        raise SystemExit("mpy-cross not found: pip install mpy-cross, or build it from micropython/mpy-cross")
+    return [path]
+
+
+def write_manifest(path, modules):
+    with open(path, "w") as f:
+        f.write("# Згенеровано tools/build_mpy.py\n")
+        f.write('include("$(PORT_DIR)/boards/manifest.py")\n')
+        for name in modules:
+            f.write('module("{}", base_path="{}")\n'.format(name, os.path.abspath(ROOT)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile firmware modules to .mpy")
+    parser.add_argument("--out", default=os.path.join(ROOT, "build"))
+    parser.add_argument("--march", default="xtensawin", help="native architecture for @micropython.native code (ESP32: xtensawin)")
+    parser.add_argument("-O", dest="opt", type=int, default=1, help="mpy-cross optimisation level; 1+ strips asserts and __debug__ code")
+    args = parser.parse_args()
+
+    compiler = mpy_cross_command()
+    modules = firmware_modules()
+    mpy_dir = os.path.join(args.out, "mpy")
+    os.makedirs(mpy_dir, exist_ok=True)
+
+    total_py = total_mpy = 0
+    for name in modules:
+        source = os.path.join(ROOT, name)
+        target = os.path.join(mpy_dir, name[:-3] + ".mpy")
+        subprocess.check_call(compiler + ["-march=" + args.march, "-O{}".format(args.opt), "-s", name, "-o", target, source])
+        py_size = os.path.getsize(source)
+        mpy_size = os.path.getsize(target)
+        total_py += py_size
+        total_mpy += mpy_size
+        print("  {:24s} {:7d} B -> {:6d} B".format(name, py_size, mpy_size))
+    write_manifest(os.path.join(args.out, "manifest.py"), modules)
+    print("{} modules: {} B source -> {} B bytecode; manifest: {}".format(
+        len(modules), total_py, total_mpy, os.path.join(args.out, "manifest.py")))
+
+
+if __name__ == "__main__":
+    main()
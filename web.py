@@ -0,0 +1,427 @@
+# Веб-інтерфейс: точка доступу WiFi, HTTP-маршрути і SSE; модуль імпортується лише при першому запуску точки доступу
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+try:
+    import usocket as socket
+except ImportError:
+    import socket
+try:
+    import ujson
+except ImportError:
+    import json as ujson
+from hal import Pin, load_network
+from clock import ticks_ms, ticks_diff
+from logger import logger, log
+from settings_schema import SCHEMA, coerce
+from static_files import serve_file
+from sse import SSEHub
+from http_server import Router, HTTPError, send_response
+from sequencer import KeySequence, compile_keys, FIFO
+from sensor_store import ACTION_SLOTS
+
+# Розсилка подій сенсорів клієнтам SSE
+sse_hub = SSEHub()
+
+# Модуль прошивки (main), стан якого обслуговує веб-інтерфейс; задається в attach()
+app = None
+
+# Точка доступу і сервер
+ap = None
+server = None
+last_client = 0  # Час останнього запиту клієнта (мс)
+
+def attach(module):
+    global app
+    app = module
+
+# Функція для запуску точки доступу WiFi та HTTP-сервера
+async def start_wifi_ap_and_server():
+    global ap, server
+
+    log("Starting WiFi AP and HTTP server")
+    # Очищуємо пам'ять перед запуском точки доступу; під час продажу збирання відкладається до вікна простою
+    if app.sequencer.idle():
+        app.memory.collect()
+        log("Memory collected before starting WiFi AP")
+    else:
+        app.memory.pending = True
+
+    network = load_network()
+    ap = network.WLAN(network.AP_IF)
+    ap.active(True)
+    ap.config(essid="Necta Astro", authmode=network.AUTH_OPEN)
+    ap.ifconfig(('192.168.1.1', '255.255.255.0', '192.168.1.1', '8.8.8.8'))
+    log("WiFi Access Point 'Necta Astro' started")
+
+    addr = socket.getaddrinfo('0.0.0.0', 80)[0][-1]
+    server = await asyncio.start_server(http_handler, addr[0], addr[1])
+    log("HTTP server started")
+
+    timeout = min(app.settings.get("access_point_deactivation_time", 10), 30) * 60000
+    app.ap_timer.start(timeout)
+    # Відлік простою без клієнтів починається з запуску точки доступу
+    client_seen()
+    app.ap_idle_timer.start(30000, periodic=True)
+    app.power.radio(True, ticks_ms())
+
+# Функція для зупинки точки доступу WiFi та HTTP-сервера
+async def stop_wifi_ap_and_server():
+    global server
+    if server is None:
+        return
+    log("Stopping WiFi Access Point and server")
+    app.ap_timer.cancel()
+    app.ap_idle_timer.cancel()
+    server.close()
+    await server.wait_closed()
+    server = None
+    ap.active(False)
+    app.wifi_active = False
+    app.power.radio(False, ticks_ms())
+    log("WiFi Access Point and server stopped")
+
+# Функція для активації піну
+async def activate_pin(pin_name):
+    logger.info("Activating pin: %s", pin_name)
+    if pin_name in app.keypad.table:
+        row, col = app.keypad.table[pin_name]
+        try:
+            logger.debug("Activating pin combination - row: %s, col: %s", row, col)
+            row.value(1)
+            col.value(1)
+            logger.debug("Pin %s activated", pin_name)
+        except ValueError as e:
+            logger.info("Error activating pin: %s", e)
+    elif pin_name in app.keypad.lines:
+        app.keypad.lines[pin_name].value(1)
+        logger.debug("Keypad line %s activated", pin_name)
+    elif pin_name in app.pins:
+        pin_number = app.pins[pin_name]["number"]
+        try:
+            logger.debug("Activating pin %s with pin number %d", pin_name, pin_number)
+            pin = app.out_pins[pin_name] if pin_name in app.out_pins else Pin(pin_number, Pin.OUT)
+            pin.value(1)
+            logger.debug("Pin %s state after activation: %d", pin_name, pin.value())
+        except ValueError as e:
+            logger.info("Error activating pin: %s", e)
+    else:
+        logger.info("Invalid pin name: %s", pin_name)
+
+# Функція для деактивації піну
+async def deactivate_pin(pin_name):
+    logger.info("Deactivating pin: %s", pin_name)
+    if pin_name in app.keypad.table:
+        row, col = app.keypad.table[pin_name]
+        try:
+            logger.debug("Deactivating pin combination - row: %s, col: %s", row, col)
+            row.value(0)
+            col.value(0)
+            logger.debug("Pin %s deactivated", pin_name)
+        except ValueError as e:
+            logger.info("Error deactivating pin: %s", e)
+    elif pin_name in app.keypad.lines:
+        app.keypad.lines[pin_name].value(0)
+        logger.debug("Keypad line %s deactivated", pin_name)
+    elif pin_name in app.pins:
+        pin_number = app.pins[pin_name]["number"]
+        try:
+            logger.debug("Deactivating pin %s with pin number %d", pin_name, pin_number)
+            pin = app.out_pins[pin_name] if pin_name in app.out_pins else Pin(pin_number, Pin.OUT)
+            pin.value(0)
+            logger.debug("Pin %s state after deactivation: %d", pin_name, pin.value())
+        except ValueError as e:
+            logger.info("Error deactivating pin: %s", e)
+    else:
+        logger.info("Invalid pin name: %s", pin_name)
+
+# Таблиця маршрутів HTTP-сервера
+router = Router()
+
+# Обробник HTTP-з'єднань
+# Кожне з'єднання оновлює час останнього клієнта для дострокового вимкнення точки доступу
+def client_seen():
+    global last_client
+    last_client = ticks_ms()
+
+def client_idle_ms():
+    if sse_hub.clients:
+        return 0
+    return ticks_diff(ticks_ms(), last_client)
+
+async def http_handler(reader, writer):
+    client_seen()
+    await router.handle(reader, writer)
+
+@router.route('POST', '/activate_pin')
+async def activate_pin_route(request, writer):
+    data = request.json()
+    logger.debug("Data received for activation: %s", data)
+    await activate_pin(data.get('pin'))
+    await send_response(writer, request, 200, "Pin activated")
+
+@router.route('POST', '/deactivate_pin')
+async def deactivate_pin_route(request, writer):
+    data = request.json()
+    logger.debug("Data received for deactivation: %s", data)
+    await deactivate_pin(data.get('pin'))
+    await send_response(writer, request, 200, "Pin deactivated")
+
+# Обмеження послідовностей кнопок з веб-інтерфейсу
+KEYPAD_MAX_KEYS = 32
+KEYPAD_HOLD_MS = (50, 2000)
+KEYPAD_GAP_MS = (0, 5000)
+KEYPAD_MAX_MS = 30000  # Загальний час виконання однієї послідовності
+
+# Номер останньої послідовності
+keypad_sequence_id = 0
+
+# Прогрес послідовності надсилається клієнтам SSE окремим типом подій
+def keypad_progress(sequence):
+    sse_hub.publish({"keypad": sequence.status()})
+    if sequence.finished():
+        logger.info("Keypad sequence %d %s: %d keys done", sequence.id, sequence.state, sequence.done)
+
+@router.route('POST', '/keypad/sequence')
+async def keypad_sequence_route(request, writer):
+    # {"keys": ["C", "1", "2", "E"], "hold": 300, "gap": 200}; виконує секвенсор між продажами
+    global keypad_sequence_id
+    data = request.json()
+    try:
+        keys = data["keys"]
+        hold_ms = int(data.get("hold", app.keypad.press_ms))
+        gap_ms = int(data.get("gap", app.settings["delay_between_clicks"]))
+        if not isinstance(keys, list) or not 0 < len(keys) <= KEYPAD_MAX_KEYS:
+            raise ValueError("keys")
+        for key in keys:
+            if key not in app.keypad.table:
+                raise ValueError(key)
+        if not KEYPAD_HOLD_MS[0] <= hold_ms <= KEYPAD_HOLD_MS[1] or not KEYPAD_GAP_MS[0] <= gap_ms <= KEYPAD_GAP_MS[1]:
+            raise ValueError("timing")
+        # Занадто довга послідовність - неприпустимі параметри запиту, а не завелике тіло
+        estimated_ms = len(keys) * hold_ms + (len(keys) - 1) * gap_ms
+        if estimated_ms > KEYPAD_MAX_MS:
+            raise ValueError("duration")
+    except (KeyError, ValueError, TypeError, AttributeError):
+        raise HTTPError(400)
+
+    keypad_sequence_id += 1
+    sequence = KeySequence(keypad_sequence_id, keys, compile_keys(keys, hold_ms, gap_ms, app.keypad.table), KEYPAD_MAX_MS)
+    sequence.on_progress = keypad_progress
+    if not app.sequencer.submit_sequence(sequence):
+        raise HTTPError(409)
+    logger.info("Keypad sequence %d queued: %s", sequence.id, "".join(keys))
+    keypad_progress(sequence)
+    await send_response(writer, request, 202, ujson.dumps({"id": sequence.id, "estimated_ms": estimated_ms}), 'application/json')
+
+@router.route('GET', '/keypad/sequence')
+async def keypad_status_route(request, writer):
+    sequence = app.sequencer.sequence
+    await send_response(writer, request, 200, ujson.dumps(sequence.status() if sequence is not None else None), 'application/json')
+
+@router.route('POST', '/keypad/cancel')
+async def keypad_cancel_route(request, writer):
+    sequence = app.sequencer.sequence
+    cancelled = sequence is not None and not sequence.finished()
+    if cancelled:
+        sequence.cancel()
+    await send_response(writer, request, 200, ujson.dumps({"cancelled": cancelled}), 'application/json')
+
+# Статичні файли веб-інтерфейсу
+def static_route(filepath, content_type):
+    async def handler(request, writer):
+        logger.debug("Serving file: %s", filepath)
+        await serve_file(writer, filepath, content_type, request.headers)
+    return handler
+
+router.add('GET', '/', static_route('www/index.html', 'text/html'))
+router.add('GET', '/script.js', static_route('www/script.js', 'application/javascript'))
+router.add('GET', '/styles.css', static_route('www/styles.css', 'text/css'))
+
+# ETag поточної версії налаштувань для умовних оновлень
+def settings_etag():
+    return '"%d"' % app.settings.get("settings_version", 0)
+
+# Функція для перевірки змін дій сенсорів: {"SensorN": ["1", "C"]} -> [(індекс, дії)]; помилка дає ValueError
+def validate_sensor_actions(new_sensors):
+    updates = []
+    for name, actions in new_sensors.items():
+        i = app.sensor_store.number(name)
+        # Лише список: рядок "99" теж ітерується і мовчки став би діями ["9", "9"]
+        if i is None or not isinstance(actions, list) or len(actions) > ACTION_SLOTS:
+            raise ValueError(name)
+        for action in actions:
+            # Відомі кнопки або "None"; чи є кнопка на клавіатурі, перевіряє check_settings
+            if action not in app.sensor_store.codes:
+                raise ValueError(action)
+        updates.append((i, actions))
+    return updates
+
+# Матриця клавіатури змінюється лише між продажами: план, що виконується, тримає старі піни
+def ensure_keypad_idle(new_values):
+    if "keypad" in new_values and new_values["keypad"] != app.settings["keypad"] and not app.sequencer.idle():
+        raise HTTPError(409)
+
+@router.route('GET', '/keypad')
+async def keypad_route(request, writer):
+    await send_response(writer, request, 200, ujson.dumps(app.settings["keypad"]), 'application/json', "ETag: {}\r\n".format(settings_etag()))
+
+@router.route('POST', '/save_settings')
+async def save_settings_route(request, writer):
+    new_settings = request.json()
+
+    # Повний документ від веб-інтерфейсу; ключі поза схемою ігноруються, як і раніше
+    try:
+        new_sensors = new_settings.pop("sensors")
+        updates = validate_sensor_actions({name: details["settings"] for name, details in new_sensors.items()})
+        new_values = {}
+        for key, value in new_settings.items():
+            if key in SCHEMA:
+                new_values[key] = coerce(key, value)
+        app.check_settings(new_values, updates)
+    except (KeyError, ValueError, TypeError, AttributeError):
+        raise HTTPError(400)
+    ensure_keypad_idle(new_values)
+
+    restart_required = app.commit_settings(new_values, updates)
+    logger.info("Settings updated: %s", new_values)
+    await send_response(writer, request, 200, '{"status": "success"}', 'application/json', "ETag: {}\r\n".format(settings_etag()))
+
+    if restart_required:
+        # Запускаємо перезавантаження контролера з затримкою
+        request.keep_alive = False
+        asyncio.create_task(app.delayed_reset(1))  # Затримка 1 секунда перед перезавантаженням
+
+@router.route('PATCH', '/settings')
+async def patch_settings_route(request, writer):
+    # Часткове оновлення: {"settings": {ключ: значення}, "sensors": {"SensorN": [дія, дія]}}
+    if_match = request.headers.get('if-match')
+    if if_match is not None and if_match != settings_etag():
+        raise HTTPError(412)
+    patch = request.json()
+    try:
+        new_values = {}
+        for key, value in patch.get("settings", {}).items():
+            new_values[key] = coerce(key, value)
+        updates = validate_sensor_actions(patch.get("sensors", {}))
+        app.check_settings(new_values, updates)
+    except (KeyError, ValueError, TypeError, AttributeError):
+        raise HTTPError(400)
+    ensure_keypad_idle(new_values)
+
+    restart_required = app.commit_settings(new_values, updates)
+    logger.info("Settings patched: %d keys, %d sensors", len(new_values), len(updates))
+    body = ujson.dumps({"status": "success", "version": app.settings["settings_version"], "restart_required": restart_required})
+    await send_response(writer, request, 200, body, 'application/json', "ETag: {}\r\n".format(settings_etag()))
+
+    if restart_required:
+        request.keep_alive = False
+        asyncio.create_task(app.delayed_reset(1))
+
+@router.route('GET', '/get_sensors')
+async def get_sensors_route(request, writer):
+    # Відповідь серіалізується лише після зміни налаштувань; сенсори вже впорядковані за номером
+    if app.sensors_response is None:
+        sensor_data = {
+            "sensors": [{"name": app.sensor_store.name(i), "settings": app.sensor_store.actions_of(i)} for i in range(app.sensor_store.count)],
+            "version": app.settings.get("settings_version", 0),
+            "settings": {
+                "delay_between_clicks": app.settings["delay_between_clicks"],
+                "sensor_activation_delay": app.settings["sensor_activation_delay"],
+                "free_mode_timeout": app.settings["free_mode_timeout"],
+                "access_point_deactivation_time": app.settings["access_point_deactivation_time"],
+                "clamp_C_before_combination": app.settings["clamp_C_before_combination"],
+                "calibration_interval": app.settings["calibration_interval"],
+                "sensor_interrupt_mode": app.settings.get("sensor_interrupt_mode", False),
+                "sensor_fallback_poll": app.settings.get("sensor_fallback_poll", 1000),
+                "vend_queue_policy": app.settings.get("vend_queue_policy", FIFO),
+                "vend_queue_depth": app.settings.get("vend_queue_depth", 4),
+                "vend_queue_expiry": app.settings.get("vend_queue_expiry", 10000),
+                "power_idle_after": app.settings.get("power_idle_after", 10),
+                "power_idle_poll": app.settings.get("power_idle_poll", 500),
+                "power_lightsleep": app.settings.get("power_lightsleep", False),
+                "ap_idle_timeout": app.settings.get("ap_idle_timeout", 5)
+            }
+        }
+        app.sensors_response = ujson.dumps(sensor_data).encode()
+    await send_response(writer, request, 200, app.sensors_response, 'application/json', "ETag: {}\r\n".format(settings_etag()))
+
+@router.route('GET', '/logs')
+async def logs_route(request, writer):
+    # Останні записи журналу, рядок за рядком без збирання всієї відповіді в пам'яті
+    try:
+        count = int(request.param('n', '50'))
+    except ValueError:
+        raise HTTPError(400)
+    request.keep_alive = False
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nConnection: close\r\n\r\n")
+    for line in logger.tail(count):
+        writer.write((line + "\n").encode())
+        await writer.drain()
+
+@router.route('GET', '/i2c_stats')
+async def i2c_stats_route(request, writer):
+    await send_response(writer, request, 200, ujson.dumps(app.bus.stats()), 'application/json')
+
+@router.route('GET', '/metrics')
+async def metrics_route(request, writer):
+    # Гістограми затримки у форматі Prometheus, рядок за рядком
+    request.keep_alive = False
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\nConnection: close\r\n\r\n")
+    for line in app.latency.render():
+        writer.write(line.encode())
+    await writer.drain()
+
+@router.route('POST', '/metrics/reset')
+async def metrics_reset_route(request, writer):
+    app.latency.reset()
+    log("Latency metrics reset")
+    await send_response(writer, request, 200, '{"status": "success"}', 'application/json')
+
+@router.route('GET', '/diag')
+async def diag_route(request, writer):
+    # Пробне виділення найбільшого блоку лише на явний запит і поза продажем
+    if request.param('probe') == '1' and app.sequencer.idle():
+        app.memory.probe_largest_free()
+    await send_response(writer, request, 200, ujson.dumps({"uptime_ms": ticks_ms(), "memory": app.memory.stats(), "timers": app.timer_wheel.stats(), "queue": app.sequencer.stats(), "expanders": app.health.stats(), "boot": app.boot.stats(), "power": app.power.stats()}), 'application/json')
+
+@router.route('GET', '/journal/summary')
+async def journal_summary_route(request, writer):
+    # Підсумки рахуються одним проходом по файлу журналу
+    by_sensor, by_hour, outcomes = app.journal.summary()
+    request.keep_alive = False
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n\r\n")
+    writer.write(('{"records": %d, "outcomes": %s, "sensors": {' % (app.journal.count(), ujson.dumps(outcomes))).encode())
+    first = True
+    for number in sorted(by_sensor):
+        writer.write(('%s"%s": %d' % ("" if first else ", ", app.sensor_store.name(number - 1), by_sensor[number])).encode())
+        first = False
+    writer.write(b'}, "hours": [')
+    first = True
+    for hour in sorted(by_hour):
+        writer.write(('%s[%d, %d]' % ("" if first else ", ", hour, by_hour[hour])).encode())
+        first = False
+        await writer.drain()
+    writer.write(b']}')
+    await writer.drain()
+
+@router.route('GET', '/journal.csv')
+async def journal_csv_route(request, writer):
+    # CSV формується рядок за рядком під час читання файлу
+    request.keep_alive = False
+    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/csv\r\nConnection: close\r\n\r\n")
+    for row in app.journal.csv_rows(app.sensor_store.actions):
+        writer.write(row.encode())
+        await writer.drain()
+
+@router.route('GET', '/sse')
+async def sse_route(request, writer):
+    request.keep_alive = False
+    try:
+        last_event_id = int(request.headers.get('last-event-id', ''))
+    except ValueError:
+        last_event_id = None
+    if not await sse_hub.serve(writer, last_event_id):
+        logger.warning("SSE client limit reached, connection rejected")
+        await send_response(writer, request, 503, "503 Service Unavailable")